@@ -1,6 +1,201 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+F32 = np.float32
+_TIME_MAJOR = ("_h", "_y", "_mod", "_hebb", "_mask", "_dh")  # buffers (T, B, ...); os demais são (B, ...)
+
 
 class NeuromodulatedNetwork:
-    def __init__(self, **kwargs): self.cfg = kwargs
+    """
+    Rede Backpropamine (plasticidade diferenciável com neuromodulação) em NumPy vetorizado.
+
+    Por passo t de um episódio, para o lote inteiro de uma vez:
+        h_t    = tanh(x_t W_in + b)
+        y_t    = h_t (W + alpha * Hebb_t)             # pesos plásticos por episódio
+        m_t    = tanh(h_t w_mod + b_mod)              # neuromodulador
+        Hebb_{t+1} = clip(Hebb_t + eta * m_t * h_t ⊗ y_t, -1, 1)
+
+    W, alpha, W_in e w_mod (eta fixo) são treinados por BPTT completo através
+    dos traços (gradientes escritos à mão), com Adam. Todos os buffers
+    (ativações por passo, traços, gradientes, momentos) são float32
+    pré-alocados e atualizados in-place; o único laço Python é sobre o tempo.
+
+    train_step(batch): batch = (x, y) com x (B, T, n_in) e y (B, T, n_out);
+    qualquer outra sequência é tratada como ids de episódio da tarefa
+    sintética interna (um episódio por id, semeado pelo id).
+    """
+
+    def __init__(self, n_in: int = 12, n_hidden: int = 64, n_out: int = 4, seq_len: int = 20,
+                 eta: float = 0.1, lr: float = 1e-2, grad_clip: float = 1.0, seed: int = 0, **kwargs):
+        self.cfg = kwargs
+        self.n_in, self.n_hidden, self.n_out, self.seq_len = int(n_in), int(n_hidden), int(n_out), int(seq_len)
+        self.eta, self.lr, self.grad_clip = F32(eta), F32(lr), float(grad_clip)
+        rng = np.random.default_rng(seed)
+        H, O = self.n_hidden, self.n_out
+        self.params: Dict[str, np.ndarray] = {
+            "W_in":  (rng.standard_normal((self.n_in, H)) / np.sqrt(self.n_in)).astype(F32),
+            "b":     np.zeros(H, F32),
+            "W":     (rng.standard_normal((H, O)) / np.sqrt(H)).astype(F32),
+            "alpha": np.full((H, O), 0.01, F32),
+            "w_mod": (rng.standard_normal((H, 1)) / np.sqrt(H)).astype(F32),
+            "b_mod": np.zeros(1, F32),
+        }
+        self.grads = {k: np.zeros_like(v) for k, v in self.params.items()}
+        self._m = {k: np.zeros_like(v) for k, v in self.params.items()}
+        self._v = {k: np.zeros_like(v) for k, v in self.params.items()}
+        self.t = 0
+        self._shape: Optional[Tuple[int, int]] = None
+        self._cap: Optional[Tuple[int, int]] = None  # (lote máximo, T) dos buffers alocados
+
+    def config(self) -> Dict[str, Any]:
+        """Hiperparâmetros que reconstroem a rede (junto com self.params)."""
+        return {"n_in": self.n_in, "n_hidden": self.n_hidden, "n_out": self.n_out, "seq_len": self.seq_len,
+                "eta": float(self.eta), "lr": float(self.lr), "grad_clip": self.grad_clip}
+
+    @classmethod
+    def from_weights(cls, params: Dict[str, np.ndarray], config: Dict[str, Any],
+                     copy: bool = False) -> "NeuromodulatedNetwork":
+        """Rede sobre pesos existentes; sem copy os arrays são usados como estão (ex.: views
+        somente leitura de um mmap, suficientes para forward/loss, não para train_step)."""
+        net = cls(**config)
+        net.params = {k: (np.array(params[k], F32) if copy else params[k]) for k in net.params}
+        return net
+
+    # ---- buffers ----
+    def _alloc(self, B: int, T: int):
+        """
+        Buffers de ativação com capacidade para o maior lote já visto (por T); lotes
+        menores usam views [:B] (micro-batching com tamanhos variáveis não realoca).
+        """
+        if self._shape == (B, T):
+            return
+        H, O = self.n_hidden, self.n_out
+        cap = self._cap
+        if cap is None or cap[1] != T or cap[0] < B:
+            C = max(B, cap[0] if cap and cap[1] == T else 0)
+            self._full = {
+                "_h": np.empty((T, C, H), F32), "_y": np.empty((T, C, O), F32), "_mod": np.empty((T, C, 1), F32),
+                "_hebb": np.empty((T + 1, C, H, O), F32), "_mask": np.empty((T, C, H, O), bool),
+                "_dh": np.empty((T, C, H), F32),
+                # por passo: dL/dHebb_{t+1} (_G) e temporários do backward
+                **{k: np.empty((C, H, O), F32) for k in ("_eff", "_outer", "_G", "_dE", "_dU", "_dUm")},
+            }
+            self._cap = (C, T)
+        for k, buf in self._full.items():
+            setattr(self, k, buf[:, :B] if k in _TIME_MAJOR else buf[:B])
+        self._shape = (B, T)
+
+    # ---- tarefa sintética ----
+    def episodes(self, ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Um mapeamento linear aleatório por episódio: y_t = x_t M. A entrada traz
+        x_t e o alvo anterior y_{t-1}; M muda a cada episódio, então pesos fixos
+        não bastam e os traços plásticos podem acumulá-lo ao longo do episódio.
+        """
+        k = self.n_in - self.n_out
+        B, T = len(ids), self.seq_len
+        x = np.zeros((B, T, self.n_in), F32)
+        y = np.empty((B, T, self.n_out), F32)
+        for i, sid in enumerate(ids):  # geração do dado (não do treino): uma semente por episódio
+            r = np.random.default_rng(int(sid))
+            M = (r.standard_normal((k, self.n_out)) / np.sqrt(k)).astype(F32)
+            x[i, :, :k] = r.standard_normal((T, k))
+            np.matmul(x[i, :, :k], M, out=y[i])
+        x[:, 1:, k:] = y[:, :-1]
+        return x, y
+
+    # ---- forward / backward ----
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """Roda o episódio inteiro (lote vetorizado); guarda o necessário para o backward."""
+        p = self.params
+        T, B = x.shape[1], x.shape[0]
+        self._alloc(B, T)
+        hebb, eff, outer = self._hebb, self._eff, self._outer
+        hebb[0].fill(0)
+        xt = np.ascontiguousarray(x.transpose(1, 0, 2), dtype=F32)
+        self._x = xt
+        np.tanh(xt @ p["W_in"] + p["b"], out=self._h)  # projeção de entrada: todos os passos de uma vez
+        for t in range(T):
+            h = self._h[t]
+            np.multiply(p["alpha"], hebb[t], out=eff)
+            eff += p["W"]
+            np.matmul(h[:, None, :], eff, out=self._y[t][:, None, :])
+            np.tanh(h @ p["w_mod"] + p["b_mod"], out=self._mod[t])
+            np.multiply(h[:, :, None], self._y[t][:, None, :], out=outer)
+            outer *= self.eta * self._mod[t][:, :, None]
+            np.add(hebb[t], outer, out=hebb[t + 1])
+            np.less(np.abs(hebb[t + 1]), 1.0, out=self._mask[t])
+            np.clip(hebb[t + 1], -1.0, 1.0, out=hebb[t + 1])
+        return self._y.transpose(1, 0, 2)
+
+    def backward(self, y_target: np.ndarray) -> float:
+        """BPTT através dos traços plásticos; acumula em self.grads e retorna a perda (MSE)."""
+        p, g = self.params, self.grads
+        T, B = self._shape[1], self._shape[0]
+        yt = y_target.transpose(1, 0, 2)
+        err = self._y - yt
+        loss = float(np.mean(err * err))
+        dy_all = err * F32(2.0 / err.size)
+        for v in g.values():
+            v.fill(0)
+        G, dE, eff, outer = self._G, self._dE, self._eff, self._outer
+        dU, dU_eta_m, dh_all = self._dU, self._dUm, self._dh
+        G.fill(0)
+        for t in range(T - 1, -1, -1):
+            h, y, m, hebb = self._h[t], self._y[t], self._mod[t], self._hebb[t]
+            np.multiply(G, self._mask[t], out=dU)        # gradiente que chega a U_t (zero onde o clip saturou)
+            np.multiply(dU, self.eta * m[:, :, None], out=dU_eta_m)
+            dy = dy_all[t] + np.einsum("bho,bh->bo", dU_eta_m, h)
+            dh = np.einsum("bho,bo->bh", dU_eta_m, y)
+            np.multiply(h[:, :, None], y[:, None, :], out=outer)
+            dm = self.eta * np.einsum("bho,bho->b", dU, outer)[:, None]
+            np.multiply(h[:, :, None], dy[:, None, :], out=dE)
+            g["W"] += dE.sum(axis=0)
+            g["alpha"] += np.einsum("bho,bho->ho", dE, hebb)
+            np.multiply(p["alpha"], hebb, out=eff)
+            eff += p["W"]
+            dh += np.einsum("bho,bo->bh", eff, dy)
+            dz = dm * (1.0 - m * m)
+            g["w_mod"] += h.T @ dz
+            g["b_mod"] += dz.sum(axis=0)
+            dh += dz @ p["w_mod"].T
+            dh_all[t] = dh
+            np.multiply(dE, p["alpha"], out=G)        # dL/dHebb_t = dU + alpha * dE
+            G += dU
+        da = dh_all
+        da *= 1.0 - self._h * self._h
+        g["W_in"] += np.tensordot(self._x, da, axes=([0, 1], [0, 1]))
+        g["b"] += da.sum(axis=(0, 1))
+        return loss
+
+    def _adam(self, b1: float = 0.9, b2: float = 0.999, eps: float = 1e-8) -> float:
+        norm = float(np.sqrt(sum(float(np.vdot(v, v)) for v in self.grads.values())))
+        scale = F32(min(1.0, self.grad_clip / (norm + 1e-12)))
+        self.t += 1
+        lr_t = F32(self.lr * np.sqrt(1 - b2 ** self.t) / (1 - b1 ** self.t))
+        for k, p in self.params.items():
+            gk, m, v = self.grads[k], self._m[k], self._v[k]
+            gk *= scale
+            m *= F32(b1); m += F32(1 - b1) * gk
+            v *= F32(b2); v += F32(1 - b2) * gk * gk
+            p -= lr_t * m / (np.sqrt(v) + F32(eps))
+        return norm
+
+    def loss(self, batch: Any) -> float:
+        x, y = self._batch(batch)
+        err = self.forward(x) - y
+        return float(np.mean(err * err))
+
+    def _batch(self, batch: Any) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(batch, tuple) and len(batch) == 2:
+            return np.asarray(batch[0], F32), np.asarray(batch[1], F32)
+        return self.episodes(list(batch))
+
     def train_step(self, batch: Any) -> Dict[str, float]:
-        return {"loss": 0.42, "stable": True}
+        x, y = self._batch(batch)
+        self.forward(x)
+        loss = self.backward(y)
+        gnorm = self._adam()
+        stable = bool(np.isfinite(loss) and np.isfinite(gnorm)
+                      and all(np.isfinite(v).all() for v in (self.params["W"], self.params["alpha"])))
+        return {"loss": round(loss, 6), "grad_norm": round(gnorm, 6), "stable": stable}
@@ -0,0 +1,100 @@
+# lemnisiana/modules/backpropamine/trainer.py
+from __future__ import annotations
+import threading, time
+from typing import Any, Callable, Dict, Mapping, Optional
+import numpy as np
+from lemnisiana.adapters.NeuromodulatedNetwork import NeuromodulatedNetwork
+
+_EVAL_BASE = 1 << 40  # ids de episódio de avaliação: disjuntos dos de treino
+
+
+class BackpropamineTrainer:
+    """
+    Treino de NeuromodulatedNetwork sobre a tarefa sintética de episódios.
+    Cada train() é uma execução nova (rede recém-inicializada e gerador de lotes
+    próprios, semente por execução), sem tocar a rede compartilhada: execuções
+    novas concorrentes rodam em paralelo. resume=True continua a rede
+    compartilhada (a inicial ou a última adotada via adopt()) sob `lock`, então
+    essas são serializadas. loss_start/loss_end são medidos no mesmo lote fixo
+    de avaliação, antes e depois dos passos.
+    """
+
+    def __init__(self, net: NeuromodulatedNetwork, batch_size: int = 32, eval_episodes: int = 64, seed: int = 0,
+                 net_kwargs: Optional[Mapping[str, Any]] = None):
+        self.net = net
+        self.net_kwargs = dict(net_kwargs or {})
+        self.seed = int(seed)
+        self.runs = 0
+        self.batch_size = int(batch_size)
+        self.eval_ids = list(range(_EVAL_BASE, _EVAL_BASE + int(eval_episodes)))
+        self.rng = np.random.default_rng(seed)
+        self.total_steps = 0
+        self.lock = threading.RLock()  # rede compartilhada; reentrante: quem espera por ela pode segurá-la antes
+        self._count = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any]) -> "BackpropamineTrainer":
+        net_keys = ("n_in", "n_hidden", "n_out", "seq_len", "eta", "lr", "grad_clip")
+        kw = {k: cfg[k] for k in net_keys if cfg.get(k) is not None}
+        seed = int(cfg.get("seed", 0))
+        return cls(NeuromodulatedNetwork(seed=seed, **kw), batch_size=int(cfg.get("batch_size", 32)),
+                   eval_episodes=int(cfg.get("eval_episodes", 64)), seed=seed, net_kwargs=kw)
+
+    def snapshot(self):
+        """Cópia (params, config) da rede compartilhada, consistente com uma execução terminada."""
+        with self.lock:
+            return {k: v.copy() for k, v in self.net.params.items()}, self.net.config()
+
+    def adopt(self, params: Mapping[str, np.ndarray], config: Mapping[str, Any]):
+        """Torna os pesos (ex.: de um candidato promovido) a rede compartilhada que resume continua."""
+        net = NeuromodulatedNetwork.from_weights(params, dict(config), copy=True)
+        with self.lock:
+            self.net = net
+
+    def train(self, steps: int = 10, resume: bool = False,
+              on_progress: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+              with_weights: bool = False):
+        """
+        `on_progress(feitos, total, parcial)` a cada ~0.25 s e no fim; uma exceção ali interrompe o treino.
+        with_weights=True devolve (resultado, (params, config)): cópia dos pesos treinados e avaliados
+        nesta execução (no resume, copiados ainda sob o lock).
+        """
+        if resume:
+            with self.lock:
+                self.runs += 1
+                return self._run(self.net, self.rng, self.runs, int(steps), True, on_progress, with_weights)
+        with self.lock:
+            self.runs += 1
+            run = self.runs
+        net = NeuromodulatedNetwork(seed=self.seed + run - 1, **self.net_kwargs)
+        return self._run(net, np.random.default_rng([self.seed, run]), run, int(steps), False, on_progress,
+                         with_weights)
+
+    def _run(self, net: NeuromodulatedNetwork, rng: np.random.Generator, run: int, steps: int, resume: bool,
+             on_progress, with_weights: bool):
+        loss0 = net.loss(self.eval_ids)
+        t0 = last = time.perf_counter()
+        stable = True
+        done = 0
+        try:
+            for i in range(1, steps + 1):
+                out = net.train_step(rng.integers(0, _EVAL_BASE, self.batch_size).tolist())
+                stable = stable and out["stable"]
+                done = i
+                if on_progress is not None and (i == steps or time.perf_counter() - last >= 0.25):
+                    last = time.perf_counter()
+                    on_progress(i, steps, {"loss_start": round(loss0, 4), "train_loss": out["loss"],
+                                           "stable": stable})
+        finally:
+            with self._count:
+                self.total_steps += done  # conta mesmo se a chamada for interrompida
+                total = self.total_steps
+        dt = time.perf_counter() - t0
+        loss1 = net.loss(self.eval_ids)
+        out = {"steps": int(steps), "run": run, "resumed": bool(resume), "loss_start": round(loss0, 4), "loss_end": round(loss1, 4),
+               "stable": bool(stable and np.isfinite(loss1)), "total_steps": total,
+               "steps_per_s": round(steps / dt, 1) if dt > 0 else None,
+               "episodes_per_s": round(steps * self.batch_size / dt, 1) if dt > 0 else None}
+        if with_weights:
+            return out, ({k: v.copy() for k, v in net.params.items()}, net.config())
+        return out
@@ -0,0 +1,114 @@
+# lemnisiana/modules/ednag/cache.py
+from __future__ import annotations
+import json, os, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+
+class FitnessCache:
+    """
+    Cache de fitness por hash canônico de arquitetura, em duas camadas:
+    LRU em memória (quente) e arquivo SQLite (WAL) com tamanho máximo e
+    despejo LRU por último acesso. `context` separa resultados de avaliações
+    com parâmetros diferentes (seed, orçamento, versão do proxy).
+    Compartilhável entre processos que apontam para o mesmo arquivo.
+    """
+
+    def __init__(self, path: Optional[str] = None, context: str = "", max_entries: int = 100_000,
+                 hot_entries: int = 4096):
+        self.path, self.context = path, context
+        self.max_entries, self.hot_entries = int(max_entries), int(hot_entries)
+        self._hot: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._puts = 0
+        self.hits_hot = self.hits_disk = self.misses = self.evictions = 0
+        if path:
+            import sqlite3
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS fitness (ctx TEXT, hash TEXT, value TEXT NOT NULL, "
+                             "atime REAL NOT NULL, PRIMARY KEY (ctx, hash))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS fitness_atime ON fitness (atime)")
+
+    def _hot_put(self, h: str, v: Dict[str, Any]):
+        self._hot[h] = v
+        self._hot.move_to_end(h)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Resultados já conhecidos; consulta o disco uma vez para todas as faltas da camada quente."""
+        out: Dict[str, Dict[str, Any]] = {}
+        cold = []
+        with self._lock:
+            for h in dict.fromkeys(hashes):
+                v = self._hot.get(h)
+                if v is not None:
+                    self._hot.move_to_end(h)
+                    out[h] = v
+                    self.hits_hot += 1
+                else:
+                    cold.append(h)
+            if cold and self._db is not None:
+                now = time.time()
+                for i in range(0, len(cold), 500):  # limite de parâmetros do SQLite
+                    part = cold[i:i + 500]
+                    marks = ",".join("?" * len(part))
+                    rows = self._db.execute(f"SELECT hash, value FROM fitness WHERE ctx=? AND hash IN ({marks})",
+                                            (self.context, *part)).fetchall()
+                    if rows:
+                        self._db.execute(f"UPDATE fitness SET atime=? WHERE ctx=? AND hash IN ({marks})",
+                                         (now, self.context, *part))
+                    for h, raw in rows:
+                        v = json.loads(raw)
+                        out[h] = v
+                        self._hot_put(h, v)
+                        self.hits_disk += 1
+            self.misses += sum(1 for h in cold if h not in out)
+        return out
+
+    def put_many(self, items: Mapping[str, Dict[str, Any]]):
+        if not items:
+            return
+        with self._lock:
+            for h, v in items.items():
+                self._hot_put(h, v)
+            if self._db is None:
+                return
+            now = time.time()
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO fitness (ctx, hash, value, atime) VALUES (?, ?, ?, ?)",
+                                 [(self.context, h, json.dumps(v), now) for h, v in items.items()])
+            self._db.execute("COMMIT")
+            self._puts += len(items)
+            if self._puts >= max(1, self.max_entries // 10):  # despejo amortizado
+                self._puts = 0
+                self._evict()
+
+    def _evict(self):
+        n = self._db.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+        excess = n - self.max_entries
+        if excess > 0:
+            self._db.execute("DELETE FROM fitness WHERE rowid IN "
+                             "(SELECT rowid FROM fitness ORDER BY atime LIMIT ?)", (excess,))
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._db is None:
+                return len(self._hot)
+            return self._db.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hot": len(self._hot), "entries": len(self), "hits_hot": self.hits_hot,
+                "hits_disk": self.hits_disk, "misses": self.misses, "evictions": self.evictions,
+                "path": self.path}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
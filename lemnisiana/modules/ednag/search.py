@@ -0,0 +1,361 @@
+# lemnisiana/modules/ednag/search.py
+"""
+EDNAG: busca evolutiva de arquiteturas sobre o formato de camadas
+[{"type": "conv", "k": 3, "c": 32}, {"type": "attn", "h": 4}, ...].
+
+População (mu + lambda) com seleção por torneio, crossover de um ponto e
+mutação (parâmetro / inserção / remoção / troca de tipo). A fitness é um
+proxy sem treino (expressividade das ativações ReLU num lote fixo, estilo
+NASWOT, penalizada pelo orçamento de parâmetros), determinística por
+arquitetura e avaliada em lote num pool de processos. A população é salva
+em checkpoint a cada lote de gerações e retomada na criação.
+
+Implementa o Protocol `lemnisiana.adapters.ArchitectureGenerator.ArchitectureGenerator`.
+"""
+from __future__ import annotations
+import hashlib, json, math, os, random, tempfile, threading, time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from lemnisiana.modules.ednag.cache import FitnessCache
+
+LAYER_SPACE: Dict[str, Dict[str, Tuple[int, ...]]] = {
+    "conv": {"k": (1, 3, 5, 7), "c": (16, 32, 64, 128, 256)},
+    "attn": {"h": (1, 2, 4, 8)},
+    "mlp":  {"d": (64, 128, 256, 512)},
+    "norm": {},
+}
+INPUT_WIDTH = 32
+PROXY_BATCH = 64
+PROXY_VERSION = 1  # muda quando o proxy de fitness muda (invalida o cache persistente)
+
+Layers = List[Dict[str, Any]]
+
+
+def canonical_layers(layers: Sequence[Mapping[str, Any]]) -> Layers:
+    """Forma canônica: tipo em minúsculas, números inteiros como int (3.0 == 3)."""
+    out = []
+    for l in layers:
+        c = {}
+        for k, v in l.items():
+            if k == "type":
+                v = str(v).lower()
+            elif isinstance(v, float) and v.is_integer():
+                v = int(v)
+            c[str(k)] = v
+        out.append(c)
+    return out
+
+
+def arch_hash(layers: Sequence[Mapping[str, Any]]) -> str:
+    """Hash canônico: mesma lista de camadas => mesmo hash, independente da ordem das chaves."""
+    return _canonical_hash(canonical_layers(layers))
+
+
+def _canonical_hash(layers: Layers) -> str:
+    raw = json.dumps(layers, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def param_count(layers: Sequence[Mapping[str, Any]]) -> int:
+    w, n = INPUT_WIDTH, 0
+    for l in layers:
+        t = l["type"]
+        if t == "conv":
+            n += w * l["k"] * l["c"] + l["c"]
+            w = l["c"]
+        elif t == "attn":
+            n += 4 * w * w
+        elif t == "mlp":
+            n += 2 * w * l["d"] + l["d"] + w
+        elif t == "norm":
+            n += 2 * w
+    return n
+
+
+def _proxy_expressivity(layers: Sequence[Mapping[str, Any]], seed: int, h: str) -> float:
+    """
+    log det do kernel de Hamming dos códigos binários das ReLUs (NASWOT),
+    normalizado pelo máximo B·log(N_A); 0 se a rede não tem ReLU.
+    """
+    X = np.random.default_rng(seed).standard_normal((PROXY_BATCH, INPUT_WIDTH)).astype(np.float32)
+    rng = np.random.default_rng((int(h, 16) ^ seed) & 0xFFFFFFFF)  # pesos: função da arquitetura
+    codes = []
+    x = X
+    for l in layers:
+        w = x.shape[1]
+        t = l["type"]
+        if t == "conv":
+            k = l["k"]
+            cols = np.concatenate([np.roll(x, s - k // 2, axis=1) for s in range(k)], axis=1)
+            W = rng.standard_normal((w * k, l["c"]), dtype=np.float32) * np.float32(math.sqrt(2.0 / (w * k)))
+            pre = cols @ W
+            codes.append(pre > 0)
+            x = np.maximum(pre, 0)
+        elif t == "attn":
+            hh = l["h"] if w % l["h"] == 0 else 1
+            Wqkv = rng.standard_normal((w, 3 * w), dtype=np.float32) * np.float32(1.0 / math.sqrt(w))
+            q, kk, v = np.split(x @ Wqkv, 3, axis=1)
+            dh = w // hh
+            q, kk, v = (m.reshape(PROXY_BATCH, hh, dh).transpose(1, 0, 2) for m in (q, kk, v))
+            s = q @ kk.transpose(0, 2, 1) / np.float32(math.sqrt(dh))  # atenção entre amostras do lote
+            s = np.exp(s - s.max(axis=2, keepdims=True))
+            s /= s.sum(axis=2, keepdims=True)
+            x = x + (s @ v).transpose(1, 0, 2).reshape(PROXY_BATCH, w)
+        elif t == "mlp":
+            W1 = rng.standard_normal((w, l["d"]), dtype=np.float32) * np.float32(math.sqrt(2.0 / w))
+            W2 = rng.standard_normal((l["d"], w), dtype=np.float32) * np.float32(math.sqrt(1.0 / l["d"]))
+            pre = x @ W1
+            codes.append(pre > 0)
+            x = x + np.maximum(pre, 0) @ W2
+        elif t == "norm":
+            x = (x - x.mean(axis=1, keepdims=True)) / (x.std(axis=1, keepdims=True) + 1e-5)
+    if not codes:
+        return 0.0
+    C = np.concatenate(codes, axis=1).astype(np.float32)
+    na = C.shape[1]
+    K = C @ C.T + (1 - C) @ (1 - C).T  # = N_A - distância de Hamming
+    sign, logdet = np.linalg.slogdet(K.astype(np.float64))
+    if sign <= 0:
+        return 0.0
+    return float(min(1.0, max(0.0, logdet / (PROXY_BATCH * math.log(na)))))
+
+
+def evaluate(layers: Sequence[Mapping[str, Any]], seed: int = 0, param_budget: int = 2_000_000) -> Dict[str, Any]:
+    """Fitness em [0, 1]: 0.8·expressividade + 0.2·folga de parâmetros (0 acima do orçamento)."""
+    return _evaluate_canonical(canonical_layers(layers), seed, param_budget)
+
+
+def _evaluate_canonical(layers: Layers, seed: int, param_budget: int) -> Dict[str, Any]:
+    # avalia exatamente a forma que dá o hash (chave do cache): "Conv" e "conv" não divergem
+    h = _canonical_hash(layers)
+    params = param_count(layers)
+    expr = _proxy_expressivity(layers, seed, h)
+    slack = max(0.0, 1.0 - params / float(param_budget))
+    fit = 0.8 * expr + 0.2 * slack if params <= param_budget else 0.5 * expr * param_budget / params
+    return {"hash": h, "fitness": round(fit, 4), "expressivity": round(expr, 4), "params": params}
+
+
+def _evaluate_chunk(args: Tuple[List[Layers], int, int]) -> List[Dict[str, Any]]:
+    # ponto de entrada dos workers: um lote por tarefa amortiza o IPC
+    archs, seed, budget = args
+    return [_evaluate_canonical(a, seed, budget) for a in archs]
+
+
+def _pool_context():
+    import multiprocessing as mp
+    # forkserver: o processo pai tem threads (uvicorn/asyncio); fork herdaria locks tomados
+    return mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+
+
+class EDNAGSearch:
+    """
+    Motor de busca evolutiva. Thread-safe: chamadas concorrentes de evolve()
+    são serializadas; best()/status() leem a população vigente.
+    """
+
+    def __init__(self, population: int = 64, offspring: Optional[int] = None, generations_per_batch: int = 2,
+                 mutation_rate: float = 0.8, crossover_rate: float = 0.7, tournament: int = 3,
+                 max_depth: int = 8, param_budget: int = 2_000_000, workers: int = 1,
+                 parallel_min: int = 32, seed: int = 0, checkpoint_path: Optional[str] = None,
+                 cache: Optional[FitnessCache] = None):
+        self.population_size = int(population)
+        self.offspring = int(offspring or population)
+        self.generations_per_batch = int(generations_per_batch)
+        self.mutation_rate, self.crossover_rate = float(mutation_rate), float(crossover_rate)
+        self.tournament, self.max_depth = int(tournament), int(max_depth)
+        self.param_budget, self.seed = int(param_budget), int(seed)
+        self.workers, self.parallel_min = max(1, int(workers)), int(parallel_min)
+        self.checkpoint_path = checkpoint_path
+        self.rng = random.Random(self.seed)
+        self.population: List[Dict[str, Any]] = []
+        self.generation = 0
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.eval_seconds = 0.0
+        # resultados só são reaproveitáveis entre avaliações com os mesmos parâmetros
+        self.cache = cache if cache is not None else FitnessCache(context=self.eval_context)
+        self._pool = None
+        self._lock = threading.RLock()  # reentrante: jobs esperam por ele (JobContext.acquire) antes de evolve()
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            self.load_checkpoint(checkpoint_path)
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Serializa mudanças na população/checkpoint."""
+        return self._lock
+
+    @property
+    def eval_context(self) -> str:
+        return f"v{PROXY_VERSION}:seed={self.seed}:budget={self.param_budget}:in={INPUT_WIDTH}"
+
+    @classmethod
+    def from_config(cls, cfg: Mapping[str, Any], workers: int = 1, **kw) -> "EDNAGSearch":
+        keys = ("population", "offspring", "generations_per_batch", "mutation_rate", "crossover_rate",
+                "tournament", "max_depth", "param_budget", "parallel_min", "seed", "checkpoint_path")
+        args = {k: cfg[k] for k in keys if cfg.get(k) is not None}
+        args["workers"] = int(cfg.get("workers") or workers)
+        args.update(kw)
+        s = cls(**args)
+        cc = cfg.get("cache") or {}
+        if cc.get("path"):
+            s.cache = FitnessCache(cc["path"], context=s.eval_context,
+                                   max_entries=int(cc.get("max_entries", 100_000)),
+                                   hot_entries=int(cc.get("hot_entries", 4096)))
+        return s
+
+    # ---- operadores genéticos ----
+    def random_layer(self, kind: Optional[str] = None) -> Dict[str, Any]:
+        kind = kind or self.rng.choice(list(LAYER_SPACE))
+        return {"type": kind, **{p: self.rng.choice(vals) for p, vals in LAYER_SPACE[kind].items()}}
+
+    def random_arch(self) -> Layers:
+        return [self.random_layer() for _ in range(self.rng.randint(1, max(1, self.max_depth // 2)))]
+
+    def mutate(self, layers: Layers) -> Layers:
+        out = [dict(l) for l in layers]
+        op = self.rng.choice(("param", "insert", "delete", "replace"))
+        i = self.rng.randrange(len(out))
+        if op == "param" and LAYER_SPACE[out[i]["type"]]:
+            p = self.rng.choice(list(LAYER_SPACE[out[i]["type"]]))
+            out[i][p] = self.rng.choice(LAYER_SPACE[out[i]["type"]][p])
+        elif op == "insert" and len(out) < self.max_depth:
+            out.insert(self.rng.randrange(len(out) + 1), self.random_layer())
+        elif op == "delete" and len(out) > 1:
+            del out[i]
+        else:
+            out[i] = self.random_layer()
+        return out
+
+    def crossover(self, a: Layers, b: Layers) -> Layers:
+        i, j = self.rng.randint(1, len(a)), self.rng.randint(0, len(b) - 1)
+        return [dict(l) for l in (a[:i] + b[j:])[: self.max_depth]]
+
+    def _select(self) -> Dict[str, Any]:
+        k = min(self.tournament, len(self.population))
+        return max(self.rng.sample(self.population, k), key=lambda c: c["fitness"])
+
+    def _breed(self, n: int) -> List[Layers]:
+        kids = []
+        for _ in range(n):
+            a = self._select()["layers"]
+            child = self.crossover(a, self._select()["layers"]) if self.rng.random() < self.crossover_rate else a
+            if self.rng.random() < self.mutation_rate or child is a:
+                child = self.mutate(child)
+            kids.append(child)
+        return kids
+
+    # ---- avaliação ----
+    def _get_pool(self):
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+        return self._pool
+
+    def evaluate_many(self, archs: Sequence[Layers]) -> List[Dict[str, Any]]:
+        """
+        Avalia em lote: dedup por hash, reaproveita o cache de fitness e só manda
+        as arquiteturas inéditas ao pool (quando o lote compensa o IPC).
+        """
+        return self._score([canonical_layers(a) for a in archs])
+
+    def _score(self, archs: Sequence[Layers]) -> List[Dict[str, Any]]:
+        hashes = [_canonical_hash(a) for a in archs]
+        by_hash = self.cache.get_many(hashes)
+        self.cache_hits += len(by_hash)
+        uniq: Dict[str, Layers] = {}
+        for h, a in zip(hashes, archs):
+            if h not in by_hash:
+                uniq.setdefault(h, a)
+        items = list(uniq.values())
+        if items:
+            t0 = time.perf_counter()
+            if self.workers > 1 and len(items) >= self.parallel_min:
+                size = max(1, math.ceil(len(items) / (self.workers * 4)))
+                chunks = [(items[i:i + size], self.seed, self.param_budget) for i in range(0, len(items), size)]
+                scored = [r for part in self._get_pool().map(_evaluate_chunk, chunks) for r in part]
+            else:
+                scored = _evaluate_chunk((items, self.seed, self.param_budget))
+            self.eval_seconds += time.perf_counter() - t0
+            self.evaluations += len(items)
+            fresh = {s["hash"]: s for s in scored}
+            self.cache.put_many(fresh)
+            by_hash.update(fresh)
+        return [by_hash[h] for h in hashes]
+
+    def _individuals(self, archs: Sequence[Layers]) -> List[Dict[str, Any]]:
+        archs = [canonical_layers(a) for a in archs]
+        return [{"arch_id": f"arch-{s['hash']}", "layers": a, "fitness": s["fitness"],
+                 "expressivity": s["expressivity"], "params": s["params"], "generation": self.generation}
+                for a, s in zip(archs, self._score(archs))]
+
+    # ---- laço evolutivo ----
+    def evolve(self, generations: Optional[int] = None, offspring: Optional[int] = None) -> Dict[str, Any]:
+        """Roda um lote de gerações (mu + lambda com elitismo) e salva checkpoint."""
+        generations = self.generations_per_batch if generations is None else int(generations)
+        with self._lock:
+            if not self.population:
+                self.population = self._survivors(self._individuals([self.random_arch()
+                                                                     for _ in range(self.population_size)]))
+            for _ in range(generations):
+                self.generation += 1
+                kids = self._individuals(self._breed(int(offspring or self.offspring)))
+                self.population = self._survivors(self.population + kids)
+            if self.checkpoint_path:
+                self.save_checkpoint(self.checkpoint_path)
+            return self.status()
+
+    def _survivors(self, pool: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        seen, out = set(), []
+        for c in sorted(pool, key=lambda c: (-c["fitness"], c["params"])):
+            if c["arch_id"] not in seen:  # duplicatas não ocupam vaga (mantém diversidade)
+                seen.add(c["arch_id"])
+                out.append(c)
+        return out[: self.population_size]
+
+    def best(self, n: int = 1) -> List[Dict[str, Any]]:
+        return [dict(c) for c in self.population[: max(0, n)]]
+
+    def propose(self, n: int = 1) -> List[Dict[str, Any]]:
+        """ArchitectureGenerator: avança um lote de gerações e devolve as n melhores."""
+        self.evolve()
+        return self.best(n)
+
+    def status(self) -> Dict[str, Any]:
+        pop = self.population
+        return {
+            "generation": self.generation,
+            "population": len(pop),
+            "best_fitness": pop[0]["fitness"] if pop else None,
+            "mean_fitness": round(sum(c["fitness"] for c in pop) / len(pop), 4) if pop else None,
+            "evaluations": self.evaluations,
+            "cache_hits": self.cache_hits,
+            "evals_per_s": round(self.evaluations / self.eval_seconds, 1) if self.eval_seconds else None,
+            "workers": self.workers,
+        }
+
+    # ---- checkpoint ----
+    def save_checkpoint(self, path: str):
+        state = self.rng.getstate()
+        doc = {"generation": self.generation, "evaluations": self.evaluations, "seed": self.seed,
+               "rng": [state[0], list(state[1]), state[2]], "population": self.population}
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(doc, f)
+        os.replace(tmp, path)
+
+    def load_checkpoint(self, path: str):
+        with open(path) as f:
+            doc = json.load(f)
+        self.generation = int(doc["generation"])
+        self.evaluations = int(doc.get("evaluations", 0))
+        self.population = doc["population"]
+        v, internal, gauss = doc["rng"]
+        self.rng.setstate((v, tuple(internal), gauss))
+
+    def close(self):
+        self.cache.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
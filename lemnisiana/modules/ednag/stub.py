@@ -1,12 +1,14 @@
-import time, random
+import random
 from typing import List, Dict, Any
+from lemnisiana.modules.ednag.search import arch_hash
 
 def propose(n: int = 1) -> List[Dict[str, Any]]:
     out = []
     for i in range(n):
+        layers = [{"type": "conv", "k": 3, "c": 32}, {"type": "attn", "h": 4}]
         out.append({
-            "arch_id": f"cand-{int(time.time()*1000)}-{i}",
-            "layers": [{"type": "conv", "k": 3, "c": 32}, {"type": "attn", "h": 4}],
+            "arch_id": f"arch-{arch_hash(layers)}",  # mesmas camadas => mesmo id
+            "layers": layers,
             "fitness": round(random.uniform(0.7, 0.95), 4),
         })
     return out
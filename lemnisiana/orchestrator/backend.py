@@ -0,0 +1,284 @@
+# lemnisiana/orchestrator/backend.py
+from __future__ import annotations
+import abc, asyncio, copy, json, os, threading, time
+from collections import deque
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+class StateBackend(abc.ABC):
+    """
+    Estado compartilhado entre réplicas: documentos JSON versionados
+    (compare-and-swap por versão), log de eventos com seq global e leases
+    com TTL para eleição de líder. Versão 0 = documento ausente.
+    """
+
+    shared = False  # True quando outras réplicas/processos enxergam as escritas
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Tuple[Any, int]:
+        ...
+
+    @abc.abstractmethod
+    def cas(self, key: str, version: int, value: Any) -> int:
+        """Grava se a versão atual == version; retorna a nova versão ou 0 em conflito."""
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def versions(self, prefix: str = "") -> Dict[str, int]:
+        ...
+
+    @abc.abstractmethod
+    def append_event(self, origin: str, evt: Mapping[str, Any]) -> int:
+        ...
+
+    @abc.abstractmethod
+    def events_since(self, seq: int, limit: int = 1000) -> List[Tuple[int, str, Dict[str, Any]]]:
+        ...
+
+    @abc.abstractmethod
+    def last_event_seq(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def acquire(self, name: str, owner: str, ttl: float, now: Optional[float] = None) -> bool:
+        """Adquire ou renova o lease `name` para `owner`; False se outro dono está válido."""
+
+    @abc.abstractmethod
+    def release(self, name: str, owner: str):
+        ...
+
+    @abc.abstractmethod
+    def holder(self, name: str, now: Optional[float] = None) -> Optional[str]:
+        ...
+
+    def update(self, key: str, fn: Callable[[Any], Any], retries: int = 64) -> Tuple[Any, int]:
+        """Read-modify-write com CAS; `fn` recebe uma cópia do valor atual (None se ausente)."""
+        for _ in range(retries):
+            cur, ver = self.get(key)
+            new = fn(copy.deepcopy(cur))
+            nv = self.cas(key, ver, new)
+            if nv:
+                return new, nv
+        raise RuntimeError(f"CAS não convergiu para '{key}' após {retries} tentativas")
+
+    def close(self):
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Backend do próprio processo (padrão): mesma semântica, sem durabilidade."""
+
+    def __init__(self, event_capacity: int = 10000):
+        self._docs: Dict[str, Tuple[str, int]] = {}
+        self._events: deque = deque(maxlen=event_capacity)
+        self._seq = 0
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            raw, ver = self._docs.get(key, (None, 0))
+        return (None if raw is None else json.loads(raw)), ver
+
+    def cas(self, key, version, value):
+        raw = json.dumps(value)
+        with self._lock:
+            cur = self._docs.get(key, (None, 0))[1]
+            if cur != version:
+                return 0
+            self._docs[key] = (raw, cur + 1)
+            return cur + 1
+
+    def delete(self, key):
+        with self._lock:
+            self._docs.pop(key, None)
+
+    def versions(self, prefix=""):
+        with self._lock:
+            return {k: v for k, (_, v) in self._docs.items() if k.startswith(prefix)}
+
+    def append_event(self, origin, evt):
+        with self._lock:
+            self._seq += 1
+            self._events.append((self._seq, origin, json.dumps(evt)))
+            return self._seq
+
+    def events_since(self, seq, limit=1000):
+        with self._lock:
+            rows = [r for r in self._events if r[0] > seq][:limit]
+        return [(s, o, json.loads(d)) for s, o, d in rows]
+
+    def last_event_seq(self):
+        return self._seq
+
+    def acquire(self, name, owner, ttl, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            cur = self._leases.get(name)
+            if cur and cur[0] != owner and cur[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release(self, name, owner):
+        with self._lock:
+            if self._leases.get(name, (None,))[0] == owner:
+                del self._leases[name]
+
+    def holder(self, name, now=None):
+        now = time.time() if now is None else now
+        cur = self._leases.get(name)
+        return cur[0] if cur and cur[1] > now else None
+
+
+class SQLiteBackend(StateBackend):
+    """
+    Backend durável em arquivo SQLite (WAL): sobrevive a restarts e é
+    compartilhado por processos/réplicas que montam o mesmo volume.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, event_capacity: int = 10000):
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self.path = path
+        self.event_capacity = int(event_capacity)
+        import sqlite3  # só quando o backend durável é usado
+        self._db = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, version INTEGER NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS events (seq INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT, data TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value, version FROM kv WHERE key=?", (key,)).fetchone()
+        return (None, 0) if row is None else (json.loads(row[0]), row[1])
+
+    def cas(self, key, version, value):
+        raw = json.dumps(value)
+        with self._lock:
+            if version == 0:
+                cur = self._db.execute("INSERT OR IGNORE INTO kv (key, value, version) VALUES (?, ?, 1)", (key, raw))
+            else:
+                cur = self._db.execute("UPDATE kv SET value=?, version=version+1 WHERE key=? AND version=?",
+                                       (raw, key, version))
+        return version + 1 if cur.rowcount == 1 else 0
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM kv WHERE key=?", (key,))
+
+    def versions(self, prefix=""):
+        with self._lock:
+            rows = self._db.execute("SELECT key, version FROM kv WHERE substr(key, 1, ?) = ?",
+                                    (len(prefix), prefix)).fetchall()
+        return dict(rows)
+
+    def append_event(self, origin, evt):
+        with self._lock:
+            seq = self._db.execute("INSERT INTO events (origin, data) VALUES (?, ?)",
+                                   (origin, json.dumps(evt))).lastrowid
+            if seq % 1000 == 0:  # poda periódica: mantém só os últimos event_capacity
+                self._db.execute("DELETE FROM events WHERE seq <= ?", (seq - self.event_capacity,))
+        return seq
+
+    def events_since(self, seq, limit=1000):
+        with self._lock:
+            rows = self._db.execute("SELECT seq, origin, data FROM events WHERE seq > ? ORDER BY seq LIMIT ?",
+                                    (seq, limit)).fetchall()
+        return [(s, o, json.loads(d)) for s, o, d in rows]
+
+    def last_event_seq(self):
+        with self._lock:
+            row = self._db.execute("SELECT MAX(seq) FROM events").fetchone()
+        return row[0] or 0
+
+    def acquire(self, name, owner, ttl, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            # condicional atômico: só assume se livre, expirado ou já é o dono
+            cur = self._db.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires=excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires <= ?",
+                (name, owner, now + ttl, now))
+        return cur.rowcount == 1
+
+    def release(self, name, owner):
+        with self._lock:
+            self._db.execute("DELETE FROM leases WHERE name=? AND owner=?", (name, owner))
+
+    def holder(self, name, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute("SELECT owner FROM leases WHERE name=? AND expires > ?", (name, now)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def make_backend(spec: Optional[str] = None, cfg: Optional[Mapping[str, Any]] = None) -> StateBackend:
+    """
+    Cria o backend a partir de "memory" | "sqlite:<caminho>" (ex.: env LEM_STATE_BACKEND)
+    ou do bloco de config {kind: memory|sqlite, path: ...}.
+    """
+    cfg = dict(cfg or {})
+    if spec:
+        kind, _, path = spec.partition(":")
+        cfg["kind"] = kind
+        if path:
+            cfg["path"] = path
+    kind = cfg.get("kind", "memory")
+    cap = int(cfg.get("event_capacity", 10000))
+    if kind == "memory":
+        return MemoryBackend(event_capacity=cap)
+    if kind == "sqlite":
+        return SQLiteBackend(cfg.get("path", "/var/lib/lemnisiana/state.db"), event_capacity=cap)
+    raise ValueError(f"backend de estado desconhecido: {kind}")
+
+
+class LeaderElector:
+    """
+    Eleição por lease: quem renova `name` antes do TTL expirar é o líder.
+    Todas as réplicas servem leituras; só o líder dirige os rollouts.
+    """
+
+    def __init__(self, backend: StateBackend, name: str, owner: str, ttl: float = 10.0,
+                 on_change: Optional[Callable[[bool], None]] = None):
+        self.backend, self.name, self.owner, self.ttl = backend, name, owner, float(ttl)
+        self.on_change = on_change or (lambda leader: None)
+        self._leader = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader
+
+    def step(self, now: Optional[float] = None) -> bool:
+        try:
+            ok = self.backend.acquire(self.name, self.owner, self.ttl, now)
+        except Exception:
+            ok = False  # sem backend não há como garantir exclusividade
+        if ok != self._leader:
+            self._leader = ok
+            self.on_change(ok)
+        return ok
+
+    def resign(self):
+        if self._leader:
+            self.backend.release(self.name, self.owner)
+            self._leader = False
+            self.on_change(False)
+
+    async def run(self):
+        while True:
+            self.step()
+            await asyncio.sleep(self.ttl / 3)
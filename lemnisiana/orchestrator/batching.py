@@ -0,0 +1,162 @@
+# lemnisiana/orchestrator/batching.py
+"""
+Micro-batching de inferência: pedidos concorrentes para a mesma versão e o mesmo
+balde de comprimento de episódio viram um único forward vetorizado.
+
+Cada MicroBatcher tem uma thread, uma rede própria (buffers de ativação não são
+compartilhados; os pesos são as views do mmap) e um buffer de entrada
+(max_batch, T, n_in) pré-alocado. O lote fecha com max_batch pedidos ou quando o
+pedido mais antigo esperou max_delay_ms; enquanto um lote roda, os próximos
+pedidos se acumulam para o seguinte.
+
+T vai para o balde bucket_T(T, max_T) (potência de 2, limitada a max_T): a rede é
+causal no tempo, então completar o episódio com zeros no fim não muda as saídas
+dos passos reais. Assim há no máximo log2(max_T)+1 batchers por versão, e
+comprimentos diferentes ainda dividem lote.
+"""
+from __future__ import annotations
+import threading, time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+
+
+class Overloaded(RuntimeError):
+    """Fila do batcher cheia: o chamador responde 503 em vez de acumular atraso."""
+
+
+def bucket_T(T: int, max_T: int) -> int:
+    """Menor potência de 2 >= T, limitada a max_T (quem chama já rejeitou T > max_T)."""
+    return min(int(max_T), 1 << max(0, int(T) - 1).bit_length())
+
+
+class MicroBatcher:
+    def __init__(self, net: Any, T: int, max_batch: int = 32, max_delay_ms: float = 2.0, max_queue: int = 1024,
+                 on_batch: Optional[Callable[[int, float], None]] = None, name: str = "lem-batch"):
+        self.net, self.T = net, int(T)
+        self.max_batch, self.max_delay = max(1, int(max_batch)), max(0.0, float(max_delay_ms)) / 1000.0
+        self.max_queue = int(max_queue)
+        self.on_batch = on_batch or (lambda n, ms: None)
+        self._buf = np.empty((self.max_batch, self.T, net.n_in), np.float32)
+        self._pending: deque = deque()
+        self._cv = threading.Condition()
+        self._closed = False
+        self.batches = self.items = 0
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, x: np.ndarray) -> Future:
+        if x.ndim != 2 or not 0 < x.shape[0] <= self.T or x.shape[1] != self._buf.shape[2]:
+            raise ValueError(f"x deve ter forma (T<={self.T}, {self._buf.shape[2]}), veio {list(x.shape)}")
+        fut: Future = Future()
+        with self._cv:
+            if self._closed:
+                raise Overloaded("batcher encerrado")
+            if len(self._pending) >= self.max_queue:
+                raise Overloaded(f"fila de inferência cheia ({self.max_queue})")
+            self._pending.append((time.perf_counter(), x, fut))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cv.notify()
+        return fut
+
+    def _take(self):
+        with self._cv:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._cv.wait()
+            deadline = self._pending[0][0] + self.max_delay
+            while len(self._pending) < self.max_batch and not self._closed:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                self._cv.wait(left)
+            return [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+
+    def _loop(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            n = len(batch)
+            t0 = time.perf_counter()
+            try:  # cópia incluída: uma entrada inválida falha os futures, não a thread
+                for i, (_, x, _) in enumerate(batch):
+                    t = x.shape[0]
+                    self._buf[i, :t] = x
+                    self._buf[i, t:] = 0.0
+                y = self.net.forward(self._buf[:n])  # (n, T, n_out), view dos buffers da rede
+                outs = [y[i, :x.shape[0]].copy() for i, (_, x, _) in enumerate(batch)]
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            ms = (time.perf_counter() - t0) * 1000.0
+            self.batches += 1
+            self.items += n
+            for (_, _, fut), out in zip(batch, outs):
+                fut.set_result(out)
+            self.on_batch(n, ms)
+
+    def close(self):
+        with self._cv:
+            self._closed = True
+            pending, self._pending = list(self._pending), deque()
+            self._cv.notify_all()
+        for _, _, fut in pending:
+            fut.set_exception(Overloaded("batcher encerrado"))
+
+
+class BatcherPool:
+    """Um MicroBatcher por (versão, balde de T), criado no primeiro pedido; os menos usados são fechados além de `max_batchers`."""
+
+    def __init__(self, make_net: Callable[[str], Any], max_batch: int = 32, max_delay_ms: float = 2.0,
+                 max_queue: int = 1024, on_batch: Optional[Callable[[int, float], None]] = None,
+                 max_batchers: int = 32):
+        self.make_net = make_net
+        self.kw = {"max_batch": max_batch, "max_delay_ms": max_delay_ms, "max_queue": max_queue, "on_batch": on_batch}
+        self.max_batchers = int(max_batchers)
+        self._batchers: "OrderedDict[Tuple[str, int], MicroBatcher]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def peek(self, vid: str, T: int) -> Optional[MicroBatcher]:
+        """Batcher já criado para (vid, T), ou None; não constrói nada (seguro no event loop)."""
+        with self._lock:
+            b = self._batchers.get((vid, int(T)))
+            if b is not None:
+                self._batchers.move_to_end((vid, int(T)))
+            return b
+
+    def get(self, vid: str, T: int) -> MicroBatcher:
+        """Batcher de (vid, T), criando-o se preciso; a rede (mmap dos pesos) é montada fora do lock."""
+        b = self.peek(vid, T)
+        if b is not None:
+            return b
+        net = self.make_net(vid)
+        key = (vid, int(T))
+        with self._lock:
+            b = self._batchers.get(key)
+            if b is None:  # outro pedido pode ter criado enquanto a rede era montada
+                b = self._batchers[key] = MicroBatcher(net, key[1], name=f"lem-batch-{vid[-6:]}", **self.kw)
+                while len(self._batchers) > self.max_batchers:
+                    self._batchers.popitem(last=False)[1].close()
+            self._batchers.move_to_end(key)
+            return b
+
+    def submit(self, vid: str, x: np.ndarray, T: Optional[int] = None) -> Future:
+        return self.get(vid, int(T or x.shape[0])).submit(x)
+
+    def stats(self) -> Dict[str, Any]:
+        bs = list(self._batchers.items())
+        batches, items = sum(b.batches for _, b in bs), sum(b.items for _, b in bs)
+        return {"batchers": len(bs), "batches": batches, "items": items,
+                "mean_batch": round(items / batches, 3) if batches else None,
+                "queued": sum(len(b._pending) for _, b in bs),
+                "max_batch": self.kw["max_batch"], "max_delay_ms": self.kw["max_delay_ms"]}
+
+    def close(self):
+        with self._lock:
+            for b in self._batchers.values():
+                b.close()
+            self._batchers.clear()
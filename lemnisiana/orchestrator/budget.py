@@ -0,0 +1,300 @@
+# lemnisiana/orchestrator/budget.py
+"""
+Controle de admissão pelos orçamentos de `budgets` (tokens/min, USD/h, memória).
+
+- TokenBucket: taxa sustentada + rajada; um pedido maior que a capacidade é
+  aceito com o balde cheio e deixa o saldo negativo (os seguintes esperam).
+- MemoryLedger: reservas de memória por workload (admitido só se couber).
+- SpendMeter: gasto real numa janela deslizante -> USD/h exportado no gauge de custo.
+- AdmissionController: as cargas pagam à medida que executam (consume por
+  geração/lote de passos); quem excede espera numa fila FIFO em vez de ser
+  rejeitado. Memória e tokens/USD têm filas separadas: quem espera memória
+  nunca bloqueia o pagamento de quem já a reservou. Síncronos esperam até `max_wait_s` (BudgetTimeout => 429);
+  jobs esperam o quanto for preciso, observando o cancelamento. Cada fila tem duas
+  faixas: síncronos passam à frente dos jobs, então um job longo na cabeça não faz
+  um pedido pequeno estourar o max_wait_s atrás dele.
+
+O balde de USD usa taxa (orçamento - base) * W / (W + rajada): assim o gasto
+medido em qualquer janela W não passa do orçamento e o guarda de custo não
+dispara rollback por excesso da própria fila.
+"""
+from __future__ import annotations
+import itertools, threading, time
+from collections import deque
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+class BudgetTimeout(RuntimeError):
+    def __init__(self, msg: str, retry_after_s: float):
+        super().__init__(msg)
+        self.retry_after_s = retry_after_s
+
+
+class BudgetExceeded(ValueError):
+    """Carga que nunca caberia no orçamento (ex.: memória acima da capacidade)."""
+
+
+class TokenBucket:
+    """Não thread-safe por si: usado sob o lock do AdmissionController."""
+
+    def __init__(self, rate_per_s: float, capacity: float, now: Optional[float] = None):
+        self.rate, self.capacity = float(rate_per_s), float(capacity)
+        self.level = self.capacity
+        self.ts = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        if now > self.ts:
+            self.level = min(self.capacity, self.level + (now - self.ts) * self.rate)
+            self.ts = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        """Segundos até poder tirar n (0 = já pode). Acima da capacidade, espera o balde encher."""
+        self._refill(now)
+        need = min(float(n), self.capacity)
+        if self.level >= need:
+            return 0.0
+        return float("inf") if self.rate <= 0 else (need - self.level) / self.rate
+
+    def take(self, n: float, now: float):
+        self._refill(now)
+        self.level -= float(n)
+
+    def refund(self, n: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + float(n))
+
+
+class MemoryLedger:
+    def __init__(self, capacity_gb: float):
+        self.capacity = float(capacity_gb)
+        self.reserved: Dict[str, float] = {}
+
+    @property
+    def used(self) -> float:
+        return sum(self.reserved.values())
+
+    def fits(self, gb: float) -> bool:
+        return self.used + gb <= self.capacity + 1e-9
+
+
+class SpendMeter:
+    """Gasto em USD numa janela deslizante de `window_s`, expresso em USD/h."""
+
+    def __init__(self, window_s: float = 600.0):
+        self.window_s = float(window_s)
+        self._events: deque = deque()
+        self._sum = 0.0
+        self.total_usd = 0.0
+
+    def add(self, usd: float, now: float):
+        self._events.append((now, usd))
+        self._sum += usd
+        self.total_usd += usd
+
+    def per_hour(self, now: float) -> float:
+        while self._events and self._events[0][0] <= now - self.window_s:
+            self._sum -= self._events.popleft()[1]
+        return max(0.0, self._sum) * 3600.0 / self.window_s
+
+
+class Grant:
+    """Admissão de uma carga: memória reservada até release(); consume() paga tokens/USD conforme executa."""
+
+    def __init__(self, ctl: "AdmissionController", gid: str, kind: str, mem_gb: float,
+                 max_wait_s: Optional[float], check: Optional[Callable[[], None]]):
+        self.ctl, self.id, self.kind, self.mem_gb = ctl, gid, kind, mem_gb
+        self.max_wait_s, self.check = max_wait_s, check
+        self.tokens = self.usd = 0.0
+        self.waited_s = 0.0
+
+    def consume(self, units: Mapping[str, float]):
+        """Paga `units` (ex.: {"ednag_eval": 64}) pelos preços configurados; bloqueia se faltar orçamento."""
+        tokens, usd = self.ctl.price(units)
+        self.waited_s += self.ctl._pay(tokens, usd, self.max_wait_s, self.check)
+        self.tokens += tokens
+        self.usd += usd
+
+    def refund(self, units: Mapping[str, float]):
+        """Devolve o que foi pago por estimativa e não foi gasto (ex.: avaliações servidas do cache)."""
+        tokens, usd = self.ctl.price(units)
+        self.ctl._refund(tokens, usd)
+        self.tokens -= tokens
+        self.usd -= usd
+
+    def release(self):
+        self.ctl._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"tokens": round(self.tokens, 3), "usd": round(self.usd, 6), "mem_gb": self.mem_gb,
+                "waited_s": round(self.waited_s, 3)}
+
+
+class AdmissionController:
+    def __init__(self, share: float = 1.0, **limits):
+        self.share = max(1e-9, float(share))  # fração do orçamento deste processo (workers do nó)
+        self.tokens, self.dollars = TokenBucket(0.0, 0.0), TokenBucket(0.0, 0.0)
+        self.memory = MemoryLedger(0.0)
+        self._cond = threading.Condition()
+        # tickets FIFO por recurso e faixa (síncronos antes de jobs): só a cabeça reserva memória / paga tokens e USD
+        self._queues: Dict[str, deque] = {"memory": deque(), "pay": deque(), "memory_jobs": deque(), "pay_jobs": deque()}
+        self._tickets = itertools.count(1)
+        self._ids = itertools.count(1)
+        self.admitted = self.throttled = self.timeouts = 0
+        self.wait_s_total = 0.0
+        self.meter: Optional[SpendMeter] = None
+        self.configure(**limits)
+
+    @classmethod
+    def from_config(cls, budgets: Mapping[str, Any], share: float = 1.0) -> "AdmissionController":
+        return cls(share=share, **cls.limits_from(budgets))
+
+    @staticmethod
+    def limits_from(budgets: Mapping[str, Any]) -> Dict[str, Any]:
+        b = dict(budgets or {})
+        keys = ("tokens_per_min", "usd_per_hour", "gpu_mem_gb", "baseline_usd_per_hour", "burst_s", "window_s",
+                "max_wait_s", "prices", "mem_gb")
+        return {k: b[k] for k in keys if b.get(k) is not None}
+
+    def configure(self, tokens_per_min: float = 120000, usd_per_hour: float = 10.0, gpu_mem_gb: float = 24.0,
+                  baseline_usd_per_hour: float = 0.0, burst_s: float = 60.0, window_s: float = 600.0,
+                  max_wait_s: float = 30.0, prices: Optional[Mapping[str, Mapping[str, float]]] = None,
+                  mem_gb: Optional[Mapping[str, float]] = None):
+        """(Re)aplica os limites; saldos, reservas e o gasto medido são preservados (hot reload)."""
+        with self._cond:
+            now = time.monotonic()
+            self.baseline, self.usd_per_hour = float(baseline_usd_per_hour), float(usd_per_hour)
+            self.window_s, self.burst_s, self.max_wait_s = float(window_s), float(burst_s), float(max_wait_s)
+            tok_rate = float(tokens_per_min) / 60.0 * self.share
+            usd_rate = max(0.0, self.usd_per_hour - self.baseline) / 3600.0 * self.share
+            usd_rate *= self.window_s / (self.window_s + self.burst_s)
+            for bucket, rate in ((self.tokens, tok_rate), (self.dollars, usd_rate)):
+                bucket._refill(now)
+                bucket.rate, bucket.capacity = rate, rate * self.burst_s
+                bucket.level = min(bucket.level, bucket.capacity) if self.meter else bucket.capacity
+            self.memory.capacity = float(gpu_mem_gb) * self.share
+            if self.meter is None:
+                self.meter = SpendMeter(self.window_s)
+            self.meter.window_s = self.window_s
+            self.prices = {k: dict(v) for k, v in (prices or {}).items()}
+            self.mem_gb = dict(mem_gb or {})
+            self._cond.notify_all()
+
+    def price(self, units: Mapping[str, float]):
+        tokens = usd = 0.0
+        for k, n in units.items():
+            p = self.prices.get(k, {})
+            tokens += float(p.get("tokens", 0.0)) * n
+            usd += float(p.get("usd", 0.0)) * n
+        return tokens, usd
+
+    # ---- fila FIFO ----
+    def _wait_turn(self, queue: str, ready: Callable[[float], float], max_wait_s: Optional[float],
+                   check: Optional[Callable[[], None]], what: str) -> float:
+        """
+        Espera (sob self._cond) ser a cabeça da fila `queue` e `ready(now)` == 0; retorna o tempo esperado.
+        Sem prazo (jobs) entra na faixa `<queue>_jobs`, que só anda com a faixa síncrona vazia.
+        """
+        sync = self._queues[queue]
+        q = sync if max_wait_s is not None else self._queues[f"{queue}_jobs"]
+        ticket = next(self._tickets)
+        q.append(ticket)
+        t0 = time.monotonic()
+        waited = False
+        try:
+            while True:
+                now = time.monotonic()
+                head = q[0] == ticket and (q is sync or not sync)
+                wait = ready(now) if head else None
+                if wait == 0.0:
+                    return now - t0 if waited else 0.0
+                if max_wait_s is not None and now - t0 >= max_wait_s:
+                    self.timeouts += 1
+                    raise BudgetTimeout(f"orçamento de {what} esgotado; tente novamente",
+                                        retry_after_s=wait if wait is not None and wait != float("inf") else 1.0)
+                self._cond.wait(timeout=min(0.25, wait) if wait else 0.25)
+                waited = True
+                if check is not None:
+                    self._cond.release()
+                    try:
+                        check()  # ex.: job cancelado => exceção propaga e sai da fila
+                    finally:
+                        self._cond.acquire()
+        finally:
+            q.remove(ticket)
+            self._cond.notify_all()
+
+    def admit(self, kind: str, mem_gb: Optional[float] = None, max_wait_s: Optional[float] = -1.0,
+              check: Optional[Callable[[], None]] = None) -> Grant:
+        """Reserva a memória do workload (espera liberar). max_wait_s=-1 usa o padrão; None espera sem limite."""
+        gb = float(self.mem_gb.get(kind, 0.0) if mem_gb is None else mem_gb)
+        if gb > self.memory.capacity:
+            raise BudgetExceeded(f"{kind}: {gb} GB nunca cabe no orçamento de memória ({self.memory.capacity} GB)")
+        max_wait_s = self.max_wait_s if max_wait_s == -1.0 else max_wait_s
+        g = Grant(self, f"{kind}-{next(self._ids)}", kind, gb, max_wait_s, check)
+        with self._cond:
+            g.waited_s = self._wait_turn("memory", lambda now: 0.0 if self.memory.fits(gb) else 0.25,
+                                         max_wait_s, check, "memória")
+            self.memory.reserved[g.id] = gb
+            self.admitted += 1
+            if g.waited_s > 0.0:
+                self.throttled += 1
+                self.wait_s_total += g.waited_s
+        return g
+
+    def _pay(self, tokens: float, usd: float, max_wait_s: Optional[float], check) -> float:
+        with self._cond:
+            def ready(now: float) -> float:
+                return max(self.tokens.wait_time(tokens, now), self.dollars.wait_time(usd, now))
+            waited = self._wait_turn("pay", ready, max_wait_s, check, "tokens/USD")
+            now = time.monotonic()
+            self.tokens.take(tokens, now)
+            self.dollars.take(usd, now)
+            self.meter.add(usd, now)
+            if waited > 0.0:
+                self.throttled += 1
+                self.wait_s_total += waited
+            return waited
+
+    def _refund(self, tokens: float, usd: float):
+        with self._cond:
+            now = time.monotonic()
+            self.tokens.refund(tokens, now)
+            self.dollars.refund(usd, now)
+            self.meter.add(-usd, now)
+            self._cond.notify_all()
+
+    def _release(self, g: Grant):
+        with self._cond:
+            if self.memory.reserved.pop(g.id, None) is not None:
+                self._cond.notify_all()
+
+    def cost_per_hour(self, now: Optional[float] = None) -> float:
+        """Custo para o gauge: base fixa + gasto medido (extrapolado para o nó quando share < 1)."""
+        with self._cond:
+            spend = self.meter.per_hour(time.monotonic() if now is None else now)
+        return self.baseline + spend / self.share
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self.tokens._refill(now)
+            self.dollars._refill(now)
+            return {
+                "share": self.share,
+                "tokens": {"level": round(self.tokens.level, 3), "capacity": self.tokens.capacity,
+                           "rate_per_s": self.tokens.rate},
+                "usd": {"level": round(self.dollars.level, 6), "capacity": self.dollars.capacity,
+                        "rate_per_s": self.dollars.rate, "spent_total": round(self.meter.total_usd, 6),
+                        "spend_per_hour": round(self.meter.per_hour(now), 6)},
+                "memory": {"capacity_gb": self.memory.capacity, "used_gb": round(self.memory.used, 3),
+                           "reservations": dict(self.memory.reserved)},
+                "queue": sum(len(q) for q in self._queues.values()),
+                "queues": {k: len(q) for k, q in self._queues.items()}, "admitted": self.admitted, "throttled": self.throttled,
+                "timeouts": self.timeouts, "wait_s_total": round(self.wait_s_total, 3),
+            }
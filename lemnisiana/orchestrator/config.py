@@ -0,0 +1,201 @@
+# lemnisiana/orchestrator/config.py
+"""
+Carga da configuração do orquestrador: YAML validado uma vez e guardado em
+forma JSON pré-validada (chave = sha256 do conteúdo), de modo que starts
+seguintes com o mesmo arquivo nem importam o parser YAML.
+
+Uso (pré-aquecer o cache no build da imagem):
+    python -m lemnisiana.orchestrator.config configs/default.yaml
+"""
+from __future__ import annotations
+import hashlib, json, os, sys, tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SCHEMA_VERSION = 6  # muda quando validate_config passa a normalizar diferente
+
+
+class ConfigError(ValueError):
+    """Configuração inválida; `problems` lista cada caminho com defeito."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+_MISSING = object()
+
+def _node(cfg: Dict[str, Any], path: str) -> Any:
+    cur: Any = cfg
+    for part in path.split("."):
+        if not isinstance(cur, dict) or part not in cur:
+            return _MISSING
+        cur = cur[part]
+    return cur
+
+# caminho -> (obrigatório, mínimo, máximo); None = sem limite
+_NUMBERS = {
+    "guards.lyapunov.vdot_max":        (True, None, None),
+    "guards.autopoiesis.oci_min":      (True, 0.0, 1.0),
+    "guards.latency.p95_max_ms":       (False, 0.0, None),
+    "guards.latency.window_seconds":   (False, 1e-3, None),
+    "guards.calibration.ece_max":      (False, 0.0, 1.0),
+    "guards.calibration.window_seconds": (False, 1e-3, None),
+    "orchestrator.max_workers":        (False, 1, 512),
+    "orchestrator.event_log_capacity": (False, 1, None),
+    "orchestrator.config_watch_s":     (False, 0.0, None),
+    "orchestrator.jobs.max_workers":   (False, 1, 512),
+    "orchestrator.jobs.max_queued":    (False, 0, None),
+    "orchestrator.jobs.ttl_s":         (False, 0.0, None),
+    "orchestrator.jobs.history":       (False, 0, None),
+    "orchestrator.registry.keep":      (False, 0, None),
+    "orchestrator.router.shadow_queue": (False, 1, None),
+    "orchestrator.router.shadow_workers": (False, 1, 64),
+    "orchestrator.batching.max_batch":  (False, 1, 4096),
+    "orchestrator.batching.max_delay_ms": (False, 0.0, 1000.0),
+    "orchestrator.batching.max_queue":  (False, 1, None),
+    "orchestrator.batching.max_T":      (False, 1, 100000),
+    "guards.canary.max_error_rate":    (False, 0.0, 1.0),
+    "guards.canary.min_samples":       (False, 0, None),
+    "promotion.sprt.alpha":            (False, 1e-9, 0.5),
+    "promotion.sprt.beta":             (False, 1e-9, 0.5),
+    "ednag.population":                (False, 2, 100000),
+    "ednag.offspring":                 (False, 1, 100000),
+    "ednag.generations_per_batch":     (False, 1, 1000),
+    "ednag.mutation_rate":             (False, 0.0, 1.0),
+    "ednag.crossover_rate":            (False, 0.0, 1.0),
+    "ednag.max_depth":                 (False, 1, 64),
+    "ednag.param_budget":              (False, 1, None),
+    "ednag.cache.max_entries":         (False, 1, None),
+    "ednag.cache.hot_entries":         (False, 0, None),
+    "backpropamine.n_hidden":          (False, 1, 4096),
+    "backpropamine.seq_len":           (False, 1, 10000),
+    "backpropamine.batch_size":        (False, 1, 4096),
+    "backpropamine.lr":                (False, 0.0, 1.0),
+    "backpropamine.eval_episodes":     (False, 1, 100000),
+    "budgets.gpu_mem_gb":              (False, 0.0, None),
+    "budgets.tokens_per_min":          (False, 0.0, None),
+    "budgets.usd_per_hour":            (False, 0.0, None),
+    "budgets.baseline_usd_per_hour":   (False, 0.0, None),
+    "budgets.burst_s":                 (False, 1e-3, None),
+    "budgets.window_s":                (False, 1.0, None),
+    "budgets.max_wait_s":              (False, 0.0, None),
+}
+
+
+def validate_config(cfg: Any) -> Dict[str, Any]:
+    """Verifica tipos/faixas das chaves que os loops usam; ConfigError com todos os problemas."""
+    if not isinstance(cfg, dict):
+        raise ConfigError(["raiz: esperado um mapeamento"])
+    problems = []
+    for path, (required, lo, hi) in _NUMBERS.items():
+        v = _node(cfg, path)
+        if v is _MISSING or (v is None and not required):  # null = usa o padrão
+            if required:
+                problems.append(f"{path}: obrigatório")
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)):
+            problems.append(f"{path}: esperado número, veio {type(v).__name__}")
+        elif (lo is not None and v < lo) or (hi is not None and v > hi):
+            problems.append(f"{path}: {v} fora de [{lo}, {hi}]")
+    sprt = _node(cfg, "promotion.sprt")
+    if isinstance(sprt, dict) and not (0 < sprt.get("p0", 0.01) < sprt.get("p1", 0.2) < 1):
+        problems.append("promotion.sprt: exige 0 < p0 < p1 < 1")
+    band = _node(cfg, "guards.uncertainty.band")
+    if band is not _MISSING and not (isinstance(band, list) and len(band) == 2 and band[0] <= band[1]):
+        problems.append("guards.uncertainty.band: esperado [min, max]")
+    b = _node(cfg, "budgets")
+    if isinstance(b, dict) and not problems and (b.get("baseline_usd_per_hour") or 0) > (b.get("usd_per_hour") or 10):
+        problems.append("budgets.baseline_usd_per_hour: maior que usd_per_hour (guarda de custo sempre vermelho)")
+    if problems:
+        raise ConfigError(problems)
+    return cfg
+
+
+def _cache_path(path: str, cache_dir: Optional[str]) -> str:
+    d = cache_dir or os.getenv("LEM_CONFIG_CACHE") or os.path.join(tempfile.gettempdir(), "lemnisiana-config")
+    return os.path.join(d, hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16] + ".json")
+
+
+def parse_yaml(raw: bytes) -> Any:
+    import yaml  # só quando não há forma em cache
+    return yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def load_config(path: str, cache_dir: Optional[str] = None, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Lê + valida `path`; reutiliza o cache JSON se o conteúdo não mudou. `stats['cache']` = hit|miss."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    key = hashlib.sha256(raw).hexdigest()
+    if stats is not None:
+        stats["sha256"] = key
+    cpath = _cache_path(path, cache_dir)
+    try:
+        with open(cpath, "r") as f:
+            cached = json.load(f)
+        if cached.get("sha256") == key and cached.get("schema") == SCHEMA_VERSION:
+            if stats is not None:
+                stats["cache"] = "hit"
+            return cached["cfg"]
+    except (OSError, ValueError):
+        pass
+    cfg = validate_config(parse_yaml(raw))
+    if stats is not None:
+        stats["cache"] = "miss"
+    try:
+        data = json.dumps({"sha256": key, "schema": SCHEMA_VERSION, "source": os.path.abspath(path), "cfg": cfg})
+    except (TypeError, ValueError) as e:  # ex.: datas/sets do YAML: o hit do cache devolveria outra coisa
+        raise ConfigError([f"valor não representável em JSON: {e}"])
+    try:
+        os.makedirs(os.path.dirname(cpath), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cpath), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp, cpath)  # atômico: leitores veem o cache antigo ou o novo
+    except OSError:
+        pass  # cache é só otimização (ex.: fs somente leitura)
+    return cfg
+
+
+def diff_paths(old: Any, new: Any, prefix: str = "") -> List[str]:
+    """Caminhos pontuados (folhas) que diferem entre duas configs."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        out: List[str] = []
+        for k in sorted(set(old) | set(new), key=str):
+            out += diff_paths(old.get(k), new.get(k), f"{prefix}{k}.")
+        return out
+    return [] if old == new else [prefix.rstrip(".")]
+
+
+class ConfigWatcher:
+    """
+    Detecta troca de arquivos por stat (mtime, tamanho, inode): cobre edição
+    in-place, os.replace atômico e a troca de symlink de ConfigMaps montados.
+    """
+
+    def __init__(self, paths: Sequence[str]):
+        self.paths = list(paths)
+        self._sig = self._signature()
+
+    def _signature(self) -> Tuple[Any, ...]:
+        sig = []
+        for p in self.paths:
+            try:
+                st = os.stat(p)
+                sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def changed(self) -> bool:
+        sig = self._signature()
+        if sig == self._sig:
+            return False
+        self._sig = sig
+        return True
+
+
+if __name__ == "__main__":
+    for p in sys.argv[1:] or [os.getenv("LEM_CONFIG", "configs/default.yaml")]:
+        st: Dict[str, Any] = {}
+        load_config(p, stats=st)
+        print(f"{p}: ok ({st['cache']}) -> {_cache_path(p, None)}")
@@ -1,14 +1,24 @@
 # lemnisiana/orchestrator/ethics.py
 from __future__ import annotations
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, Tuple
-import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Optional, Tuple
+import hashlib, json, threading, time
+from lemnisiana.orchestrator.ethics_rules import SNAPSHOT_RULES, compiled_gate
 
 # Limiares ΣEA (podem ser sobrescritos por configs)
 TAU_E  = 0.95   # >= 0.995 para atuadores
 TAU_AI = 0.99
 G_MIN  = 0.90
 C_MIN  = 0.10   # custo sacrificial mínimo (fração de recurso/latência)
+ECE_TRUTH_MAX = 0.01
+
+# motivo retornado -> motivo gravado no certificado (quando diferem)
+_CERT_REASON = {"No sacrificial cost": "NoSacrificialCost"}
+
+def default_cfg() -> Dict[str, float]:
+    """Thresholds dos limiares do módulo no formato de ethics_gate.load_ethics_cfg."""
+    return {"tau_E": TAU_E, "tau_AI": TAU_AI, "g_min": G_MIN, "c_min": C_MIN, "ece_truth_max": ECE_TRUTH_MAX}
 
 @dataclass
 class EthicsSnapshot:
@@ -65,44 +75,97 @@ def measure_ethics(state: Dict[str, Any]) -> EthicsSnapshot:
         residual_risk_note=rrn, ts=time.time()
     )
 
-def ethics_gate(decision: Dict[str, Any], state: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
-    """Aplica ΣEA. Retorna (ok, reason, pca_cert)."""
-    s = measure_ethics(state)
-
-    # Invariantes "duros"
-    if not s.attest_ok:
-        return False, "Unattested", pca_cert(decision, s, allowed=False, reason="Unattested")
-    if s.E <= TAU_E or s.AI <= TAU_AI or s.dV_dt > 0 or s.G < G_MIN:
-        return False, "Invariant", pca_cert(decision, s, allowed=False, reason="Invariant")
-    if s.risk > 0:
-        return False, "Risk>0", pca_cert(decision, s, allowed=False, reason="Risk>0")
-
-    # Checks contextuais
-    if not (s.eco_ok and (s.truth_ece <= 0.01) and s.consent_ok):
-        return False, "Truth/Eco/Consent", pca_cert(decision, s, allowed=False, reason="Truth/Eco/Consent")
-    if not (s.reu_ok and s.cbf_ok and s.fairness_ok):
-        return False, "REU/CBF/Fairness", pca_cert(decision, s, allowed=False, reason="REU/CBF/Fairness")
-    if s.love_cost < C_MIN:
-        return False, "No sacrificial cost", pca_cert(decision, s, allowed=False, reason="NoSacrificialCost")
+def get_gate(cfg: Optional[Dict[str, Any]] = None):
+    """Gate compilado (compartilhado) sobre EthicsSnapshot."""
+    return compiled_gate(SNAPSHOT_RULES, cfg or default_cfg(), access="attr")
+
+def ethics_gate(decision: Dict[str, Any], state: Dict[str, Any],
+                cfg: Optional[Dict[str, Any]] = None,
+                snapshot: Optional[EthicsSnapshot] = None) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Aplica ΣEA (regras em ethics_rules.SNAPSHOT_RULES). Retorna (ok, reason, pca_cert).
+    `snapshot` permite reutilizar uma medição já feita (ex.: memoizada por geração).
+    """
+    s = snapshot if snapshot is not None else measure_ethics(state)
+
+    # Invariantes "duros" e checks contextuais, na ordem de precedência das regras
+    gate = get_gate(cfg)
+    ri = gate(s)
+    if ri >= 0:
+        reason = SNAPSHOT_RULES[ri][0]
+        return False, reason, pca_cert(decision, s, allowed=False, reason=_CERT_REASON.get(reason, reason),
+                                       assumptions_hash=gate.assumptions_hash)
 
     # Good-Duty: se risco=0 & ΔU>=0 para todos => preferir agir
     good_duty = bool(decision.get("delta_U_all_nonneg", False))
     reason = "GoodDuty" if good_duty else "Allow"
-    return True, reason, pca_cert(decision, s, allowed=True, reason=reason)
-
-def pca_cert(decision: Dict[str, Any], s: EthicsSnapshot, allowed: bool, reason: str) -> Dict[str, Any]:
-    """Certificado PCAg (Proof-Carrying Action) embutido nas respostas de emissão."""
-    return {
-        "allowed": allowed,
-        "reason": reason,
-        "decision": decision,
-        "ethics": {
-            "E": s.E, "AI": s.AI, "G": s.G, "dV_dt": s.dV_dt,
-            "truth_ece": s.truth_ece, "consent_ok": s.consent_ok,
-            "eco_ok": s.eco_ok, "reu_ok": s.reu_ok, "fairness_ok": s.fairness_ok,
-            "cbf_ok": s.cbf_ok, "attest_ok": s.attest_ok, "love_cost": s.love_cost,
-            "risk": s.risk, "residual_risk_note": s.residual_risk_note, "ts": s.ts
-        },
-        "assumptions_hash": "ΣEA-v1.0-eli"  # placeholder
-    }
+    return True, reason, pca_cert(decision, s, allowed=True, reason=reason, assumptions_hash=gate.assumptions_hash)
+
+# ===== Certificados PCAg endereçados por conteúdo =====
+# `ts` é o instante da medição, não conteúdo: fica fora do hash (senão nada deduplica).
+_SNAP_FIELDS = tuple(f.name for f in fields(EthicsSnapshot) if f.name != "ts")
+
+def _canon(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+class CertStore:
+    """
+    Armazena certificados PCAg deduplicados por sha256 do conteúdo canônico
+    (limiares, snapshot e decisão), com LRU limitado. Certificados idênticos
+    não são recriados: apenas contam hits e atualizam last_ts.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._by_hash: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_key: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, decision: Dict[str, Any], s: EthicsSnapshot, allowed: bool, reason: str,
+            assumptions_hash: str) -> str:
+        snap = tuple(getattr(s, f) for f in _SNAP_FIELDS)
+        key = (allowed, reason, assumptions_hash, snap, _canon(decision))
+        with self._lock:
+            h = self._by_key.get(key)
+            entry = self._by_hash.get(h) if h is not None else None
+            if entry is not None:
+                entry["hits"] += 1
+                entry["last_ts"] = s.ts
+                self._by_hash.move_to_end(h)
+                return h
+            cert = {
+                "allowed": allowed,
+                "reason": reason,
+                "decision": decision,
+                "ethics": dict(zip(_SNAP_FIELDS, snap)),
+                "assumptions_hash": assumptions_hash,
+            }
+            h = hashlib.sha256(_canon(cert).encode("utf-8")).hexdigest()
+            if h not in self._by_hash:
+                self._by_hash[h] = {"hash": h, "cert": cert, "hits": 0, "first_ts": s.ts, "last_ts": s.ts, "_key": key}
+            entry = self._by_hash[h]
+            entry["hits"] += 1
+            entry["last_ts"] = s.ts
+            self._by_key[key] = h
+            self._by_hash.move_to_end(h)
+            while len(self._by_hash) > self.capacity:
+                _, old = self._by_hash.popitem(last=False)
+                self._by_key.pop(old["_key"], None)
+            return h
+
+    def get(self, h: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._by_hash.get(h)
+            return None if entry is None else {k: v for k, v in entry.items() if k != "_key"}
+
+    def __len__(self):
+        return len(self._by_hash)
+
+CERT_STORE = CertStore()
+
+def pca_cert(decision: Dict[str, Any], s: EthicsSnapshot, allowed: bool, reason: str,
+             assumptions_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Certificado PCAg (Proof-Carrying Action): grava no CERT_STORE e retorna a referência por hash."""
+    h = CERT_STORE.put(decision, s, allowed, reason, assumptions_hash or get_gate().assumptions_hash)
+    return {"allowed": allowed, "reason": reason, "cert": h}
 
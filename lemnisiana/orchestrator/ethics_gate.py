@@ -1,6 +1,7 @@
 # lemnisiana/orchestrator/ethics_gate.py
 from __future__ import annotations
-from typing import Dict, Tuple, Any
+from typing import Dict, Tuple, Any, Mapping, Sequence
+from lemnisiana.orchestrator.ethics_rules import GATE_RULES, compiled_gate
 
 DEFAULT_CFG = {
     "tau_E": 0.95,
@@ -11,22 +12,40 @@ DEFAULT_CFG = {
     "c_min": 0.10,
 }
 
-def load_ethics_cfg(yaml_path=None) -> Dict[str, float]:
-    # Carrega thresholds de configs/ethics.yaml se existir; senão usa defaults
+def load_ethics_cfg(yaml_path=None, strict: bool = False, missing_ok: bool = True) -> Dict[str, float]:
+    """
+    Thresholds de configs/ethics.yaml (raiz ou bloco `ethics:`); chaves ausentes usam DEFAULT_CFG.
+    Sem `strict`, qualquer erro de leitura cai nos defaults. Com `strict` (hot reload), YAML
+    inválido, raiz que não é mapeamento, valor não numérico ou arquivo ausente (se não
+    `missing_ok`) levantam ValueError, para quem chama manter a config vigente.
+    """
     cfg = DEFAULT_CFG.copy()
-    if yaml_path:
-        try:
-            import yaml, os
-            if os.path.exists(yaml_path):
-                with open(yaml_path, "r") as f:
-                    data = yaml.safe_load(f) or {}
-                # aceita tanto raiz quanto ethics:
-                node = data.get("ethics") if "ethics" in data else data
-                for k in DEFAULT_CFG:
-                    if k in node:
-                        cfg[k] = float(node[k])
-        except Exception:
-            pass
+    if not yaml_path:
+        return cfg
+    try:
+        import yaml, os
+        if not os.path.exists(yaml_path):
+            if strict and not missing_ok:
+                raise ValueError(f"{yaml_path}: arquivo não encontrado")
+            return cfg
+        with open(yaml_path, "r") as f:
+            data = yaml.safe_load(f) or {}
+        if not isinstance(data, Mapping):
+            raise ValueError(f"{yaml_path}: raiz deve ser um mapeamento")
+        # aceita tanto raiz quanto ethics:
+        node = data.get("ethics") if "ethics" in data else data
+        if not isinstance(node, Mapping):
+            raise ValueError(f"{yaml_path}: 'ethics' deve ser um mapeamento")
+        for k in DEFAULT_CFG:
+            if k in node:
+                v = node[k]
+                if isinstance(v, bool) or not isinstance(v, (int, float)) or v != v:
+                    raise ValueError(f"{yaml_path}: ethics.{k} deve ser numérico, veio {v!r}")
+                cfg[k] = float(v)
+    except Exception as e:
+        if strict:
+            raise ValueError(str(e)) if not isinstance(e, ValueError) else e
+        return DEFAULT_CFG.copy()
     return cfg
 
 def compute_metrics(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -58,26 +77,36 @@ def compute_metrics(state: Dict[str, Any]) -> Dict[str, Any]:
         "attested": attested, "delta_U_all_nonneg": duty_nonneg
     }
 
+_GATE_DEFAULTS = {"attested": False}  # sem atestação => bloqueia
+
+def get_gate(cfg: Dict[str, Any]):
+    """Gate compilado (compartilhado) para este cfg."""
+    return compiled_gate(GATE_RULES, cfg, defaults=_GATE_DEFAULTS)
+
 def ethics_gate(decision: Dict[str, Any], metrics: Dict[str, Any], cfg: Dict[str, Any]) -> Tuple[bool, str]:
     """
     Gate ΣEA (PCAg): retorna (ok, motivo_ou_vazio).
+    Regras em ethics_rules.GATE_RULES, compiladas uma vez por cfg.
     """
-    if not metrics.get("attested", False):
-        return (False, "Unattested")
-    if (metrics["E"] <= cfg["tau_E"]) or (metrics["AI"] <= cfg["tau_AI"]) or (metrics["G"] < cfg["g_min"]):
-        return (False, "Invariant(E/AI/G)")
-    if metrics["dV"] > 0:
-        return (False, "Lyapunov>0")
-    if metrics["risk"] > 0:
-        return (False, "Risk>0")
-    if metrics["c_self"] < cfg["c_min"]:
-        return (False, "NoSacrificialCost")
-    if metrics["ece_truth"] > cfg["ece_truth_max"]:
-        return (False, "TruthECE")
-    if metrics["rho"] > cfg["rho_max"]:
-        return (False, "FairnessRho")
-    if not (metrics["eco_ok"] and metrics["consent_ok"] and metrics["reu_ok"] and metrics["cbf_ok"]):
-        return (False, "ΣEA-Guards")
+    ri = get_gate(cfg)(metrics)
     # Good-Duty (preferir agir quando é seguro e ΔU≥0) é esclarecedor, mas não bloqueante.
-    return (True, "")
+    return (True, "") if ri < 0 else (False, GATE_RULES[ri][0])
+
 
+# ===== Gate em lote (colunar, NumPy) =====
+# Códigos de motivo na mesma precedência do gate escalar; 0 = permitido ("").
+BATCH_REASONS = ("",) + tuple(reason for reason, _ in GATE_RULES)
+
+# Colunas ausentes assumem os mesmos padrões de compute_metrics
+BATCH_DEFAULTS: Dict[str, Any] = {
+    "E": 0.97, "AI": 0.995, "G": 0.93, "dV": -0.01, "risk": 0.0, "c_self": 0.15,
+    "ece_truth": 0.005, "rho": 1.00,
+    "eco_ok": True, "consent_ok": True, "reu_ok": True, "cbf_ok": True, "attested": True,
+}
+
+def ethics_gate_batch(columns: Mapping[str, Sequence[Any]], cfg: Dict[str, Any]):
+    """
+    Gate ΣEA vetorizado: uma coluna por métrica (nomes de compute_metrics).
+    Retorna (allowed[bool], codes[int8]) com codes indexando BATCH_REASONS.
+    """
+    return get_gate(cfg).evaluate_batch(columns, BATCH_DEFAULTS)
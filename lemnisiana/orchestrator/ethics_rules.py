@@ -0,0 +1,221 @@
+# lemnisiana/orchestrator/ethics_rules.py
+from __future__ import annotations
+import hashlib, json, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+# Uma regra = motivo + checks (condições de FALHA). A ordem das regras define a
+# precedência do motivo; checks de uma mesma regra são independentes entre si
+# e podem ser reordenados sem mudar o resultado.
+#   check = (campo, op, limiar)  op in {"<=", "<", ">", ">=", "not"}
+#   limiar = chave do cfg (str) ou literal numérico; ignorado para "not"
+Check = Tuple[str, str, Union[str, float, None]]
+Rule = Tuple[str, Sequence[Check]]
+
+# Gate de ethics_gate.py (métricas de compute_metrics)
+GATE_RULES: Tuple[Rule, ...] = (
+    ("Unattested",        (("attested", "not", None),)),
+    ("Invariant(E/AI/G)", (("E", "<=", "tau_E"), ("AI", "<=", "tau_AI"), ("G", "<", "g_min"))),
+    ("Lyapunov>0",        (("dV", ">", 0.0),)),
+    ("Risk>0",            (("risk", ">", 0.0),)),
+    ("NoSacrificialCost", (("c_self", "<", "c_min"),)),
+    ("TruthECE",          (("ece_truth", ">", "ece_truth_max"),)),
+    ("FairnessRho",       (("rho", ">", "rho_max"),)),
+    ("ΣEA-Guards",        (("eco_ok", "not", None), ("consent_ok", "not", None),
+                           ("reu_ok", "not", None), ("cbf_ok", "not", None))),
+)
+
+# Gate de ethics.py (atributos de EthicsSnapshot)
+SNAPSHOT_RULES: Tuple[Rule, ...] = (
+    ("Unattested",          (("attest_ok", "not", None),)),
+    ("Invariant",           (("E", "<=", "tau_E"), ("AI", "<=", "tau_AI"), ("dV_dt", ">", 0.0), ("G", "<", "g_min"))),
+    ("Risk>0",              (("risk", ">", 0.0),)),
+    ("Truth/Eco/Consent",   (("eco_ok", "not", None), ("truth_ece", ">", "ece_truth_max"), ("consent_ok", "not", None))),
+    ("REU/CBF/Fairness",    (("reu_ok", "not", None), ("cbf_ok", "not", None), ("fairness_ok", "not", None))),
+    ("No sacrificial cost", (("love_cost", "<", "c_min"),)),
+)
+
+_OPS = {"<=", "<", ">", ">=", "not"}
+
+
+class CompiledGate:
+    """
+    Compila regras + thresholds numa única função Python especializada
+    (limiares embutidos como literais), com contadores de falha por check.
+
+    access="item" lê m[campo] (dicts); access="attr" lê m.campo (dataclasses).
+    `defaults` vale só para access="item" (campos opcionais via m.get).
+    """
+
+    def __init__(self, rules: Sequence[Rule], cfg: Mapping[str, Any], access: str = "item",
+                 defaults: Optional[Mapping[str, Any]] = None):
+        if access not in ("item", "attr"):
+            raise ValueError(f"access inválido: {access}")
+        self.rules = tuple((reason, tuple(checks)) for reason, checks in rules)
+        self.cfg = dict(cfg)
+        self.access = access
+        self.defaults = dict(defaults or {})
+        self.reasons = tuple(r for r, _ in self.rules)
+        # checks achatados na ordem de avaliação; cada um aponta para a regra dona
+        self._checks: List[Tuple[int, Check]] = []
+        self._fails: List[int] = []
+        self.calls = 0
+        self.total_s = 0.0
+        self.batch_rows = 0
+        self.batch_rejects = [0] * len(self.rules)
+        for ri, (_, checks) in enumerate(self.rules):
+            for chk in checks:
+                field, op, thr = chk
+                if op not in _OPS:
+                    raise ValueError(f"operador inválido: {op}")
+                if access == "attr" and not field.isidentifier():
+                    raise ValueError(f"campo inválido: {field}")
+                if isinstance(thr, str) and thr not in self.cfg:
+                    raise KeyError(f"threshold ausente no cfg: {thr}")
+                self._checks.append((ri, chk))
+                self._fails.append(0)
+        self.assumptions_hash = self._assumptions_hash()
+        self._compile()
+
+    def _assumptions_hash(self) -> str:
+        """sha256 canônico de regras + limiares efetivos (estável sob reorder)."""
+        thresholds = {thr: self._threshold(thr) for _, (_, _, thr) in self._checks if isinstance(thr, str)}
+        canon = json.dumps({"rules": [[r, [list(c) for c in cs]] for r, cs in self.rules], "thresholds": thresholds},
+                           sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+    # ----- compilação -----
+    def _threshold(self, thr) -> float:
+        return float(self.cfg[thr]) if isinstance(thr, str) else float(thr)
+
+    def _read(self, field: str) -> str:
+        if self.access == "attr":
+            return f"m.{field}"
+        if field in self.defaults:
+            return f"m.get({field!r}, {self.defaults[field]!r})"
+        return f"m[{field!r}]"
+
+    def _compile(self):
+        lines = ["def _gate(m, _f=_fails):"]
+        for ci, (ri, (field, op, thr)) in enumerate(self._checks):
+            if op == "not":
+                cond = f"not {self._read(field)}"
+            else:
+                cond = f"{self._read(field)} {op} {self._threshold(thr)!r}"
+            lines.append(f"    if {cond}:")
+            lines.append(f"        _f[{ci}] += 1")
+            lines.append(f"        return {ri}")
+        lines.append("    return -1")
+        ns: Dict[str, Any] = {"_fails": self._fails}
+        exec(compile("\n".join(lines), f"<ethics-gate:{self.reasons[0] if self.reasons else ''}>", "exec"), ns)
+        self._fn = ns["_gate"]
+        self.source = "\n".join(lines)
+
+    # ----- avaliação -----
+    def __call__(self, m: Any) -> int:
+        """Índice da regra violada (em self.reasons) ou -1 se permitido."""
+        t0 = time.perf_counter()
+        ri = self._fn(m)
+        self.total_s += time.perf_counter() - t0
+        self.calls += 1
+        return ri
+
+    def reason(self, m: Any) -> Optional[str]:
+        ri = self(m)
+        return None if ri < 0 else self.reasons[ri]
+
+    def evaluate_batch(self, columns: Mapping[str, Sequence[Any]], defaults: Optional[Mapping[str, Any]] = None):
+        """
+        Mesma precedência, vetorizada com NumPy sobre colunas.
+        Retorna (allowed[bool], codes[int8]) com 0 = permitido e i+1 = self.reasons[i].
+        """
+        import numpy as np
+        defaults = self.defaults if defaults is None else defaults
+        fields = {f for _, (f, _, _) in self._checks}
+        n = None
+        for f in sorted(fields):
+            if f in columns:
+                k = len(columns[f])
+                if n is not None and k != n:
+                    raise ValueError(f"coluna '{f}' com {k} linhas (esperado {n})")
+                n = k
+        if n is None:
+            raise ValueError("nenhuma coluna de métrica reconhecida")
+
+        cache: Dict[str, Any] = {}
+        def col(f, dtype):
+            if f not in cache:
+                if f in columns:
+                    cache[f] = np.asarray(columns[f], dtype=dtype)
+                elif f in defaults:
+                    cache[f] = np.full(n, defaults[f], dtype=dtype)
+                else:
+                    raise ValueError(f"coluna obrigatória ausente: {f}")
+            return cache[f]
+
+        conds = [np.zeros(n, dtype=bool) for _ in self.rules]
+        for ri, (field, op, thr) in self._checks:
+            if op == "not":
+                c = ~col(field, bool)
+            else:
+                x, t = col(field, np.float64), self._threshold(thr)
+                c = x <= t if op == "<=" else x < t if op == "<" else x > t if op == ">" else x >= t
+            conds[ri] |= c
+        # np.select escolhe a primeira condição verdadeira => precedência das regras
+        codes = np.select(conds, np.arange(1, len(conds) + 1, dtype=np.int8), 0).astype(np.int8)
+        counts = np.bincount(codes, minlength=len(conds) + 1)
+        self.batch_rows += n
+        for ri in range(len(conds)):
+            self.batch_rejects[ri] += int(counts[ri + 1])
+        return codes == 0, codes
+
+    # ----- telemetria / otimização -----
+    def stats(self) -> Dict[str, Any]:
+        """Por check: quantas vezes foi avaliado e quantas falhou (derivado de calls e falhas anteriores)."""
+        out, seen_fail = [], 0
+        for ci, (ri, (field, op, thr)) in enumerate(self._checks):
+            out.append({"rule": self.reasons[ri], "check": f"{field} {op} {thr}" if op != "not" else f"not {field}",
+                        "evaluated": self.calls - seen_fail, "failed": self._fails[ci]})
+            seen_fail += self._fails[ci]
+        return {
+            "calls": self.calls,
+            "allowed": self.calls - seen_fail,
+            "mean_us": (self.total_s / self.calls * 1e6) if self.calls else 0.0,
+            "checks": out,
+            "batch": {"rows": self.batch_rows,
+                      "rejects": {r: c for r, c in zip(self.reasons, self.batch_rejects) if c}},
+        }
+
+    def reorder(self):
+        """
+        Reordena os checks DENTRO de cada regra pelas falhas mais frequentes primeiro
+        (a ordem entre regras é a precedência e não muda). Recompila e zera contadores.
+        """
+        order = sorted(range(len(self._checks)), key=lambda ci: (self._checks[ci][0], -self._fails[ci]))
+        self._checks = [self._checks[ci] for ci in order]
+        self._fails[:] = [0] * len(self._checks)
+        self.calls, self.total_s = 0, 0.0
+        self._compile()
+
+
+# LRU: cada reload de thresholds gera uma chave nova; as antigas saem pela ordem de uso
+_GATES: "OrderedDict[Tuple, CompiledGate]" = OrderedDict()
+_GATES_MAX = 8
+_GATES_LOCK = threading.Lock()
+
+def compiled_gate(rules: Sequence[Rule], cfg: Mapping[str, Any], access: str = "item",
+                  defaults: Optional[Mapping[str, Any]] = None) -> CompiledGate:
+    """Gate compilado compartilhado por (regras, thresholds): compila uma vez por config."""
+    key = (id(rules), access, tuple(sorted((k, v) for k, v in cfg.items() if isinstance(v, (int, float)))))
+    with _GATES_LOCK:
+        gate = _GATES.get(key)
+        if gate is not None:
+            _GATES.move_to_end(key)
+            return gate
+    gate = CompiledGate(rules, cfg, access=access, defaults=defaults)  # compila fora do lock
+    with _GATES_LOCK:
+        gate = _GATES.setdefault(key, gate)
+        _GATES.move_to_end(key)
+        while len(_GATES) > _GATES_MAX:
+            _GATES.popitem(last=False)
+    return gate
@@ -0,0 +1,156 @@
+# lemnisiana/orchestrator/events.py
+from __future__ import annotations
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+class _SeqIndex:
+    """Lista crescente de seqs com cabeça móvel (descarte O(1) amortizado)."""
+    __slots__ = ("seqs", "head")
+
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.head = 0
+
+    def append(self, seq: int):
+        self.seqs.append(seq)
+
+    def trim(self, oldest: int):
+        seqs, h = self.seqs, self.head
+        while h < len(seqs) and seqs[h] < oldest:
+            h += 1
+        # compacta quando a parte morta passa da metade
+        if h > 64 and h * 2 > len(seqs):
+            del seqs[:h]
+            h = 0
+        self.head = h
+
+    def __len__(self):
+        return len(self.seqs) - self.head
+
+
+class EventLog:
+    """
+    Ring buffer de eventos com capacidade fixa (append O(1)).
+    Cada evento recebe um `seq` monotônico; índices secundários por `kind`
+    e busca binária por `ts` permitem paginação por cursor sem copiar o log.
+    """
+
+    def __init__(self, capacity: int = 500):
+        if capacity < 1:
+            raise ValueError("capacity deve ser >= 1")
+        self.capacity = int(capacity)
+        self._buf: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._next = 0  # próximo seq
+        self._by_kind: Dict[str, _SeqIndex] = {}
+
+    # ----- escrita -----
+    def append(self, evt: Dict[str, Any]) -> Dict[str, Any]:
+        seq = self._next
+        evt["seq"] = seq
+        self._buf[seq % self.capacity] = evt
+        self._next = seq + 1
+        idx = self._by_kind.get(evt.get("kind"))
+        if idx is None:
+            idx = self._by_kind[evt.get("kind")] = _SeqIndex()
+        idx.append(seq)
+        idx.trim(self.oldest_seq)
+        return evt
+
+    def append_remote(self, evt: Dict[str, Any], origin_seq: Optional[int] = None,
+                      now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Evento vindo de outra réplica: o `ts` original (mais antigo que a cauda local)
+        quebraria a ordem ts-não-decrescente que _bisect_ts assume; vai para
+        `origin_ts`/`origin_seq` e o evento recebe o instante da ingestão.
+        """
+        last = self._get(self._next - 1)["ts"] if self._next else float("-inf")
+        evt["origin_ts"] = evt.get("ts")
+        if origin_seq is not None:
+            evt["origin_seq"] = origin_seq
+        evt["ts"] = max(time.time() if now is None else now, last)
+        return self.append(evt)
+
+    # ----- leitura -----
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self._next - self.capacity)
+
+    @property
+    def last_seq(self) -> int:
+        """Seq do último evento (-1 se vazio)."""
+        return self._next - 1
+
+    def __len__(self):
+        return self._next - self.oldest_seq
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for s in range(self.oldest_seq, self._next):
+            yield self._buf[s % self.capacity]
+
+    def _get(self, seq: int) -> Dict[str, Any]:
+        return self._buf[seq % self.capacity]
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        lo = max(self.oldest_seq, self._next - abs(n))
+        return [self._get(s) for s in range(lo, self._next)]
+
+    def kinds(self) -> Dict[str, int]:
+        out = {}
+        for k, idx in self._by_kind.items():
+            idx.trim(self.oldest_seq)
+            if len(idx):
+                out[k] = len(idx)
+        return out
+
+    def query(self, since_seq: Optional[int] = None, kind: Optional[str] = None,
+              until_ts: Optional[float] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Eventos em ordem crescente de seq.
+          - since_seq: só eventos com seq > since_seq; retorna os `limit` primeiros (paginação)
+          - sem since_seq: retorna os `limit` últimos (cauda)
+          - kind: filtra pelo índice secundário
+          - until_ts: só eventos com ts <= until_ts
+        """
+        limit = abs(limit)
+        oldest = self.oldest_seq
+        if kind is None:
+            seqs: Any = range(oldest, self._next)
+            lo, hi = 0, len(seqs)
+        else:
+            idx = self._by_kind.get(kind)
+            if idx is None:
+                return []
+            idx.trim(oldest)
+            seqs, lo, hi = idx.seqs, idx.head, len(idx.seqs)
+
+        if since_seq is not None:
+            lo = self._bisect_seq(seqs, since_seq, lo, hi)
+        if until_ts is not None:
+            hi = self._bisect_ts(seqs, until_ts, lo, hi)
+
+        if since_seq is not None:
+            hi = min(hi, lo + limit)
+        else:
+            lo = max(lo, hi - limit)
+        return [self._get(seqs[i]) for i in range(lo, hi)]
+
+    @staticmethod
+    def _bisect_seq(seqs, seq: int, lo: int, hi: int) -> int:
+        # primeira posição com seqs[i] > seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if seqs[mid] <= seq:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _bisect_ts(self, seqs, ts: float, lo: int, hi: int) -> int:
+        # primeira posição com ts > until_ts (ts é não-decrescente com seq)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get(seqs[mid])["ts"] <= ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
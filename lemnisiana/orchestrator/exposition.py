@@ -0,0 +1,72 @@
+# lemnisiana/orchestrator/exposition.py
+from __future__ import annotations
+import gzip, hashlib, threading
+from typing import Any, Callable, Dict, Optional, Tuple
+from prometheus_client.exposition import choose_encoder
+
+class Rendered:
+    """Uma representação pronta: corpo, ETag e (sob demanda) a versão gzip."""
+    __slots__ = ("body", "content_type", "etag", "_gz")
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self._gz: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        if self._gz is None:
+            self._gz = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gz
+
+
+class ExpositionCache:
+    """
+    Cache da exposição Prometheus: renderiza uma vez por `version()` e por formato
+    (texto 0.0.4 ou OpenMetrics, escolhido pelo Accept do scraper). Scrapes
+    seguintes só copiam bytes; gzip é comprimido uma vez por versão.
+    """
+
+    def __init__(self, registry_for: Callable[[], Any], version: Callable[[], Any]):
+        self.registry_for = registry_for
+        self.version = version
+        self._entries: Dict[str, Tuple[Any, Rendered]] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def get(self, accept: str = "") -> Rendered:
+        encoder, content_type = choose_encoder(accept or "")
+        v = self.version()
+        cur = self._entries.get(content_type)
+        if cur is not None and cur[0] == v:
+            self.hits += 1
+            return cur[1]
+        with self._lock:
+            cur = self._entries.get(content_type)
+            if cur is not None and cur[0] == v:
+                self.hits += 1
+                return cur[1]
+            r = Rendered(encoder(self.registry_for()), content_type)
+            self._entries[content_type] = (v, r)
+            self.renders += 1
+            return r
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match: lista de ETags (fracas ou fortes) ou '*'."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
@@ -0,0 +1,258 @@
+# lemnisiana/orchestrator/jobs.py
+from __future__ import annotations
+import contextlib, itertools, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Levantada dentro do job (em check/progress) quando o cancelamento foi pedido."""
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any]
+    status: str = QUEUED
+    created_ts: float = 0.0
+    started_ts: Optional[float] = None
+    finished_ts: Optional[float] = None
+    done: int = 0
+    total: Optional[int] = None
+    partial: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    owner: str = ""
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def progress(self) -> Optional[float]:
+        if self.status == SUCCEEDED:
+            return 1.0
+        return round(self.done / self.total, 4) if self.total else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        end = self.finished_ts or time.time()
+        return {"id": self.id, "kind": self.kind, "params": self.params, "status": self.status,
+                "progress": self.progress, "done": self.done, "total": self.total,
+                "partial": self.partial, "result": self.result, "error": self.error,
+                "cancel_requested": self.cancel_requested, "owner": self.owner,
+                "created_ts": self.created_ts, "started_ts": self.started_ts, "finished_ts": self.finished_ts,
+                "elapsed_s": round(end - self.started_ts, 3) if self.started_ts else None}
+
+
+class JobContext:
+    """Handle passado à função do job: reporta progresso e resultado parcial, e observa o cancelamento."""
+
+    def __init__(self, job: Job, manager: "JobManager"):
+        self.job, self._m = job, manager
+
+    @property
+    def cancelled(self) -> bool:
+        return self._m._cancel_requested(self.job)
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled(self.job.id)
+
+    @contextlib.contextmanager
+    def acquire(self, lock, poll_s: float = 0.1):
+        """
+        Segura um recurso compartilhado (ex.: a rede do trainer). Enquanto espera, o job
+        aparece como `queued` e pode ser cancelado; volta a `running` ao obter o lock.
+        """
+        j = self.job
+        if not lock.acquire(blocking=False):
+            j.status = QUEUED
+            self._m.on_change(j)
+            try:
+                while not lock.acquire(timeout=poll_s):
+                    self.check()
+            finally:
+                j.status = RUNNING
+            self._m.on_change(j)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def progress(self, done: int, total: Optional[int] = None, partial: Optional[Dict[str, Any]] = None):
+        j = self.job
+        j.done = int(done)
+        if total is not None:
+            j.total = int(total)
+        if partial is not None:
+            j.partial = partial
+        self._m._changed(j)
+        self.check()
+
+
+class _NoJob:
+    """Contexto nulo: a mesma função roda inline (endpoints síncronos) sem job."""
+    cancelled = False
+
+    def check(self):
+        pass
+
+    def progress(self, done, total=None, partial=None):
+        pass
+
+    def acquire(self, lock):
+        return lock
+
+
+NO_JOB = _NoJob()
+
+
+class JobManager:
+    """
+    Jobs longos (evolve/train) num executor limitado: submit() devolve o job
+    na hora; a fila tem tamanho máximo (QueueFull); jobs encerrados ficam
+    consultáveis por `ttl_s` (e no máximo `history`). `on_change(job)` é
+    chamado em submit/início/fim e no progresso (no máximo a cada
+    `publish_interval_s`); `remote_cancel(job)` permite cancelar a partir de
+    outro processo (consultado no máximo a cada `publish_interval_s`);
+    `on_evict(ids)` avisa os jobs descartados.
+    """
+
+    def __init__(self, max_workers: int = 1, max_queued: int = 64, ttl_s: float = 3600.0, history: int = 1000,
+                 id_prefix: str = "job-", owner: str = "",
+                 on_change: Optional[Callable[[Job], None]] = None,
+                 remote_cancel: Optional[Callable[[Job], bool]] = None,
+                 on_evict: Optional[Callable[[List[str]], None]] = None,
+                 publish_interval_s: float = 1.0):
+        self.max_workers, self.max_queued = max(1, int(max_workers)), int(max_queued)
+        self.ttl_s, self.history = float(ttl_s), int(history)
+        self.id_prefix, self.owner = id_prefix, owner
+        self.on_change = on_change or (lambda job: None)
+        self.remote_cancel = remote_cancel
+        self.on_evict = on_evict or (lambda ids: None)
+        self.evicted = 0
+        self.publish_interval_s = float(publish_interval_s)
+        self._jobs: Dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._last_pub: Dict[str, float] = {}
+        self._last_poll: Dict[str, float] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="lem-job")
+        return self._executor
+
+    def submit(self, kind: str, fn: Callable[[JobContext], Dict[str, Any]], params: Optional[Dict[str, Any]] = None,
+               now: Optional[float] = None) -> Job:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._sweep(now)
+            if sum(1 for j in self._jobs.values() if j.status == QUEUED) >= self.max_queued:
+                raise QueueFull(f"fila de jobs cheia ({self.max_queued})")
+            job = Job(id=f"{self.id_prefix}{next(self._ids)}", kind=kind, params=dict(params or {}),
+                      created_ts=now, owner=self.owner)
+            self._jobs[job.id] = job
+            pool = self._pool()
+        self.on_change(job)
+        job._future = pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[JobContext], Dict[str, Any]]):
+        if job._cancel.is_set():  # cancelado entre o submit e o início
+            job.status, job.finished_ts = CANCELLED, time.time()
+            self.on_change(job)
+            return
+        job.status, job.started_ts = RUNNING, time.time()
+        self.on_change(job)
+        try:
+            job.result = fn(JobContext(job, self))
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+        job.finished_ts = time.time()
+        self._last_pub.pop(job.id, None)
+        self._last_poll.pop(job.id, None)
+        self.on_change(job)
+
+    def _changed(self, job: Job):
+        now = time.monotonic()
+        if now - self._last_pub.get(job.id, 0.0) >= self.publish_interval_s:
+            self._last_pub[job.id] = now
+            self.on_change(job)
+
+    def _cancel_requested(self, job: Job) -> bool:
+        if job._cancel.is_set():
+            return True
+        if self.remote_cancel is not None:
+            now = time.monotonic()
+            if now - self._last_poll.get(job.id, 0.0) >= self.publish_interval_s:
+                self._last_poll[job.id] = now
+                if self.remote_cancel(job):
+                    job.cancel_requested = True
+                    job._cancel.set()
+                    return True
+        return False
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Pede cancelamento; job na fila é cancelado na hora, em execução no próximo check/progress."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINAL:
+            return job
+        job.cancel_requested = True
+        job._cancel.set()
+        if job.status == QUEUED and job._future is not None and job._future.cancel():
+            job.status, job.finished_ts = CANCELLED, time.time()
+            self.on_change(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._sweep(time.time())
+            return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            self._sweep(time.time())
+            return [j for j in self._jobs.values()
+                    if (kind is None or j.kind == kind) and (status is None or j.status == status)]
+
+    def _sweep(self, now: float) -> List[str]:
+        """Evicção: encerrados além do TTL e, se ainda sobrar, os mais antigos além de `history`."""
+        done = [j for j in self._jobs.values() if j.status in FINAL]
+        drop = [j.id for j in done if now - (j.finished_ts or now) > self.ttl_s]
+        keep = [j for j in done if j.id not in drop]
+        if len(keep) > self.history:
+            keep.sort(key=lambda j: j.finished_ts or 0.0)
+            drop += [j.id for j in keep[: len(keep) - self.history]]
+        for jid in drop:
+            self._jobs.pop(jid, None)
+        self.evicted += len(drop)
+        if drop:
+            self.on_evict(drop)
+        return drop
+
+    def stats(self) -> Dict[str, Any]:
+        by: Dict[str, int] = {}
+        for j in list(self._jobs.values()):
+            by[j.status] = by.get(j.status, 0) + 1
+        return {"workers": self.max_workers, "max_queued": self.max_queued, "ttl_s": self.ttl_s, "by_status": by,
+                "evicted": self.evicted}
+
+    def shutdown(self):
+        for j in list(self._jobs.values()):
+            if j.status not in FINAL:
+                j._cancel.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
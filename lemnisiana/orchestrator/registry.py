@@ -0,0 +1,215 @@
+# lemnisiana/orchestrator/registry.py
+"""
+Registro de versões de modelo com pesos mapeados em memória.
+
+Formato do arquivo (<root>/<id>.lnw), escrito uma vez (tmp + rename) e nunca alterado:
+    magic(8) | len(header) u64 LE | header JSON | arrays float32 contíguos, alinhados a 64 bytes
+O id é o hash do conteúdo (arrays + config), então publicar de novo o mesmo modelo
+não duplica nada. Abrir uma versão é só mmap + views (np.ndarray sobre o mapeamento,
+somente leitura): nenhuma desserialização, e processos que mapeiam o mesmo arquivo
+compartilham as páginas do page cache.
+
+Slots por modelo (main/canary/shadow + previous para desfazer a promoção) são ponteiros
+para ids num mapeamento injetado (no app, um VersionedState replicado pelo backend);
+promote/rollback trocam o dict do modelo numa única atribuição, sem I/O nem cópia.
+"""
+from __future__ import annotations
+import hashlib, json, os, re, struct, tempfile, threading
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional
+import numpy as np
+
+MAGIC = b"LEMW\x00\x01\x00\x00"
+_ALIGN = 64
+SLOT_NAMES = ("main", "canary", "shadow", "previous")
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def version_id(arrays: Mapping[str, np.ndarray], config: Mapping[str, Any]) -> str:
+    h = hashlib.sha256(json.dumps(dict(config), sort_keys=True).encode())
+    for name in sorted(arrays):
+        a = np.ascontiguousarray(arrays[name])
+        h.update(f"{name}|{a.dtype.str}|{a.shape}".encode())
+        h.update(a.data)
+    return "w-" + h.hexdigest()[:16]
+
+
+def write_weights(path: str, arrays: Mapping[str, np.ndarray], meta: Mapping[str, Any]):
+    """Grava atomicamente (tmp + fsync + rename); leitores nunca veem um arquivo parcial."""
+    specs, off = [], 0
+    for name in sorted(arrays):
+        a = np.ascontiguousarray(arrays[name])
+        specs.append({"name": name, "dtype": a.dtype.str, "shape": list(a.shape), "offset": off})
+        off = _aligned(off + a.nbytes)
+    header = json.dumps({"meta": dict(meta), "arrays": specs}).encode()
+    base = _aligned(len(MAGIC) + 8 + len(header))
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for s in specs:
+                f.seek(base + s["offset"])
+                f.write(np.ascontiguousarray(arrays[s["name"]]).tobytes())
+            f.truncate(base + off)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class MappedWeights:
+    """Versão aberta: `arrays` são views somente leitura sobre o mmap do arquivo."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.id = os.path.basename(path)[: -len(".lnw")]
+        with open(path, "rb") as f:
+            head = f.read(len(MAGIC) + 8)
+            if head[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path}: não é um arquivo de pesos lemnisiana")
+            (hlen,) = struct.unpack("<Q", head[len(MAGIC):])
+            header = json.loads(f.read(hlen))
+        base = _aligned(len(MAGIC) + 8 + hlen)
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        self.meta: Dict[str, Any] = header["meta"]
+        self.arrays: Dict[str, np.ndarray] = {
+            s["name"]: np.ndarray(tuple(s["shape"]), dtype=np.dtype(s["dtype"]), buffer=self._mm,
+                                  offset=base + s["offset"])
+            for s in header["arrays"]}
+        self.nbytes = int(self._mm.size)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"id": self.id, "bytes": self.nbytes, "meta": self.meta}
+
+
+class ModelRegistry:
+    def __init__(self, root: str, slots: Optional[MutableMapping[str, Dict[str, Optional[str]]]] = None,
+                 keep: int = 20):
+        self.root, self.keep = root, int(keep)
+        os.makedirs(root, exist_ok=True)
+        self._slots = {} if slots is None else slots
+        self._mapped: Dict[str, MappedWeights] = {}  # por processo: id -> mapeamento aberto
+        self._lock = threading.Lock()
+
+    def _path(self, vid: str) -> str:
+        return os.path.join(self.root, f"{vid}.lnw")
+
+    # ---- versões ----
+    def publish(self, arrays: Mapping[str, np.ndarray], config: Mapping[str, Any],
+                meta: Optional[Mapping[str, Any]] = None) -> str:
+        """Grava a versão (se ainda não existe) e devolve o id de conteúdo."""
+        vid = version_id(arrays, config)
+        path = self._path(vid)
+        if not os.path.exists(path):
+            write_weights(path, arrays, {**(meta or {}), "config": dict(config)})
+            self.gc(protect=(vid,))  # a recém-publicada ainda não tem slot
+        return vid
+
+    def get(self, vid: str) -> MappedWeights:
+        w = self._mapped.get(vid)
+        if w is None:
+            with self._lock:
+                w = self._mapped.get(vid)
+                if w is None:
+                    w = self._mapped[vid] = MappedWeights(self._path(vid))
+        return w
+
+    def has_version(self, vid: str) -> bool:
+        if vid in self._mapped:
+            return True
+        return bool(re.fullmatch(r"w-[0-9a-f]{16}", vid)) and os.path.exists(self._path(vid))
+
+    def versions(self) -> List[Dict[str, Any]]:
+        out = []
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(".lnw"):
+                p = os.path.join(self.root, name)
+                st = os.stat(p)
+                out.append({"id": name[:-4], "bytes": st.st_size, "mtime": st.st_mtime_ns / 1e9,
+                            "mapped": name[:-4] in self._mapped})
+        return sorted(out, key=lambda v: v["mtime"])
+
+    def gc(self, protect=()) -> List[str]:
+        """Remove as versões mais antigas além de `keep` que nenhum slot referencia."""
+        live = {v for s in list(self._slots.values()) for v in s.values() if v} | set(protect)
+        old = [v["id"] for v in self.versions() if v["id"] not in live]
+        drop = old[: max(0, len(old) - self.keep)]
+        for vid in drop:
+            self._mapped.pop(vid, None)  # mapeamentos já abertos continuam válidos após o unlink
+            try:
+                os.unlink(self._path(vid))
+            except FileNotFoundError:
+                pass
+        return drop
+
+    # ---- slots ----
+    def slots(self, model: str) -> Dict[str, Optional[str]]:
+        return dict(self._slots.get(model) or dict.fromkeys(SLOT_NAMES))
+
+    def has_model(self, model: str) -> bool:
+        """Modelo registrado = tem versão main."""
+        return bool((self._slots.get(model) or {}).get("main"))
+
+    def weights(self, model: str, slot: str = "main") -> Optional[MappedWeights]:
+        vid = (self._slots.get(model) or {}).get(slot)
+        return self.get(vid) if vid else None
+
+    def warm(self):
+        """Mapeia as versões apontadas pelos slots (ex.: após aplicar slots de outra réplica)."""
+        for s in list(self._slots.values()):
+            for vid in s.values():
+                if vid and os.path.exists(self._path(vid)):
+                    self.get(vid)
+
+    def _swap(self, model: str, **changes) -> Dict[str, Optional[str]]:
+        with self._lock:
+            cur = self.slots(model)
+            new = {**cur, **changes}
+            if new != cur:
+                self._slots[model] = new  # troca atômica: uma atribuição
+        return new
+
+    def ensure_main(self, model: str, vid: str) -> Dict[str, Optional[str]]:
+        if (self._slots.get(model) or {}).get("main"):
+            return self.slots(model)
+        self.get(vid)
+        return self._swap(model, main=vid)
+
+    def stage(self, model: str, vid: str, slot: str = "shadow") -> Dict[str, Optional[str]]:
+        if slot not in ("canary", "shadow"):
+            raise ValueError(f"slot inválido para stage: {slot}")
+        self.get(vid)  # mapeia antes de apontar: quem ler o slot já encontra as páginas
+        return self._swap(model, **{slot: vid})
+
+    def start_canary(self, model: str) -> Dict[str, Optional[str]]:
+        cur = self.slots(model)
+        if not cur["shadow"]:
+            return cur
+        return self._swap(model, canary=cur["shadow"], shadow=None)
+
+    def promote(self, model: str) -> Dict[str, Optional[str]]:
+        """Candidato (canary, senão shadow) vira main; o main anterior fica em `previous`."""
+        cur = self.slots(model)
+        cand = cur["canary"] or cur["shadow"]
+        if not cand or cand == cur["main"]:
+            return self._swap(model, canary=None, shadow=None) if cand else cur
+        return self._swap(model, main=cand, previous=cur["main"], canary=None, shadow=None)
+
+    def rollback(self, model: str, demote_main: bool = False) -> Dict[str, Optional[str]]:
+        """Canário volta a shadow; com demote_main (rollback após promover), main volta a `previous`."""
+        cur = self.slots(model)
+        if cur["canary"]:
+            return self._swap(model, shadow=cur["canary"], canary=None)
+        if demote_main and cur["previous"]:
+            return self._swap(model, main=cur["previous"], shadow=cur["main"], previous=None)
+        return cur
+
+    def stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "mapped": len(self._mapped),
+                "mapped_bytes": sum(w.nbytes for w in list(self._mapped.values())),
+                "models": {m: dict(s) for m, s in list(self._slots.items())}}
@@ -0,0 +1,384 @@
+# lemnisiana/orchestrator/rollouts.py
+from __future__ import annotations
+import asyncio, heapq, itertools, math, threading, time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RUNNING, PROMOTED, ROLLED_BACK, CANCELLED = "running", "promoted", "rolled_back", "cancelled"
+
+@dataclass
+class Rollout:
+    id: str
+    model: str
+    traffic: float
+    windows: int
+    window_seconds: float
+    target: str = "main"
+    status: str = RUNNING
+    greens: int = 0
+    fail_reason: Optional[str] = None
+    started_ts: float = field(default_factory=time.time)
+    next_due: float = 0.0
+    finished_ts: Optional[float] = None
+    sprt: bool = False      # promoção antecipada por teste sequencial
+    samples: int = 0        # amostras do braço do candidato somadas ao SPRT
+    arm_mark: Optional[List[int]] = None  # (requisições, erros) do braço na última amostra
+    llr: float = 0.0        # log-razão de verossimilhança acumulada (SPRT)
+    early: bool = False     # encerrado antes do fim das janelas
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def running(self) -> bool:
+        return self.status == RUNNING
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["running"] = self.running
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Rollout":
+        names = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in d.items() if k in names})
+
+
+class SPRT:
+    """
+    Teste sequencial de Wald sobre amostras do braço do candidato (vermelho =
+    taxa de erro acima do limite entre duas amostras).
+    H0: taxa de vermelho = p0 (canário saudável); H1: taxa = p1 (degradado).
+    Verde soma green_step, vermelho red_step; LLR <= lower => aceita H0
+    (promove), LLR >= upper => aceita H1 (rollback).
+    """
+
+    def __init__(self, p0: float = 0.01, p1: float = 0.2, alpha: float = 0.05, beta: float = 0.05,
+                 min_samples: int = 5):
+        if not (0 < p0 < p1 < 1):
+            raise ValueError("SPRT exige 0 < p0 < p1 < 1")
+        self.p0, self.p1, self.alpha, self.beta = p0, p1, alpha, beta
+        self.min_samples = int(min_samples)
+        self.green_step = math.log((1 - p1) / (1 - p0))  # < 0
+        self.red_step = math.log(p1 / p0)  # > 0
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def samples_to_promote(self) -> int:
+        """Amostras verdes consecutivas necessárias para promover."""
+        return max(self.min_samples, int(math.ceil(self.lower / self.green_step)))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"p0": self.p0, "p1": self.p1, "alpha": self.alpha, "beta": self.beta,
+                "min_samples": self.min_samples, "samples_to_promote": self.samples_to_promote()}
+
+
+class RolloutScheduler:
+    """
+    Muitos canários independentes (um por modelo) num único timer:
+    um heap de vencimentos de janela e UMA avaliação de guarda por tick,
+    compartilhada por todos os rollouts que vencem juntos.
+
+    Além dos vencimentos, o scheduler reage ao guarda entre janelas:
+    notify_guard() (mudança de métricas) faz rollback imediato se ficou
+    vermelho; observe(ok) (amostra periódica) alimenta o SPRT dos rollouts
+    que o habilitaram, permitindo promoção antes da última janela.
+
+    `check()` é o guarda da plataforma (vale para todos os rollouts);
+    `model_check(model)` o do candidato de cada modelo (ex.: erros do braço
+    canário): vermelho nele só derruba o rollout daquele modelo.
+
+    A evidência do SPRT vem de `arm_verdict(model, mark)` -> (veredito, mark):
+    None enquanto o braço do candidato não acumulou amostras novas suficientes
+    desde `mark`; sem arm_verdict o SPRT nunca recebe amostras.
+
+    Com várias réplicas, só quem `is_leader()` avalia janelas e amostras;
+    as demais mantêm cópias sincronizadas via merge() (registros do backend).
+
+    Callbacks (chamados no event loop): on_window(r, ok), on_finish(r).
+    """
+
+    def __init__(self, check: Callable[[], bool], model_check: Optional[Callable[[str], bool]] = None,
+                 arm_verdict: Optional[Callable[[str, Optional[List[int]]],
+                                                Tuple[Optional[bool], Optional[List[int]]]]] = None,
+                 on_window: Optional[Callable[[Rollout, bool], None]] = None,
+                 on_finish: Optional[Callable[[Rollout], None]] = None,
+                 history: int = 1000, sprt: Optional[SPRT] = None,
+                 is_leader: Callable[[], bool] = lambda: True, id_prefix: str = "ro-",
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.check = check
+        self.model_check = model_check or (lambda model: True)
+        self.arm_verdict = arm_verdict or (lambda model, mark: (None, mark))
+        self.on_evict = on_evict or (lambda rollout_id: None)
+        self.is_leader = is_leader
+        self.id_prefix = id_prefix
+        self.sprt = sprt or SPRT()
+        self._guard_dirty = False
+        self.on_window = on_window or (lambda r, ok: None)
+        self.on_finish = on_finish or (lambda r: None)
+        self.history = history
+        self._heap: List[tuple] = []          # (due, seq, rollout_id)
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._by_id: "OrderedDict[str, Rollout]" = OrderedDict()
+        self._running: Dict[str, Rollout] = {}  # model -> rollout ativo
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.ticks = 0
+        self.checks = 0
+
+    # ----- API -----
+    def start(self, model: str, traffic: float, windows: int, window_seconds: float,
+              target: str = "main", now: Optional[float] = None, sprt: bool = False, **meta) -> Rollout:
+        """Agenda um rollout; ValueError se o modelo já tem um em andamento."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if model in self._running:
+                raise ValueError(f"rollout já em andamento para '{model}': {self._running[model].id}")
+            r = Rollout(id=f"{self.id_prefix}{next(self._ids):06d}", model=model, traffic=float(traffic), windows=int(windows),
+                        window_seconds=float(window_seconds), target=target, started_ts=now, sprt=sprt, meta=meta)
+            r.next_due = now + r.window_seconds
+            self._running[model] = r
+            self._by_id[r.id] = r
+            heapq.heappush(self._heap, (r.next_due, next(self._seq), r.id))
+            self._trim()
+        self._kick()
+        return r
+
+    def cancel(self, rollout_id: str, reason: str = "cancelled") -> Optional[Rollout]:
+        with self._lock:
+            r = self._by_id.get(rollout_id)
+            if r is None or not r.running:
+                return r
+            self._finish(r, CANCELLED, reason)  # entrada do heap fica obsoleta (descartada no pop)
+        self.on_finish(r)
+        return r
+
+    def discard(self, rollout_id: str) -> Optional[Rollout]:
+        """Remove um rollout recém-criado sem callbacks (ex.: reserva recusada pelo backend)."""
+        with self._lock:
+            r = self._by_id.pop(rollout_id, None)
+            if r is not None and self._running.get(r.model) is r:
+                del self._running[r.model]
+        return r
+
+    def merge(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Aplica registros replicados (as_dict de outra réplica/restart): cria os
+        desconhecidos, atualiza progresso e encerra localmente, sem callbacks,
+        os que já terminaram no líder. Retorna quantos mudaram.
+        """
+        changed = 0
+        with self._lock:
+            for d in records:
+                rec = Rollout.from_dict(d)
+                r = self._by_id.get(rec.id)
+                due = None
+                if r is None:
+                    if rec.running and rec.model in self._running:
+                        continue  # conflito local: a reserva no backend decide na próxima escrita
+                    self._by_id[rec.id] = r = rec
+                elif (r.status, r.greens, r.next_due, r.samples) == (rec.status, rec.greens, rec.next_due, rec.samples):
+                    continue
+                else:
+                    due = r.next_due if r.running else None
+                    for k, v in asdict(rec).items():
+                        setattr(r, k, v)
+                changed += 1
+                if r.running:
+                    self._running[r.model] = r
+                    if r.next_due != due:  # sem entradas duplicadas para o mesmo vencimento
+                        heapq.heappush(self._heap, (r.next_due, next(self._seq), r.id))
+                elif self._running.get(r.model) is r:
+                    del self._running[r.model]
+            self._trim()
+        if changed:
+            self._kick()
+        return changed
+
+    def cancel_model(self, model: str, reason: str = "cancelled") -> Optional[Rollout]:
+        with self._lock:
+            r = self._running.get(model)
+        return self.cancel(r.id, reason) if r else None
+
+    def get(self, rollout_id: str) -> Optional[Rollout]:
+        return self._by_id.get(rollout_id)
+
+    def active(self, model: str) -> Optional[Rollout]:
+        return self._running.get(model)
+
+    def list(self, status: Optional[str] = None, model: Optional[str] = None, limit: int = 100) -> List[Rollout]:
+        with self._lock:
+            items = list(self._by_id.values())
+        out = [r for r in reversed(items)
+               if (status is None or r.status == status) and (model is None or r.model == model)]
+        return out[:limit]
+
+    def __len__(self):
+        return len(self._running)
+
+    # ----- timer -----
+    def _kick(self):
+        """Acorda o loop (thread-safe) para recalcular o próximo vencimento."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            wake.set()
+        else:
+            loop.call_soon_threadsafe(wake.set)
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap:
+                due, _, rid = self._heap[0]
+                r = self._by_id.get(rid)
+                if r is not None and r.running and r.next_due == due:
+                    return due
+                heapq.heappop(self._heap)  # entrada obsoleta
+        return None
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Processa todas as janelas vencidas com uma única avaliação de guarda."""
+        if not self.is_leader():
+            return 0
+        now = time.time() if now is None else now
+        due: List[Rollout] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                d, _, rid = heapq.heappop(self._heap)
+                r = self._by_id.get(rid)
+                if r is not None and r.running and r.next_due == d:
+                    due.append(r)
+        if not due:
+            return 0
+        self.ticks += 1
+        self.checks += 1
+        platform_ok = bool(self.check())
+        finished = []
+        with self._lock:
+            for r in due:
+                if not r.running:
+                    continue
+                ok = platform_ok and bool(self.model_check(r.model))
+                if not ok:
+                    self._finish(r, ROLLED_BACK, "guard_failed", now)
+                    finished.append((r, False))
+                    continue
+                r.greens += 1
+                if r.greens >= r.windows:
+                    self._finish(r, PROMOTED, None, now)
+                    finished.append((r, True))
+                else:
+                    r.next_due = now + r.window_seconds
+                    heapq.heappush(self._heap, (r.next_due, next(self._seq), r.id))
+                    finished.append((r, None))
+        for r, res in finished:
+            self.on_window(r, res is not False)
+            if res is not None:
+                self.on_finish(r)
+        return len(due)
+
+    def notify_guard(self):
+        """Métricas de guarda mudaram (qualquer thread): reavalia já no event loop."""
+        self._guard_dirty = True
+        self._kick()
+
+    def rollback_all(self, reason: str = "guard_failed", now: Optional[float] = None) -> int:
+        """Rollback imediato (sub-janela) de todos os rollouts em andamento."""
+        return self._rollback(lambda r: True, reason, now)
+
+    def rollback_failing(self, reason: str = "guard_failed", now: Optional[float] = None) -> int:
+        """Rollback imediato só dos rollouts cujo model_check está vermelho."""
+        return self._rollback(lambda r: not self.model_check(r.model), reason, now)
+
+    def _rollback(self, pick: Callable[[Rollout], bool], reason: str, now: Optional[float]) -> int:
+        if not self.is_leader():
+            return 0
+        now = time.time() if now is None else now
+        with self._lock:
+            victims = [r for r in list(self._running.values()) if pick(r)]
+            for r in victims:
+                r.early = True
+                self._finish(r, ROLLED_BACK, reason, now)
+        for r in victims:
+            self.on_finish(r)
+        return len(victims)
+
+    def observe(self, ok: bool, now: Optional[float] = None) -> int:
+        """
+        Amostra periódica do guarda. Vermelho => rollback imediato de todos;
+        verde => rollback de quem tem model_check vermelho. Os rollouts com SPRT
+        somam o veredito do próprio braço, quando há amostras novas dele
+        (o tick da plataforma é comum a todos e não diz nada do canário).
+        Retorna quantos rollouts foram encerrados.
+        """
+        if not self._running or not self.is_leader():
+            return 0
+        if not ok:
+            return self.rollback_all("guard_failed", now)
+        now = time.time() if now is None else now
+        t = self.sprt
+        rolled = self.rollback_failing("guard_failed", now)
+        done: List[Rollout] = []
+        with self._lock:
+            for r in list(self._running.values()):
+                if not r.sprt:
+                    continue
+                verdict, r.arm_mark = self.arm_verdict(r.model, r.arm_mark)
+                if verdict is None:
+                    continue
+                r.samples += 1
+                r.llr += t.green_step if verdict else t.red_step
+                if r.llr >= t.upper:
+                    r.early = True
+                    self._finish(r, ROLLED_BACK, "sprt_reject", now)
+                    done.append(r)
+                elif r.samples >= t.min_samples and r.llr <= t.lower:
+                    r.early = True
+                    self._finish(r, PROMOTED, None, now)
+                    done.append(r)
+        for r in done:
+            self.on_finish(r)
+        return rolled + len(done)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while True:
+            nd = self.next_due()
+            timeout = None if nd is None else max(0.0, nd - time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._guard_dirty:
+                self._guard_dirty = False
+                if self._running:
+                    if not self.check():
+                        self.rollback_all("guard_failed")
+                    else:
+                        self.rollback_failing("guard_failed")
+            self.tick()
+
+    # ----- interno -----
+    def _finish(self, r: Rollout, status: str, reason: Optional[str], now: Optional[float] = None):
+        r.status = status
+        r.fail_reason = reason
+        r.finished_ts = time.time() if now is None else now
+        if self._running.get(r.model) is r:
+            del self._running[r.model]
+
+    def _trim(self):
+        # mantém histórico limitado de rollouts encerrados
+        extra = len(self._by_id) - self.history - len(self._running)
+        if extra <= 0:
+            return
+        for rid in [rid for rid, r in self._by_id.items() if not r.running][:extra]:
+            del self._by_id[rid]
+            self.on_evict(rid)
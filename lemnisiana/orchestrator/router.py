@@ -0,0 +1,143 @@
+# lemnisiana/orchestrator/router.py
+"""
+Roteamento de inferência entre os braços main / canary / shadow.
+
+- Split do canário por hash da chave do cliente: bucket(chave) in [0, 1) é estável,
+  então o cliente fica sempre do mesmo lado, e aumentar canary_traffic só move
+  clientes de main para canary (nunca de volta). Sob carga real a fração servida
+  converge para canary_traffic sem depender da ordem das requisições.
+- Shadow: o pedido é espelhado para o candidato numa fila limitada consumida por
+  threads próprias; enfileirar é put_nowait (fila cheia => descarta e conta), então o
+  caminho principal nunca espera o candidato.
+- Por modelo e braço: latência (sketch em janela) e requisições/erros (contadores
+  em janela); o guarda de cada modelo usa o braço candidato daquele modelo.
+"""
+from __future__ import annotations
+import hashlib, queue, threading, time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+from lemnisiana.orchestrator.telemetry import WindowedCounter, WindowedQuantiles
+
+ARMS = ("main", "canary", "shadow")
+_SCALE = float(1 << 64)
+
+
+def bucket(key: str, salt: str = "") -> float:
+    """Posição estável da chave em [0, 1); `salt` (ex.: o modelo) descorrelaciona splits de modelos diferentes."""
+    h = hashlib.blake2b(f"{salt}\x00{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(h, "big") / _SCALE
+
+
+class ArmStats:
+    def __init__(self, window_s: float = 60.0, slots: int = 12, arena=None):
+        self.latency = WindowedQuantiles(window_s=window_s, slots=slots, arena=arena)
+        self.counts = WindowedCounter(2, window_s=window_s, slots=slots, arena=arena)  # [requisições, erros]
+
+    def record(self, ms: float, ok: bool):
+        self.latency.record((ms,))
+        self.counts.add((1, 0 if ok else 1))
+
+    def lifetime(self) -> Tuple[int, int]:
+        """(requisições, erros) acumulados desde a criação."""
+        n, err = (int(v) for v in self.counts.lifetime())
+        return n, err
+
+    def summary(self) -> Dict[str, Any]:
+        n, err = (int(v) for v in self.counts.totals())
+        q = self.latency.quantiles((0.5, 0.95))
+        return {"requests": n, "errors": err, "error_rate": err / n if n else None,
+                "p50_ms": q[0.5], "p95_ms": q[0.95]}
+
+
+class TrafficRouter:
+    def __init__(self, stats: Dict[str, Dict[str, ArmStats]], shadow_queue: int = 256, shadow_workers: int = 1,
+                 make_stats: Optional[Callable[[str], Dict[str, ArmStats]]] = None, default_model: str = "default"):
+        """`stats`: modelo -> braço -> ArmStats; modelos novos recebem make_stats(modelo)."""
+        self.models = stats
+        self.default_model = default_model
+        self.make_stats = make_stats or (lambda model: {a: ArmStats() for a in ARMS})
+        self._lock = threading.Lock()
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, int(shadow_queue)))
+        self.mirrored = self.dropped = 0
+        self._workers = [threading.Thread(target=self._drain, name=f"lem-shadow-{i}", daemon=True)
+                         for i in range(max(1, int(shadow_workers)))]
+        for t in self._workers:
+            t.start()
+
+    def pick(self, key: str, canary_traffic: float, salt: str = "") -> str:
+        return "canary" if canary_traffic > 0 and bucket(key, salt) < canary_traffic else "main"
+
+    def stats_for(self, model: Optional[str] = None) -> Dict[str, ArmStats]:
+        model = model or self.default_model
+        st = self.models.get(model)
+        if st is None:
+            with self._lock:
+                st = self.models.get(model)
+                if st is None:
+                    st = self.models[model] = self.make_stats(model)
+        return st
+
+    def call(self, arm: str, fn: Callable[[], Any], model: Optional[str] = None) -> Any:
+        """Executa no braço, registrando latência e erro (a exceção segue para quem chamou)."""
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            out = fn()
+            ok = True
+            return out
+        finally:
+            self.stats_for(model)[arm].record((time.perf_counter() - t0) * 1000.0, ok)
+
+    async def acall(self, arm: str, afn: Callable[[], Awaitable[Any]],
+                    ignore: Tuple[Type[BaseException], ...] = (), model: Optional[str] = None) -> Any:
+        """
+        Como call(), para quem espera sem ocupar thread (ex.: o futuro do micro-batcher).
+        Exceções de `ignore` (ex.: fila cheia) não são falha do modelo: não entram nas estatísticas.
+        """
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            out = await afn()
+            ok = True
+            return out
+        except ignore:
+            t0 = None
+            raise
+        finally:
+            if t0 is not None:
+                self.stats_for(model)[arm].record((time.perf_counter() - t0) * 1000.0, ok)
+
+    def mirror(self, fn: Callable[[], Any], model: Optional[str] = None) -> bool:
+        """Espelha para o shadow sem esperar; False se a fila estava cheia (descartado)."""
+        try:
+            self._q.put_nowait((model, fn))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.mirrored += 1
+        return True
+
+    def _drain(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            try:
+                self.call("shadow", item[1], model=item[0])
+            except Exception:
+                pass  # já contado como erro do braço shadow
+
+    def arms(self, model: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        return {a: s.summary() for a, s in self.stats_for(model).items()}
+
+    def summary(self) -> Dict[str, Any]:
+        return {"arms": self.arms(),
+                "by_model": {m: self.arms(m) for m in list(self.models)},
+                "shadow_queue": {"depth": self._q.qsize(), "capacity": self._q.maxsize,
+                                 "mirrored": self.mirrored, "dropped": self.dropped}}
+
+    def close(self):
+        for _ in self._workers:
+            try:
+                self._q.put_nowait(None)
+            except queue.Full:
+                pass
@@ -0,0 +1,56 @@
+# lemnisiana/orchestrator/serve.py
+"""
+Sobe o orquestrador com `orchestrator.max_workers` processos uvicorn no nó.
+
+Com mais de um worker, prepara um diretório em /dev/shm com:
+  - state.shm : segmento mmap (LEM_SHM_PATH) com janelas de telemetria,
+                histórico de guarda e mode/canary/overrides;
+  - prom/     : PROMETHEUS_MULTIPROC_DIR, gauges agregados em /metrics;
+  - state.db  : backend SQLite (se nenhum backend compartilhado foi configurado),
+                que dá eventos, rollouts e eleição do worker líder.
+
+Uso: python -m lemnisiana.orchestrator.serve [--host H] [--port P] [--workers N]
+"""
+from __future__ import annotations
+import argparse, os, shutil, tempfile
+from typing import Dict, Optional
+from lemnisiana.orchestrator.config import load_config
+
+
+def prepare_env(workers: int, cfg: dict, base: Optional[str] = None) -> Dict[str, str]:
+    """Variáveis de ambiente para `workers` processos compartilharem estado e métricas."""
+    if workers <= 1:
+        return {}
+    base = base or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    root = tempfile.mkdtemp(prefix="lemnisiana-", dir=base)
+    prom = os.path.join(root, "prom")
+    os.makedirs(prom)
+    env = {"LEM_RUN_DIR": root, "LEM_SHM_PATH": os.path.join(root, "state.shm"), "PROMETHEUS_MULTIPROC_DIR": prom}
+    kind = ((cfg.get("orchestrator") or {}).get("state_backend") or {}).get("kind", "memory")
+    if kind == "memory" and not os.getenv("LEM_STATE_BACKEND"):
+        env["LEM_STATE_BACKEND"] = f"sqlite:{os.path.join(root, 'state.db')}"
+    return env
+
+
+def main(argv=None):
+    config_path = os.getenv("LEM_CONFIG", "configs/default.yaml")
+    cfg = load_config(config_path)  # também aquece o cache para os workers
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default=os.getenv("LEM_HOST", "0.0.0.0"))
+    ap.add_argument("--port", type=int, default=int(os.getenv("LEM_PORT", "8000")))
+    ap.add_argument("--workers", type=int,
+                    default=int(os.getenv("LEM_WORKERS", (cfg.get("orchestrator") or {}).get("max_workers", 1))))
+    args = ap.parse_args(argv)
+
+    import uvicorn
+    env = prepare_env(args.workers, cfg)
+    os.environ.update(env)  # herdado pelos workers
+    try:
+        uvicorn.run("lemnisiana.orchestrator.app:app", host=args.host, port=args.port, workers=max(1, args.workers))
+    finally:
+        if env:
+            shutil.rmtree(env["LEM_RUN_DIR"], ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
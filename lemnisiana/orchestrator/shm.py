@@ -0,0 +1,116 @@
+# lemnisiana/orchestrator/shm.py
+from __future__ import annotations
+import fcntl, mmap, os, threading
+from typing import Any, Dict, Mapping, Optional, Sequence
+import numpy as np
+
+_MAGIC = 0x4C454D4E  # "LEMN": segmento já inicializado
+_HEADER = 64
+_ALIGN = 64
+
+
+class _ArenaLock:
+    """Lock entre processos (flock no arquivo) e reentrante entre threads do mesmo processo."""
+
+    def __init__(self, fd: int):
+        self._fd = fd
+        self._rlock = threading.RLock()
+        self._depth = 0
+
+    def __enter__(self):
+        self._rlock.acquire()
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._rlock.release()
+
+
+class SharedArena:
+    """
+    Segmento mmap (ex.: em /dev/shm) compartilhado pelos workers de um nó.
+    Os arrays são alocados em ordem determinística (mesmo código => mesmos
+    offsets em todos os processos). O primeiro processo a abrir inicializa
+    os valores (`fill`) segurando o lock até seal(); os demais só mapeiam.
+    """
+
+    def __init__(self, path: str, size: int = 4 << 20):
+        self.path, self.size = path, int(size)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.lock = _ArenaLock(self._fd)
+        self.lock.__enter__()  # liberado em seal()
+        if os.fstat(self._fd).st_size < self.size:
+            os.ftruncate(self._fd, self.size)
+        self._mm = mmap.mmap(self._fd, self.size)
+        self._header = np.ndarray((2,), dtype=np.int64, buffer=self._mm, offset=0)
+        self.fresh = int(self._header[0]) != _MAGIC
+        self._off = _HEADER
+        self._sealed = False
+
+    def array(self, shape, dtype, fill: Any = 0) -> np.ndarray:
+        """Array numpy sobre o segmento; `fill` só é aplicado por quem inicializa."""
+        dtype = np.dtype(dtype)
+        n = int(np.prod(shape)) * dtype.itemsize
+        off = -(-self._off // _ALIGN) * _ALIGN
+        if off + n > self.size:
+            raise ValueError(f"segmento compartilhado cheio ({self.size} bytes); aumente shm_size_mb")
+        arr = np.ndarray(shape, dtype=dtype, buffer=self._mm, offset=off)
+        self._off = off + n
+        if self.fresh and not self._sealed:
+            arr[...] = fill
+        return arr
+
+    @property
+    def used(self) -> int:
+        return self._off
+
+    def seal(self):
+        """Fim das alocações: marca o segmento como inicializado e libera os demais processos."""
+        if self._sealed:
+            return
+        if self.fresh:
+            self._header[0] = _MAGIC
+            self._mm.flush()
+        self._sealed = True
+        self.lock.__exit__(None, None, None)
+
+
+class SharedRecord:
+    """
+    Registro float64 nomeado no segmento, com seqlock: escritas serializadas
+    pelo lock do arena; leituras sem lock (repetem se pegarem escrita pela metade).
+    """
+
+    def __init__(self, arena: SharedArena, fields: Sequence[str], defaults: Optional[Mapping[str, float]] = None):
+        self.arena = arena
+        self.fields = tuple(fields)
+        self._idx = {f: i for i, f in enumerate(self.fields)}
+        defaults = defaults or {}
+        self._seq = arena.array((1,), np.int64)
+        self._vals = arena.array((len(self.fields),), np.float64,
+                                 fill=[float(defaults.get(f, np.nan)) for f in self.fields])
+
+    @property
+    def version(self) -> int:
+        return int(self._seq[0]) // 2
+
+    def write(self, values: Mapping[str, float]) -> int:
+        with self.arena.lock:
+            self._seq[0] += 1  # ímpar: escrita em andamento
+            for k, v in values.items():
+                self._vals[self._idx[k]] = v
+            self._seq[0] += 1
+            return int(self._seq[0]) // 2
+
+    def read(self) -> Dict[str, float]:
+        while True:
+            s1 = int(self._seq[0])
+            if s1 % 2 == 0:
+                vals = self._vals.copy()
+                if int(self._seq[0]) == s1:
+                    return dict(zip(self.fields, vals.tolist()))
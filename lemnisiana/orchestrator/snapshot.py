@@ -0,0 +1,64 @@
+# lemnisiana/orchestrator/snapshot.py
+"""
+Bundle de snapshot do orquestrador: membros (estado, promoção, guardas, métricas,
+config, eventos) num único tar.gz, com manifest.json listando sha256 e tamanho de
+cada membro.
+
+- Consistência: capture() coleta tudo entre duas leituras de uma impressão digital
+  (geração, seq de eventos, ...) e repete se algo mudou no meio (seqlock), então os
+  membros descrevem o mesmo instante.
+- Os bytes são determinísticos para o mesmo conteúdo (mtime fixo no tar e no gzip),
+  e o sha256 por membro deixa o cliente guardar cada membro endereçado por conteúdo
+  (config e ethics.yaml, que quase nunca mudam, viram um único objeto).
+"""
+from __future__ import annotations
+import gzip, hashlib, io, json, tarfile
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+T = TypeVar("T")
+
+
+class Inconsistent(RuntimeError):
+    """O estado mudou durante todas as tentativas de captura."""
+
+
+def capture(fingerprint: Callable[[], Any], collect: Callable[[], T], attempts: int = 5) -> Tuple[T, int]:
+    """Roda collect() até a impressão digital ser a mesma antes e depois; retorna (resultado, tentativas)."""
+    for i in range(1, max(1, int(attempts)) + 1):
+        before = fingerprint()
+        out = collect()
+        if fingerprint() == before:
+            return out, i
+    raise Inconsistent(f"estado mudou durante {attempts} tentativas de snapshot")
+
+
+def pack_bundle(members: Dict[str, bytes], meta: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+    """tar.gz com manifest.json primeiro e os membros em ordem de nome; retorna (bytes, manifest)."""
+    manifest = {"format": FORMAT, **meta,
+                "members": {n: {"sha256": hashlib.sha256(b).hexdigest(), "size": len(b)}
+                            for n, b in sorted(members.items())}}
+    mtime = int(meta.get("created", 0))
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz, tarfile.open(fileobj=gz, mode="w") as tar:
+        head = json.dumps(manifest, sort_keys=True, indent=1).encode()
+        for name, data in ((MANIFEST, head), *sorted(members.items())):
+            ti = tarfile.TarInfo(name)
+            ti.size, ti.mtime, ti.mode = len(data), mtime, 0o644
+            tar.addfile(ti, io.BytesIO(data))
+    return buf.getvalue(), manifest
+
+
+def unpack_bundle(data: bytes) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+    """Lê e confere o bundle (sha256 de cada membro do manifest); ValueError se não bater."""
+    try:
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+            files = {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+        manifest = json.loads(files.pop(MANIFEST))
+    except (tarfile.TarError, OSError, KeyError, ValueError) as e:
+        raise ValueError(f"bundle inválido: {e}")
+    for name, info in manifest["members"].items():
+        if name not in files or hashlib.sha256(files[name]).hexdigest() != info["sha256"]:
+            raise ValueError(f"membro '{name}' ausente ou corrompido")
+    return manifest, files
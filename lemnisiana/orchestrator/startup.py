@@ -0,0 +1,123 @@
+# lemnisiana/orchestrator/startup.py
+from __future__ import annotations
+import contextlib, importlib, os, threading, time
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+def process_age_s() -> Optional[float]:
+    """Segundos desde o exec do processo (Linux /proc); None se indisponível."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    """
+    Relógio de cold start por fase. mark(nome) fecha a fase corrente do código
+    linear de import; phase(nome) mede um bloco; ready() marca o ponto em que
+    o serviço pode receber tráfego (fases posteriores são aquecimento).
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.process_age_at_t0 = process_age_s()
+        self.phases: List[Tuple[str, float, float]] = []  # (nome, início, duração) em s desde t0
+        self._last = self.t0
+        self.ready_s: Optional[float] = None
+
+    def mark(self, name: str) -> float:
+        now = time.perf_counter()
+        self.phases.append((name, self._last - self.t0, now - self._last))
+        self._last = now
+        return now - self.t0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.t0, time.perf_counter() - start))
+
+    def ready(self):
+        if self.ready_s is None:
+            self.ready_s = time.perf_counter() - self.t0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.ready_s is not None
+
+    def report(self) -> Dict[str, Any]:
+        pre = self.process_age_at_t0
+        return {
+            "phases": [{"name": n, "start_ms": round(s * 1e3, 3), "ms": round(d * 1e3, 3)} for n, s, d in self.phases],
+            "ready": self.is_ready,
+            "ready_ms": None if self.ready_s is None else round(self.ready_s * 1e3, 3),
+            # interpretador + imports anteriores ao app (site, uvicorn, ...)
+            "before_app_ms": None if pre is None else round(pre * 1e3, 3),
+            "process_ready_ms": None if pre is None or self.ready_s is None else round((pre + self.ready_s) * 1e3, 3),
+        }
+
+
+class LazyModule:
+    """
+    Proxy de um subsistema opcional: o import real acontece no primeiro acesso
+    a um atributo (ou em load(), p.ex. no aquecimento pós-ready). Thread-safe.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._mod: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> ModuleType:
+        if self._mod is None:
+            with self._lock:
+                if self._mod is None:
+                    self._mod = importlib.import_module(self._name)
+        return self._mod
+
+    @property
+    def loaded(self) -> bool:
+        return self._mod is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._mod or self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} {'loaded' if self.loaded else 'pending'}>"
+
+
+class LazyObject:
+    """
+    Como LazyModule, para um objeto pesado (ex.: motor de busca com pool e cache):
+    `build()` roda no primeiro acesso a um atributo ou em load(). Thread-safe.
+    """
+
+    def __init__(self, name: str, build: Callable[[], Any]):
+        self._name = name
+        self._build = build
+        self._obj: Any = None
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._build()
+        return self._obj
+
+    @property
+    def loaded(self) -> bool:
+        return self._obj is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._obj if self._obj is not None else self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyObject {self._name} {'loaded' if self.loaded else 'pending'}>"
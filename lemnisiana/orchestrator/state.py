@@ -0,0 +1,110 @@
+# lemnisiana/orchestrator/state.py
+from __future__ import annotations
+import functools, threading
+from typing import Any, Callable, Dict, Iterable, List, Mapping, TypeVar
+
+T = TypeVar("T")
+
+class Generation:
+    """
+    Contador de geração compartilhado: toda mutação relevante chama bump().
+    bump() é atômico: chamadas concorrentes (threadpool, batchers, jobs) nunca
+    dão o mesmo valor, então um memo calculado entre elas não fica preso.
+    """
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+class VersionedState(dict):
+    """
+    dict que incrementa a geração a cada escrita. Chaves `volatile` (ex.: o
+    heartbeat `ts`) são escritas sem invalidar as visões derivadas.
+    Continua sendo um dict comum para serialização (FastAPI/json).
+
+    Cada função em `listeners` recebe as chaves não-voláteis alteradas (p.ex.
+    para replicar no backend de estado ou na memória compartilhada);
+    load() aplica sem notificar.
+    """
+
+    def __init__(self, *args, gen: Generation, volatile: Iterable[str] = (), **kw):
+        super().__init__(*args, **kw)
+        self.gen = gen
+        self._volatile = frozenset(volatile)
+        self.listeners: List[Callable[[Iterable[str]], None]] = []
+
+    def _changed(self, keys: Iterable[str]):
+        self.gen.bump()
+        for fn in self.listeners:
+            fn(keys)
+
+    def __setitem__(self, k, v):
+        super().__setitem__(k, v)
+        if k not in self._volatile:
+            self._changed((k,))
+
+    def __delitem__(self, k):
+        super().__delitem__(k)
+        self._changed((k,))
+
+    def update(self, *args, **kw):
+        keys = list(dict(*args, **kw))
+        super().update(*args, **kw)
+        self._changed(keys)
+
+    def pop(self, *args):
+        present = args and args[0] in self
+        out = super().pop(*args)
+        if present:
+            self._changed((args[0],))
+        else:
+            self.gen.bump()
+        return out
+
+    def setdefault(self, k, default=None):
+        if k not in self:
+            self[k] = default
+        return self[k]
+
+    def clear(self):
+        keys = [k for k in self if k not in self._volatile]
+        super().clear()
+        self._changed(keys)
+
+    def load(self, data: Mapping[str, Any]):
+        """Substitui as chaves não-voláteis por `data` (réplica/restore) sem chamar o listener."""
+        for k in [k for k in self if k not in self._volatile and k not in data]:
+            super().__delitem__(k)
+        super().update({k: v for k, v in data.items() if k not in self._volatile})
+        self.gen.bump()
+
+    def persistent(self) -> Dict[str, Any]:
+        return {k: v for k, v in self.items() if k not in self._volatile}
+
+
+def per_generation(gen: Generation) -> Callable[[Callable[[], T]], Callable[[], T]]:
+    """Memoiza uma visão derivada sem argumentos enquanto `gen` não muda."""
+    def deco(fn: Callable[[], T]) -> Callable[[], T]:
+        cache: list = [-1, None]
+
+        @functools.wraps(fn)
+        def wrapper() -> T:
+            g = gen.value  # lido antes do cálculo: mutação concorrente invalida no próximo acesso
+            if cache[0] != g:
+                cache[1] = fn()
+                cache[0] = g
+            return cache[1]
+        wrapper.invalidate = lambda: cache.__setitem__(0, -1)  # type: ignore[attr-defined]
+        return wrapper
+    return deco
@@ -0,0 +1,96 @@
+# lemnisiana/orchestrator/stream.py
+from __future__ import annotations
+import asyncio, json
+from typing import Any, AsyncIterator, Callable, Optional, Set
+
+class Subscription:
+    """Fila limitada por cliente. Se o cliente não acompanha, descarta o mais antigo e conta."""
+
+    def __init__(self, bus: "Broadcaster", maxsize: int):
+        self.bus = bus
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _push(self, item: Any):
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def take_dropped(self) -> int:
+        n, self.dropped = self.dropped, 0
+        return n
+
+    def close(self):
+        self.bus._subs.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broadcaster:
+    """
+    Fan-out push para N assinantes. `publish` é thread-safe (endpoints síncronos
+    do FastAPI rodam no threadpool) e nunca bloqueia o publicador.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._subs: Set[Subscription] = set()
+
+    def subscribe(self, maxsize: Optional[int] = None) -> Subscription:
+        sub = Subscription(self, maxsize or self.maxsize)
+        self._subs.add(sub)
+        return sub
+
+    def publish(self, item: Any):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for sub in list(self._subs):
+            if sub.loop is running:
+                sub._push(item)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub._push, item)
+
+    def __len__(self):
+        return len(self._subs)
+
+
+def sse(data: Any, event: Optional[str] = None, id: Optional[Any] = None) -> str:
+    out = ""
+    if id is not None:
+        out += f"id: {id}\n"
+    if event:
+        out += f"event: {event}\n"
+    return out + f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def sse_stream(sub: Subscription, is_disconnected: Callable[[], Any],
+                     render: Callable[[Any], Optional[str]], keepalive_s: float = 15.0) -> AsyncIterator[str]:
+    """Drena a assinatura em frames SSE; emite `lag` quando houve descarte e comentários de keepalive."""
+    while True:
+        try:
+            item = await sub.get(timeout=keepalive_s)
+        except asyncio.TimeoutError:
+            if await is_disconnected():
+                return
+            yield ": keepalive\n\n"
+            continue
+        lost = sub.take_dropped()
+        if lost:
+            yield sse({"dropped": lost}, event="lag")
+        frame = render(item)
+        if frame:
+            yield frame
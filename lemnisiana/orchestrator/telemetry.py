@@ -0,0 +1,298 @@
+# lemnisiana/orchestrator/telemetry.py
+from __future__ import annotations
+import json, math, threading, time
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+class LogHistogram:
+    """
+    Histograma log-linear estilo HDR: buckets com erro relativo <= `rel_err`
+    entre [lo, hi]; valores fora são saturados nas pontas. Mergeável por soma.
+    """
+
+    def __init__(self, lo: float = 0.01, hi: float = 1e6, rel_err: float = 0.01):
+        self.lo, self.hi, self.rel_err = float(lo), float(hi), float(rel_err)
+        self._log_base = math.log1p(2 * rel_err)
+        self.n_buckets = int(math.ceil(math.log(self.hi / self.lo) / self._log_base)) + 1
+        self.counts = np.zeros(self.n_buckets, dtype=np.int64)
+
+    def _index(self, values: np.ndarray) -> np.ndarray:
+        v = np.clip(values, self.lo, self.hi)
+        return (np.log(v / self.lo) / self._log_base).astype(np.intp)
+
+    def bucket_value(self, idx: np.ndarray) -> np.ndarray:
+        # ponto médio geométrico do bucket => erro relativo <= rel_err
+        return self.lo * np.exp((idx + 0.5) * self._log_base)
+
+    def add(self, values: Sequence[float]):
+        v = np.asarray(values, dtype=np.float64).ravel()
+        v = v[np.isfinite(v)]
+        if v.size:
+            self.counts += np.bincount(self._index(v), minlength=self.n_buckets)
+
+    def merge(self, other: "LogHistogram"):
+        if other.n_buckets != self.n_buckets or other.lo != self.lo:
+            raise ValueError("histogramas com layouts diferentes")
+        self.counts += other.counts
+
+    @staticmethod
+    def quantiles_of(counts: np.ndarray, qs: Iterable[float], value_of) -> Dict[float, Optional[float]]:
+        total = int(counts.sum())
+        if total == 0:
+            return {q: None for q in qs}
+        cum = np.cumsum(counts)
+        out = {}
+        for q in qs:
+            rank = max(1, int(math.ceil(q * total)))
+            out[q] = float(value_of(np.searchsorted(cum, rank)))
+        return out
+
+
+class WindowedQuantiles:
+    """
+    Quantis sobre janela deslizante de `window_s` segundos, em memória constante:
+    anel de `slots` histogramas + soma corrente (slot expirado é subtraído).
+    Com `arena` (SharedArena), os arrays vivem em memória compartilhada entre workers.
+    """
+
+    def __init__(self, window_s: float = 60.0, slots: int = 12, arena=None, **hist_kw):
+        self.window_s = float(window_s)
+        self.slots = int(slots)
+        self.slot_s = self.window_s / self.slots
+        self._layout = LogHistogram(**hist_kw)
+        nb = self._layout.n_buckets
+        if arena is None:
+            self._ring = np.zeros((self.slots, nb), dtype=np.int64)
+            self._slot_epoch = np.full(self.slots, -1, dtype=np.int64)  # época de cada slot
+            self._total = np.zeros(nb, dtype=np.int64)
+            self._lock = threading.Lock()
+        else:
+            self._ring = arena.array((self.slots, nb), np.int64)
+            self._slot_epoch = arena.array((self.slots,), np.int64, fill=-1)
+            self._total = arena.array((nb,), np.int64)
+            self._lock = arena.lock
+
+    def _epoch(self, now: float) -> int:
+        return int(now // self.slot_s)
+
+    def _expire(self, epoch: int):
+        # slots cuja época saiu da janela são subtraídos do total e zerados
+        stale = (self._slot_epoch >= 0) & (self._slot_epoch <= epoch - self.slots)
+        if stale.any():
+            self._total -= self._ring[stale].sum(axis=0)
+            self._ring[stale] = 0
+            self._slot_epoch[stale] = -1
+
+    def record(self, values: Sequence[float], now: Optional[float] = None) -> int:
+        v = np.asarray(values, dtype=np.float64).ravel()
+        v = v[np.isfinite(v) & (v >= 0)]
+        if not v.size:
+            return 0
+        counts = np.bincount(self._layout._index(v), minlength=self._layout.n_buckets)
+        epoch = self._epoch(time.time() if now is None else now)
+        i = epoch % self.slots
+        with self._lock:
+            self._expire(epoch)
+            self._slot_epoch[i] = epoch
+            self._ring[i] += counts
+            self._total += counts
+        return int(v.size)
+
+    def merge_counts(self, counts: np.ndarray, now: Optional[float] = None):
+        """Mescla um histograma (mesmo layout) de outro processo/réplica no slot atual."""
+        epoch = self._epoch(time.time() if now is None else now)
+        i = epoch % self.slots
+        with self._lock:
+            self._expire(epoch)
+            self._slot_epoch[i] = epoch
+            self._ring[i] += counts
+            self._total += counts
+
+    def snapshot(self, now: Optional[float] = None) -> np.ndarray:
+        with self._lock:
+            self._expire(self._epoch(time.time() if now is None else now))
+            return self._total.copy()
+
+    def count(self, now: Optional[float] = None) -> int:
+        return int(self.snapshot(now).sum())
+
+    def quantiles(self, qs: Iterable[float] = (0.5, 0.95, 0.99), now: Optional[float] = None) -> Dict[float, Optional[float]]:
+        return LogHistogram.quantiles_of(self.snapshot(now), tuple(qs), self._layout.bucket_value)
+
+
+class WindowedCounter:
+    """Contadores (ex.: requisições, erros) somados sobre janela deslizante, no mesmo anel de slots."""
+
+    def __init__(self, n: int, window_s: float = 60.0, slots: int = 12, arena=None):
+        self.n, self.window_s, self.slots = int(n), float(window_s), int(slots)
+        self.slot_s = self.window_s / self.slots
+        if arena is None:
+            self._ring = np.zeros((self.slots, self.n), dtype=np.int64)
+            self._slot_epoch = np.full(self.slots, -1, dtype=np.int64)
+            self._total = np.zeros(self.n, dtype=np.int64)
+            self._lifetime = np.zeros(self.n, dtype=np.int64)
+            self._lock = threading.Lock()
+        else:
+            self._ring = arena.array((self.slots, self.n), np.int64)
+            self._slot_epoch = arena.array((self.slots,), np.int64, fill=-1)
+            self._total = arena.array((self.n,), np.int64)
+            self._lifetime = arena.array((self.n,), np.int64)
+            self._lock = arena.lock
+
+    def _expire(self, epoch: int):
+        stale = (self._slot_epoch >= 0) & (self._slot_epoch <= epoch - self.slots)
+        if stale.any():
+            self._total -= self._ring[stale].sum(axis=0)
+            self._ring[stale] = 0
+            self._slot_epoch[stale] = -1
+
+    def add(self, counts: Sequence[int], now: Optional[float] = None):
+        epoch = int((time.time() if now is None else now) // self.slot_s)
+        i = epoch % self.slots
+        with self._lock:
+            self._expire(epoch)
+            self._slot_epoch[i] = epoch
+            self._ring[i] += counts
+            self._total += counts
+            self._lifetime += counts
+
+    def totals(self, now: Optional[float] = None) -> np.ndarray:
+        with self._lock:
+            self._expire(int((time.time() if now is None else now) // self.slot_s))
+            return self._total.copy()
+
+    def lifetime(self) -> np.ndarray:
+        """Somas desde a criação (monotônicas): diferença entre leituras = contagens novas."""
+        with self._lock:
+            return self._lifetime.copy()
+
+
+class WindowedCalibration:
+    """
+    Expected Calibration Error incremental sobre janela deslizante: por slot,
+    histogramas (count, soma de confiança, soma de acertos) em `bins` faixas
+    iguais de confiança. ECE = Σ_b |acertos_b - confiança_b| / N.
+    """
+
+    def __init__(self, window_s: float = 300.0, slots: int = 10, bins: int = 15, arena=None):
+        self.window_s = float(window_s)
+        self.slots = int(slots)
+        self.slot_s = self.window_s / self.slots
+        self.bins = int(bins)
+        # [slot, {count, conf, correct}, bin]
+        if arena is None:
+            self._ring = np.zeros((self.slots, 3, self.bins), dtype=np.float64)
+            self._slot_epoch = np.full(self.slots, -1, dtype=np.int64)
+            self._total = np.zeros((3, self.bins), dtype=np.float64)
+            self._lock = threading.Lock()
+        else:
+            self._ring = arena.array((self.slots, 3, self.bins), np.float64)
+            self._slot_epoch = arena.array((self.slots,), np.int64, fill=-1)
+            self._total = arena.array((3, self.bins), np.float64)
+            self._lock = arena.lock
+
+    def _expire(self, epoch: int):
+        stale = (self._slot_epoch >= 0) & (self._slot_epoch <= epoch - self.slots)
+        if stale.any():
+            self._total -= self._ring[stale].sum(axis=0)
+            self._ring[stale] = 0.0
+            self._slot_epoch[stale] = -1
+
+    def record(self, confidence: Sequence[float], correct: Sequence[float], now: Optional[float] = None) -> int:
+        conf = np.asarray(confidence, dtype=np.float64).ravel()
+        corr = np.asarray(correct, dtype=np.float64).ravel()
+        if conf.shape != corr.shape:
+            raise ValueError("confidence e correct com tamanhos diferentes")
+        ok = np.isfinite(conf) & np.isfinite(corr)
+        conf, corr = np.clip(conf[ok], 0.0, 1.0), (corr[ok] > 0.5).astype(np.float64)
+        if not conf.size:
+            return 0
+        idx = np.minimum((conf * self.bins).astype(np.intp), self.bins - 1)
+        upd = np.stack([
+            np.bincount(idx, minlength=self.bins).astype(np.float64),
+            np.bincount(idx, weights=conf, minlength=self.bins),
+            np.bincount(idx, weights=corr, minlength=self.bins),
+        ])
+        epoch = int((time.time() if now is None else now) // self.slot_s)
+        i = epoch % self.slots
+        with self._lock:
+            self._expire(epoch)
+            self._slot_epoch[i] = epoch
+            self._ring[i] += upd
+            self._total += upd
+        return int(conf.size)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(int((time.time() if now is None else now) // self.slot_s))
+            count, conf, corr = self._total.copy()
+        n = float(count.sum())
+        if n < 0.5:
+            return {"ece": None, "count": 0, "accuracy": None, "mean_confidence": None}
+        return {
+            "ece": float(np.abs(corr - conf).sum() / n),
+            "count": int(round(n)),
+            "accuracy": float(corr.sum() / n),
+            "mean_confidence": float(conf.sum() / n),
+        }
+
+    def ece(self, now: Optional[float] = None) -> Optional[float]:
+        return self.stats(now)["ece"]
+
+
+def parse_predictions_body(body: bytes, content_type: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lê pares (confidence, correct):
+      - application/octet-stream: float32 LE intercalados [c0, y0, c1, y1, ...]
+      - application/x-ndjson: uma linha por par, `[c, y]` ou {"confidence": c, "correct": y}
+      - JSON: {"confidence": [...], "correct": [...]} (colunar) ou lista de pares
+    ValueError se o formato não fecha em pares, confidence fora de [0, 1] ou correct fora de {0, 1}.
+    """
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct == "application/octet-stream":
+        if len(body) % 8:
+            raise ValueError("corpo binário deve ser pares float32 (múltiplo de 8 bytes)")
+        arr = np.frombuffer(body, dtype="<f4").reshape(-1, 2)
+        return _checked_pairs(arr[:, 0], arr[:, 1])
+    if ct in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        lines = [ln for ln in body.split(b"\n") if ln.strip()]
+        rows = json.loads(b"[" + b",".join(lines) + b"]")  # um único parse em C para o lote
+    else:
+        rows = json.loads(body or b"[]")
+        if isinstance(rows, dict):
+            return _checked_pairs(np.asarray(rows.get("confidence", []), dtype=np.float64),
+                                  np.asarray(rows.get("correct", []), dtype=np.float64))
+    if rows and isinstance(rows[0], dict):
+        rows = [(r.get("confidence"), r.get("correct")) for r in rows]
+    arr = np.asarray(rows, dtype=np.float64)
+    if not arr.size:
+        arr = arr.reshape(0, 2)
+    if arr.ndim != 2 or arr.shape[1] != 2:  # sem reshape: linhas de 3 não viram pares trocados
+        raise ValueError(f"esperado uma lista de pares [confidence, correct], veio forma {list(arr.shape)}")
+    return _checked_pairs(arr[:, 0], arr[:, 1])
+
+
+def _checked_pairs(conf: np.ndarray, correct: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if conf.ndim != 1 or correct.ndim != 1 or conf.shape != correct.shape:
+        raise ValueError("confidence e correct devem ser listas do mesmo tamanho")
+    if not np.all((conf >= 0) & (conf <= 1)):  # NaN também cai aqui
+        raise ValueError("confidence fora de [0, 1]")
+    if not np.all((correct == 0) | (correct == 1)):
+        raise ValueError("correct deve ser 0 ou 1")
+    return conf, correct
+
+
+def parse_float_body(body: bytes, content_type: str, key: str = "values") -> np.ndarray:
+    """
+    Lê um lote de floats: JSON (lista ou {key: [...]}) ou binário
+    (application/octet-stream = float32 little-endian).
+    """
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct == "application/octet-stream":
+        if len(body) % 4:
+            raise ValueError("corpo binário deve ser float32 (múltiplo de 4 bytes)")
+        return np.frombuffer(body, dtype="<f4")
+    data = json.loads(body or b"[]")
+    if isinstance(data, dict):
+        data = data.get(key, [])
+    return np.asarray(data, dtype=np.float64)
@@ -0,0 +1,196 @@
+# lemnisiana/orchestrator/timeseries.py
+from __future__ import annotations
+import math, threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+AGGS = ("mean", "min", "max", "last", "sum", "count")
+
+class _Tier:
+    """
+    Anel colunar de capacidade fixa. resolution=0 guarda amostras cruas;
+    resolution>0 guarda agregados por bucket (sum/min/max/last/count por série).
+    """
+
+    def __init__(self, name: str, resolution: float, capacity: int, n_series: int, arena=None):
+        self.name, self.resolution, self.capacity = name, float(resolution), int(capacity)
+        shape = (self.capacity, n_series)
+        if arena is None:
+            def alloc(shape, dtype=np.float64, fill=0.0):
+                return np.full(shape, fill, dtype=dtype)
+        else:
+            alloc = arena.array
+        self.ts = alloc(self.capacity, np.float64, np.nan)
+        if self.resolution == 0:
+            self.val = alloc(shape, np.float64, np.nan)
+        else:
+            self.sum = alloc(shape, np.float64, 0.0)
+            self.min = alloc(shape, np.float64, np.nan)
+            self.max = alloc(shape, np.float64, np.nan)
+            self.last = alloc(shape, np.float64, np.nan)
+            self.count = alloc(self.capacity, np.int64, 0)
+        self._hs = alloc(2, np.int64, 0)  # [head, size]: no array para valer também em memória compartilhada
+
+    @property
+    def head(self) -> int:  # próxima posição livre
+        return int(self._hs[0])
+
+    @head.setter
+    def head(self, v: int):
+        self._hs[0] = v
+
+    @property
+    def size(self) -> int:
+        return int(self._hs[1])
+
+    @size.setter
+    def size(self, v: int):
+        self._hs[1] = v
+
+    def _advance(self) -> int:
+        i = self.head
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def append(self, ts: float, row: np.ndarray):
+        if self.resolution == 0:
+            i = self._advance()
+            self.ts[i], self.val[i] = ts, row
+            return
+        bucket = math.floor(ts / self.resolution) * self.resolution
+        cur = (self.head - 1) % self.capacity
+        if self.size == 0 or self.ts[cur] != bucket:
+            i = self._advance()
+            self.ts[i] = bucket
+            self.sum[i], self.min[i], self.max[i], self.last[i] = row, row, row, row
+            self.count[i] = 1
+            return
+        self.sum[cur] += row
+        np.fmin(self.min[cur], row, out=self.min[cur])
+        np.fmax(self.max[cur], row, out=self.max[cur])
+        self.last[cur] = row
+        self.count[cur] += 1
+
+    def oldest(self) -> float:
+        if self.size == 0:
+            return math.inf
+        return float(self.ts[(self.head - self.size) % self.capacity])
+
+    def read(self, start: float, end: float, cols: Sequence[int]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Componentes (sum/min/max/last/count) em ordem cronológica dentro de [start, end]."""
+        order = np.arange(self.head - self.size, self.head) % self.capacity
+        ts = self.ts[order]
+        sel = order[(ts >= start) & (ts <= end)]
+        ts = self.ts[sel]
+        if self.resolution == 0:
+            v = self.val[np.ix_(sel, cols)]
+            return ts, {"sum": v, "min": v, "max": v, "last": v, "count": np.ones(len(sel), dtype=np.int64)}
+        return ts, {
+            "sum": self.sum[np.ix_(sel, cols)], "min": self.min[np.ix_(sel, cols)],
+            "max": self.max[np.ix_(sel, cols)], "last": self.last[np.ix_(sel, cols)],
+            "count": self.count[sel],
+        }
+
+
+class ColumnarTSDB:
+    """
+    Série temporal embutida, memória fixa: um tier cru + tiers de downsampling
+    (ex.: 1m e 10m) alimentados no mesmo append. Consultas escolhem o tier mais
+    fino que cobre o intervalo e re-agregam por `step` de forma vetorizada.
+    Com `arena` (SharedArena), os anéis ficam em memória compartilhada entre workers.
+    """
+
+    def __init__(self, series: Sequence[str], raw_capacity: int = 1800,
+                 tiers: Sequence[Tuple[str, float, int]] = (("1m", 60.0, 1440), ("10m", 600.0, 1008)),
+                 arena=None):
+        self.series = tuple(series)
+        self._col = {s: i for i, s in enumerate(self.series)}
+        self.tiers = [_Tier("raw", 0.0, raw_capacity, len(self.series), arena)]
+        self.tiers += [_Tier(name, res, cap, len(self.series), arena)
+                       for name, res, cap in sorted(tiers, key=lambda t: t[1])]
+        self._lock = threading.Lock() if arena is None else arena.lock
+
+    def append(self, ts: float, values: Sequence[float]):
+        row = np.asarray(values, dtype=np.float64)
+        if row.shape != (len(self.series),):
+            raise ValueError(f"esperado {len(self.series)} valores")
+        with self._lock:
+            for t in self.tiers:
+                t.append(ts, row)
+
+    def __len__(self):
+        return self.tiers[0].size
+
+    def _pick(self, start: float, step: Optional[float], tier: Optional[str]) -> _Tier:
+        if tier is not None:
+            for t in self.tiers:
+                if t.name == tier:
+                    return t
+            raise ValueError(f"tier desconhecido: {tier}")
+        usable = [t for t in self.tiers if step is None or t.resolution <= step] or self.tiers[:1]
+        if start == -math.inf:
+            return usable[0]
+        for t in usable:
+            if t.oldest() <= start:
+                return t
+        return max(usable, key=lambda t: t.resolution * t.capacity)  # maior cobertura
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              series: Optional[Sequence[str]] = None, agg: str = "mean",
+              step: Optional[float] = None, tier: Optional[str] = None) -> Dict[str, Any]:
+        if agg not in AGGS:
+            raise ValueError(f"agg inválida: {agg} (use {', '.join(AGGS)})")
+        if step is not None and step <= 0:
+            raise ValueError("step deve ser > 0")
+        names = list(series) if series else list(self.series)
+        unknown = [s for s in names if s not in self._col]
+        if unknown:
+            raise ValueError(f"séries desconhecidas: {unknown}")
+        start = -math.inf if start is None else float(start)
+        end = math.inf if end is None else float(end)
+        cols = [self._col[s] for s in names]
+        with self._lock:
+            t = self._pick(start, step, tier)
+            ts, comp = t.read(start, end, cols)
+
+        if step is not None and t.resolution > 0:
+            # step vira múltiplo da resolução do tier: cada bucket junta um número inteiro de linhas
+            m = max(1, round(step / t.resolution))
+            step = m * t.resolution
+        if step is not None and len(ts):
+            # re-agrega em buckets alinhados a múltiplos de step
+            if t.resolution > 0:
+                b = np.floor(np.round(ts / t.resolution) / m)  # pelo índice da linha: sem erro de ponto flutuante
+            else:
+                b = np.floor(ts / step)
+            starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+            ends = np.r_[starts[1:], len(ts)] - 1
+            comp = {
+                "sum": np.add.reduceat(comp["sum"], starts, axis=0),
+                "min": np.fmin.reduceat(comp["min"], starts, axis=0),
+                "max": np.fmax.reduceat(comp["max"], starts, axis=0),
+                "last": comp["last"][ends],
+                "count": np.add.reduceat(comp["count"], starts),
+            }
+            ts = b[starts] * step
+
+        cnt = comp["count"].astype(np.float64)
+        if agg == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out = comp["sum"] / cnt[:, None] if len(ts) else comp["sum"]
+        elif agg == "count":
+            out = np.repeat(cnt[:, None], len(names), axis=1)
+        else:
+            out = comp[agg]
+
+        def col(j):
+            return [None if not np.isfinite(x) else float(x) for x in out[:, j]]
+        return {
+            "tier": t.name,
+            "resolution_s": t.resolution,
+            "agg": agg,
+            "step": step,
+            "ts": ts.tolist(),
+            "series": {name: col(j) for j, name in enumerate(names)},
+        }
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
-import argparse, json, os, sys, time, subprocess
-from pathlib import Path
+import argparse, hashlib, io, json, os, sys, tarfile, time, subprocess, zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
 import httpx
 
 BASE = os.environ.get("LEM_BASE", "http://localhost:8000")
+SNAP_ROOT = Path(os.environ.get("LEM_SNAPSHOTS", "snapshots"))
+_CLIENT = []
 
 def jprint(obj): print(json.dumps(obj, ensure_ascii=False, indent=2))
 
+def client():
+    """Um httpx.Client por processo: conexões keep-alive reaproveitadas entre chamadas."""
+    if not _CLIENT:
+        _CLIENT.append(httpx.Client(base_url=BASE, timeout=10,
+                                    limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)))
+    return _CLIENT[0]
+
 def req(method, path, **kw):
-    url = f"{BASE}{path}"
-    r = httpx.request(method, url, timeout=10, **kw)
+    r = client().request(method, path, **kw)
     r.raise_for_status()
     return r
 
@@ -34,43 +43,169 @@ def cmd_ednag(args):
 def cmd_backprop(args):
     jprint(req("POST","/backpropamine/train", params={"steps": args.steps}).json())
 
-def cmd_snapshot(args):
-    ts = time.strftime("%Y%m%d-%H%M%S")
-    tag = args.tag or ts
-    root = Path("snapshots")/tag
-    root.mkdir(parents=True, exist_ok=True)
-
-    # salvar config atual
-    cfg_src = Path("configs")/"default.yaml"
-    if cfg_src.exists():
-        cfg_dst = root/"default.yaml"
-        cfg_dst.write_text(cfg_src.read_text())
-
-    # salvar estado do orquestrador
-    (root/"health.json").write_text(req("GET","/health").text)
-    (root/"mode.json").write_text(req("GET","/mode").text)
-    (root/"guard.json").write_text(req("GET","/guard/check").text)
-    (root/"metrics.txt").write_text(req("GET","/metrics").text)
+# ===== snapshots: objetos endereçados por conteúdo + refs =====
+# snapshots/objects/ab/cdef...  membro comprimido (zlib), nome = sha256 do conteúdo original
+# snapshots/refs/<tag>.json     manifest do bundle: membro -> sha256 (alguns KB)
+# Config e ethics.yaml repetidos entre snapshots são guardados uma única vez; listar é
+# um listdir de refs e restaurar lê só os objetos necessários.
+def _obj_path(sha):
+    return SNAP_ROOT/"objects"/sha[:2]/sha[2:]
+
+def _put_object(data):
+    sha = hashlib.sha256(data).hexdigest()
+    dst = _obj_path(sha)
+    try:
+        os.utime(dst)  # dedup: conteúdo igual, mesmo objeto; mtime renovado protege do prune concorrente
+        return sha
+    except FileNotFoundError:
+        pass
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(zlib.compress(data, 6))
+    os.replace(tmp, dst)
+    return sha
+
+def _get_object(sha):
+    data = zlib.decompress(_obj_path(sha).read_bytes())
+    if hashlib.sha256(data).hexdigest() != sha:
+        raise ValueError(f"objeto {sha[:12]} corrompido")
+    return data
+
+def _fetch_bundle():
+    """Bundle atômico do servidor; servidores sem /snapshot: os 4 endpoints em paralelo (não atômico)."""
+    r = client().get("/snapshot")
+    if r.status_code != 404:
+        r.raise_for_status()
+        with tarfile.open(fileobj=io.BytesIO(r.content), mode="r:gz") as tar:
+            files = {m.name: tar.extractfile(m).read() for m in tar.getmembers() if m.isfile()}
+        manifest = json.loads(files.pop("manifest.json"))
+        for name, info in manifest["members"].items():
+            if hashlib.sha256(files.get(name, b"")).hexdigest() != info["sha256"]:
+                raise ValueError(f"bundle: membro '{name}' ausente ou corrompido")
+        return manifest, files
+    paths = {"health.json": "/health", "mode.json": "/mode", "guard.json": "/guard/check", "metrics.txt": "/metrics"}
+    with ThreadPoolExecutor(len(paths)) as ex:
+        bodies = dict(zip(paths, ex.map(lambda p: req("GET", p).content, paths.values())))
+    cfg = Path("configs")/"default.yaml"
+    if cfg.exists():
+        bodies["config/default.yaml"] = cfg.read_bytes()
+    return {"format": 0, "created": time.time(), "consistent": False}, bodies
+
+def _write_ref(tag, ref):
+    dst = SNAP_ROOT/"refs"/f"{tag}.json"
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    tmp.write_text(json.dumps(ref, ensure_ascii=False, sort_keys=True))
+    os.replace(tmp, dst)
+    return dst
+
+def _read_ref(tag):
+    p = SNAP_ROOT/"refs"/f"{tag}.json"
+    return json.loads(p.read_text()) if p.exists() else None
 
-    print(f"OK: snapshot salvo em {root}")
+def cmd_snapshot(args):
+    tag = args.tag or time.strftime("%Y%m%d-%H%M%S")
+    manifest, files = _fetch_bundle()
+    objects = {name: _put_object(data) for name, data in files.items()}
+    ref = {k: v for k, v in manifest.items() if k != "members"}
+    ref["objects"] = objects
+    dst = _write_ref(tag, ref)
+    print(f"OK: snapshot salvo em {dst} ({len(objects)} membros)")
+
+def _tags():
+    """Tags de refs/ e, por compatibilidade, diretórios do formato antigo (um diretório por snapshot)."""
+    refs = SNAP_ROOT/"refs"
+    tags = {e.name[:-5] for e in os.scandir(refs) if e.name.endswith(".json")} if refs.is_dir() else set()
+    if SNAP_ROOT.is_dir():
+        tags |= {e.name for e in os.scandir(SNAP_ROOT)
+                 if e.is_dir() and e.name not in ("objects", "refs") and (Path(e.path)/"default.yaml").exists()}
+    return sorted(tags)
 
 def cmd_snapshot_list(_):
-    snaps = sorted([p.name for p in Path("snapshots").glob("*") if p.is_dir()])
-    jprint({"snapshots": snaps})
+    jprint({"snapshots": _tags()})
+
+def cmd_snapshot_prune(args):
+    """Mantém as `keep` refs mais recentes (por `created`) e apaga objetos sem referência."""
+    refs = []
+    for p in (SNAP_ROOT/"refs").glob("*.json"):
+        ref = json.loads(p.read_text())
+        refs.append((ref.get("created") or p.stat().st_mtime, p.name, p, ref))
+    refs.sort(key=lambda r: r[:2])
+    drop, keep = refs[:max(0, len(refs) - args.keep)], refs[max(0, len(refs) - args.keep):]
+    for *_, p, _ref in drop:
+        p.unlink()
+    live = {sha for *_, ref in keep for sha in ref["objects"].values()}
+    cutoff = time.time() - args.grace_s  # objetos recentes podem ser de um snapshot cuja ref ainda não existe
+    removed = 0
+    for p in (SNAP_ROOT/"objects").glob("*/*"):
+        if p.parent.name + p.name not in live and p.stat().st_mtime < cutoff:
+            p.unlink(); removed += 1
+    jprint({"refs_removed": len(drop), "objects_removed": removed, "objects_live": len(live)})
+
+def _non_negative(v):
+    n = int(v)
+    if n < 0:
+        raise argparse.ArgumentTypeError("deve ser >= 0")
+    return n
+
+def _config_dest(name):
+    """configs/<resto> para o membro `config/<resto>`; o nome vem do manifest do servidor: nada fora de configs/."""
+    rel = PurePosixPath(name.split("/", 1)[1])
+    if not rel.parts or rel.is_absolute() or "\\" in name or any(p in ("..", ".") for p in rel.parts):
+        raise ValueError(f"membro de config com caminho inválido: {name!r}")
+    return Path("configs", *rel.parts)
+
+def _write_atomic(dst, data):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, dst)  # o watcher do orquestrador nunca lê arquivo pela metade
+
+def _snapshot_configs(tag):
+    """{destino: bytes} das configs guardadas no snapshot (default.yaml obrigatório)."""
+    ref = _read_ref(tag)
+    if ref is not None:
+        objs = ref["objects"]
+        if "config/default.yaml" not in objs:
+            return None
+        return {_config_dest(name): _get_object(sha)
+                for name, sha in objs.items() if name.startswith("config/")}
+    legacy = SNAP_ROOT/tag/"default.yaml"
+    return {Path("configs")/"default.yaml": legacy.read_bytes()} if legacy.exists() else None
 
 def cmd_snapshot_restore(args):
     tag = args.tag
-    root = Path("snapshots")/tag
-    cfg = root/"default.yaml"
-    if not root.exists() or not cfg.exists():
+    try:
+        files = _snapshot_configs(tag)
+    except ValueError as e:
+        print(f"ERRO: snapshot '{tag}' inválido: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not files:
         print(f"ERRO: snapshot '{tag}' inválido (sem default.yaml).", file=sys.stderr)
         sys.exit(1)
-    # restaura config
-    Path("configs")/"default.yaml"
-    (Path("configs")/"default.yaml").write_text(cfg.read_text())
-    print("Config restaurada. Reiniciando orchestrator…")
-    # requer docker compose instalado no host:
-    subprocess.call("docker compose restart orchestrator", shell=True)
+    # restaura config (troca atômica por arquivo)
+    prev = {}
+    for dst, data in files.items():
+        prev[dst] = dst.read_bytes() if dst.exists() else None
+        _write_atomic(dst, data)
+    if args.restart:
+        print("Config restaurada. Reiniciando orchestrator…")
+        # requer docker compose instalado no host:
+        subprocess.call("docker compose restart orchestrator", shell=True)
+        return
+    # hot reload: valida e aplica sem derrubar promoções em andamento
+    r = client().post("/config/reload")
+    if r.status_code == 422:
+        for dst, old in prev.items():
+            if old is None:
+                dst.unlink(missing_ok=True)  # não existia antes do restore
+            else:
+                _write_atomic(dst, old)
+        print(f"ERRO: config do snapshot '{tag}' rejeitada; anterior mantida.", file=sys.stderr)
+        jprint(r.json()); sys.exit(2)
+    r.raise_for_status()
+    print("Config restaurada e recarregada.")
+    jprint(r.json())
 
 def main():
     p = argparse.ArgumentParser(prog="lemctl", description="CLI Lemnisiana")
@@ -91,7 +226,14 @@ def main():
 
     s = sub.add_parser("snapshot"); s.add_argument("--tag"); s.set_defaults(func=cmd_snapshot)
     s = sub.add_parser("snapshots"); s.set_defaults(func=cmd_snapshot_list)
-    s = sub.add_parser("restore"); s.add_argument("--tag", required=True); s.set_defaults(func=cmd_snapshot_restore)
+    s = sub.add_parser("prune", help="remove snapshots antigos e objetos sem referência")
+    s.add_argument("--keep", type=_non_negative, required=True)
+    s.add_argument("--grace-s", type=_non_negative, default=600,
+                   help="não apaga objetos modificados há menos que isso (snapshot em andamento)")
+    s.set_defaults(func=cmd_snapshot_prune)
+    s = sub.add_parser("restore"); s.add_argument("--tag", required=True)
+    s.add_argument("--restart", action="store_true", help="reinicia o container em vez do hot reload")
+    s.set_defaults(func=cmd_snapshot_restore)
 
     args = p.parse_args()
     try:
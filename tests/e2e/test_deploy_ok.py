@@ -8,3 +8,26 @@ def test_canary_promotes_to_main():
     time.sleep(7)  # > 2*3s
     st = httpx.get(f"{BASE}/deploy/status").json()
     assert st["state"]["mode"] == "main"
+
+def test_concurrent_rollouts_per_model():
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+    main = httpx.get(f"{BASE}/models/default").json()["slots"]["main"]["id"]
+    ids = []
+    for m in ("model-a", "model-b"):
+        assert httpx.post(f"{BASE}/models/{m}", params={"version": main}).status_code == 200
+        r = httpx.post(f"{BASE}/deploy/canary", params={"model": m, "windows": 1, "window_seconds": 1})
+        assert r.status_code == 200
+        ids.append(r.json()["rollout"])
+    dup = httpx.post(f"{BASE}/deploy/canary", params={"model": "model-a", "windows": 1, "window_seconds": 1})
+    assert dup.status_code == 409
+    time.sleep(2.5)
+    for rid in ids:
+        assert httpx.get(f"{BASE}/deploy/rollouts/{rid}").json()["status"] == "promoted"
+    assert httpx.get(f"{BASE}/deploy/status", params={"model": "model-b"}).json()["state"]["mode"] == "main"
+
+def test_unknown_model_reads_do_not_create_state():
+    before = set(httpx.get(f"{BASE}/router").json()["models"])
+    assert httpx.get(f"{BASE}/deploy/status", params={"model": "nope"}).status_code == 404
+    assert httpx.post(f"{BASE}/deploy/canary", params={"model": "nope"}).status_code == 404
+    assert httpx.post(f"{BASE}/models/nope", params={"version": "w-0000000000000000"}).status_code == 404
+    assert set(httpx.get(f"{BASE}/router").json()["models"]) == before
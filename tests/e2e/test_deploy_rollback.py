@@ -9,3 +9,19 @@ def test_canary_rollback_on_guard_fail():
     st = httpx.get(f"{BASE}/deploy/status").json()
     assert st["state"]["mode"] == "shadow"  # rollback efetuado
     httpx.post(f"{BASE}/guard/force", params={"reset": True})
+
+def test_red_guard_rolls_back_within_window():
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+    r = httpx.post(f"{BASE}/deploy/canary", params={"windows": 3, "window_seconds": 60})
+    assert r.status_code == 200
+    t0 = time.time()
+    httpx.post(f"{BASE}/guard/force", params={"lat95_v": 900})
+    while time.time() - t0 < 1.0:
+        st = httpx.get(f"{BASE}/deploy/status").json()
+        if st["state"]["mode"] == "shadow":
+            break
+        time.sleep(0.02)
+    assert st["state"]["mode"] == "shadow" and not st["promotion"]["running"]
+    ev = httpx.get(f"{BASE}/events", params={"kind": "rollback", "limit": 1}).json()
+    assert ev[-1].get("early") is True
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
@@ -0,0 +1,15 @@
+import httpx
+
+BASE = "http://localhost:8000"
+
+def test_ethics_gate_batch_endpoint():
+    body = {"E": [0.97, 0.5, 0.97], "dV": [-0.01, -0.01, 0.3]}
+    r = httpx.post(f"{BASE}/ethics/gate/batch", json=body)
+    assert r.status_code == 200
+    j = r.json()
+    assert j["n"] == 3
+    assert j["allowed"] == [True, False, False]
+    assert [j["reasons"][c] for c in j["reason_codes"]] == ["", "Invariant(E/AI/G)", "Lyapunov>0"]
+
+    r = httpx.post(f"{BASE}/ethics/gate/batch", json={"E": [1.0], "AI": [1.0, 1.0]})
+    assert r.status_code == 400
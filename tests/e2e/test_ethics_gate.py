@@ -26,3 +26,18 @@ def test_ethics_check_endpoint():
     for key in ("E","AI","G","dV_dt","truth_ece","risk"):
         assert key in snap
 
+
+def test_pca_cert_lookup_by_hash():
+    httpx.post(f"{BASE}/ethics/force", params={"reset": True})
+    httpx.post(f"{BASE}/deploy/rollback", params={"reason": "test"})
+    r = httpx.post(f"{BASE}/deploy/canary", params={"windows": 1, "window_seconds": 1, "enforce_ethics": True})
+    if r.status_code == 409:  # promoção anterior ainda rodando
+        time.sleep(1.5)
+        r = httpx.post(f"{BASE}/deploy/canary", params={"windows": 1, "window_seconds": 1, "enforce_ethics": True})
+    assert r.status_code == 200
+    h = r.json()["pca"]["cert"]
+    c = httpx.get(f"{BASE}/ethics/cert/{h}").json()
+    assert c["hash"] == h and c["cert"]["allowed"] is True
+    assert c["cert"]["decision"]["action"] == "deploy_canary"
+    assert httpx.get(f"{BASE}/ethics/cert/deadbeef").status_code == 404
+    time.sleep(1.5)
@@ -1,7 +1,44 @@
-import httpx
+import httpx, time
 BASE = "http://localhost:8000"
 def test_evolve_shadow_transition():
     r = httpx.post(f"{BASE}/evolve", params={"steps":2,"n_candidates":3,"auto":True,"force":True})
     assert r.status_code == 200
     data = r.json()
     assert data["state"]["mode"] == "shadow"
+
+def test_background_jobs_progress_and_cancel():
+    r = httpx.post(f"{BASE}/backpropamine/train", params={"steps": 20, "background": True})
+    assert r.status_code == 202 and r.headers["location"].startswith("/jobs/")
+    jid = r.json()["job"]["id"]
+    for _ in range(200):
+        j = httpx.get(f"{BASE}/jobs/{jid}").json()
+        if j["status"] == "succeeded":
+            break
+        time.sleep(0.05)
+    assert j["status"] == "succeeded" and j["result"]["steps"] == 20 and j["progress"] == 1.0
+
+    r = httpx.post(f"{BASE}/evolve", params={"steps": 100000, "auto": False, "background": True})
+    jid = r.json()["job"]["id"]
+    httpx.post(f"{BASE}/jobs/{jid}/cancel")
+    for _ in range(200):
+        j = httpx.get(f"{BASE}/jobs/{jid}").json()
+        if j["status"] == "cancelled":
+            break
+        time.sleep(0.05)
+    assert j["status"] == "cancelled" and j["cancel_requested"] is True
+    assert any(x["id"] == jid for x in httpx.get(f"{BASE}/jobs", params={"kind": "evolve"}).json()["jobs"])
+    assert httpx.get(f"{BASE}/jobs/nao-existe").status_code == 404
+
+def test_registry_slots_follow_promote_and_rollback():
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+    httpx.post(f"{BASE}/deploy/promote")
+    main = httpx.get(f"{BASE}/models/default").json()["slots"]["main"]["id"]
+    r = httpx.post(f"{BASE}/evolve", params={"steps": 3, "n_candidates": 3, "force": True}, timeout=60).json()
+    cand = httpx.get(f"{BASE}/deploy/status").json()["slots"]["shadow"]
+    assert r["state"]["mode"] == "shadow" and cand and cand != main
+    assert httpx.post(f"{BASE}/deploy/promote").json()["slots"] == {
+        "main": cand, "canary": None, "shadow": None, "previous": main}
+    slots = httpx.post(f"{BASE}/deploy/rollback").json()["slots"]  # desfaz a promoção: troca de ponteiro
+    assert slots["main"] == main and slots["shadow"] == cand
+    models = httpx.get(f"{BASE}/models").json()
+    assert {v["id"] for v in models["versions"]} >= {main, cand} and models["mapped"] >= 2
@@ -1,4 +1,5 @@
 import httpx, time
+import pytest
 
 BASE = "http://localhost:8000"
 
@@ -38,3 +39,169 @@ def test_stubs_endpoints():
     assert r.status_code == 200
     js = r.json()
     assert js["loss_end"] < js["loss_start"]
+
+def test_events_cursor():
+    last = httpx.get(f"{BASE}/events", params={"limit": 1}).json()
+    cursor = last[-1]["seq"] if last else -1
+    httpx.get(f"{BASE}/mode", params={"set": "shadow"})
+    httpx.get(f"{BASE}/mode", params={"set": "main"})
+    evts = httpx.get(f"{BASE}/events", params={"since_seq": cursor, "kind": "mode_set"}).json()
+    assert [e["new"] for e in evts] == ["shadow", "main"]
+    assert all(e["seq"] > cursor for e in evts)
+
+def test_events_stream_pushes_new_events():
+    with httpx.stream("GET", f"{BASE}/events/stream", params={"kind": "mode_set"}, timeout=5) as r:
+        assert r.status_code == 200
+        lines = r.iter_lines()
+        assert next(lines) == "event: ready"
+        httpx.get(f"{BASE}/mode", params={"set": "main"})
+        for line in lines:
+            if line.startswith("data:") and '"kind"' in line:
+                assert '"new": "main"' in line
+                break
+
+def test_latency_ingestion():
+    r = httpx.post(f"{BASE}/telemetry/latency", json=[20.0] * 50 + [40.0] * 50)
+    assert r.status_code == 200 and r.json()["recorded"] == 100
+    q = httpx.get(f"{BASE}/telemetry/latency").json()
+    assert q["count"] >= 100 and 15 < q["p50"] < 45
+
+def test_predictions_ingestion_ece():
+    body = "\n".join(["[1.0, 1]"] * 50 + ["[0.0, 0]"] * 50)  # calibração perfeita => ECE 0
+    r = httpx.post(f"{BASE}/telemetry/predictions", content=body,
+                   headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200 and r.json()["recorded"] == 100
+    st = httpx.get(f"{BASE}/telemetry/calibration").json()
+    assert st["count"] >= 100 and st["ece"] is not None
+    r = httpx.post(f"{BASE}/telemetry/predictions", json=[[0.9, 1, 7], [0.8, 0, 3]])
+    assert r.status_code == 400 and httpx.get(f"{BASE}/telemetry/calibration").json()["count"] == st["count"]
+
+def test_guard_history():
+    r = httpx.get(f"{BASE}/guard/history", params={"window_s": 600, "series": "vdot,lat95", "agg": "max"})
+    assert r.status_code == 200
+    j = r.json()
+    assert set(j["series"]) == {"vdot", "lat95"}
+    assert len(j["ts"]) >= 1 and len(j["series"]["vdot"]) == len(j["ts"])
+    assert httpx.get(f"{BASE}/guard/history", params={"agg": "p42"}).status_code == 400
+
+def test_metrics_cached_gzip_openmetrics_and_etag():
+    r1 = httpx.get(f"{BASE}/metrics", headers={"Accept-Encoding": "identity"})
+    assert r1.status_code == 200 and "lemnisiana_vdot" in r1.text
+    etag = r1.headers["etag"]
+    r304 = httpx.get(f"{BASE}/metrics", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert r304.status_code == 304 and not r304.content
+    gz = httpx.get(f"{BASE}/metrics", headers={"Accept-Encoding": "gzip"})
+    assert gz.headers["content-encoding"] == "gzip" and gz.text == r1.text  # httpx descomprime
+    om = httpx.get(f"{BASE}/metrics", headers={"Accept": "application/openmetrics-text; version=1.0.0"})
+    assert om.headers["content-type"].startswith("application/openmetrics-text") and om.text.endswith("# EOF\n")
+    httpx.post(f"{BASE}/guard/force", params={"cost_v": 4.25})
+    r2 = httpx.get(f"{BASE}/metrics", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert r2.status_code == 200 and "4.25" in r2.text  # gauge mudou => nova renderização
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+
+def test_startup_report():
+    j = httpx.get(f"{BASE}/startup").json()
+    names = [p["name"] for p in j["phases"]]
+    assert j["ready"] is True and j["ready_ms"] > 0
+    assert names[:5] == ["imports", "config", "metrics", "state", "routes"] and "startup" in names
+    assert j["config_cache"] in ("hit", "miss")
+    r = httpx.get(f"{BASE}/ready")  # servidor subido e loop de guarda ativo
+    assert r.status_code == 200 and r.json()["ready"] is True
+    assert r.json()["phases"][:len(names)] == names and "startup" in r.json()["phases"]
+
+def test_config_reload_endpoint():
+    cur = httpx.get(f"{BASE}/config").json()
+    assert cur["thresholds"]["oci_min"] == 0.6 and cur["sha256"]
+    r = httpx.post(f"{BASE}/config/reload")
+    assert r.status_code == 200 and r.json()["changed"] == []  # mesmo conteúdo: no-op
+    j = httpx.post(f"{BASE}/config/reload", params={"force": True}).json()
+    assert j["ok"] is True and j["restart_required"] == [] and j["sha256"] == cur["sha256"]
+    evts = httpx.get(f"{BASE}/events", params={"kind": "config_reload", "limit": 1}).json()
+    assert evts and evts[-1]["source"] == "endpoint"
+    assert httpx.get(f"{BASE}/guard/check").json()["all_green"] is True
+
+def test_budget_admission_and_cost_gauge():
+    before = httpx.get(f"{BASE}/budget").json()
+    r = httpx.post(f"{BASE}/backpropamine/train", params={"steps": 3}, timeout=30)
+    assert r.status_code == 200 and r.json()["budget"]["tokens"] > 0
+    after = httpx.get(f"{BASE}/budget").json()
+    assert after["admitted"] == before["admitted"] + 1 and after["memory"]["used_gb"] == 0
+    assert after["usd"]["spent_total"] > before["usd"]["spent_total"]
+    assert 3.5 <= after["cost_per_hour"] <= after["cost_max"]  # base + gasto medido, dentro do orçamento
+    assert httpx.get(f"{BASE}/guard/check").json()["cost_ok"] is True
+
+def test_predict_routes_canary_split_and_mirrors_shadow():
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+    httpx.post(f"{BASE}/evolve", params={"steps": 2, "n_candidates": 3, "force": True}, timeout=60)
+    x = {"x": [[0.1] * 12] * 5}
+    before = httpx.get(f"{BASE}/router").json()["shadow_queue"]["mirrored"]
+    r = httpx.post(f"{BASE}/predict", json=x, params={"key": "c1"})
+    assert r.status_code == 200 and r.json()["arm"] == "main" and len(r.json()["y"]) == 5
+    assert httpx.get(f"{BASE}/router").json()["shadow_queue"]["mirrored"] == before + 1
+    assert httpx.post(f"{BASE}/predict", json={"x": [[0.1] * 3]}).status_code == 400
+    assert httpx.post(f"{BASE}/predict", json={"x": [[0.1] * 12] * 10_000}).status_code == 413  # T > max_T
+    httpx.post(f"{BASE}/deploy/canary", params={"traffic": 0.5, "windows": 5, "window_seconds": 60})
+    arms, by_user = {}, {}
+    with httpx.Client() as c:
+        for i in range(60):
+            j = c.post(f"{BASE}/predict", json=x, headers={"X-Client-Id": f"user-{i}"}).json()
+            arms.setdefault(j["arm"], set()).add(j["version"])
+            by_user[i] = j["arm"]
+        again = c.post(f"{BASE}/predict", json=x, headers={"X-Client-Id": "user-7"}).json()["arm"]
+    assert set(arms) == {"main", "canary"} and arms["main"].isdisjoint(arms["canary"])
+    assert again == by_user[7] and httpx.get(f"{BASE}/guard/check").json()["arm_ok"] is True
+    httpx.post(f"{BASE}/deploy/rollback")
+
+def test_predict_concurrent_requests_are_micro_batched():
+    from concurrent.futures import ThreadPoolExecutor
+    httpx.post(f"{BASE}/guard/force", params={"reset": True})
+    x = {"x": [[0.2] * 12] * 7}
+    before = httpx.get(f"{BASE}/router").json()["batching"]
+    with httpx.Client(limits=httpx.Limits(max_connections=32)) as c, ThreadPoolExecutor(32) as ex:
+        rs = list(ex.map(lambda i: c.post(f"{BASE}/predict", json=x, params={"key": f"b{i}"}), range(128)))
+    assert all(r.status_code == 200 for r in rs)
+    assert len({str(r.json()["y"]) for r in rs if r.json()["arm"] == "main"}) == 1  # mesma entrada, mesma saída
+    after = httpx.get(f"{BASE}/router").json()["batching"]
+    assert after["items"] - before["items"] >= 128
+    assert after["batches"] - before["batches"] < 128  # pedidos em voo dividem forwards
+    assert after["window"]["batches"] >= 1 and "lemnisiana_predict_batch_size_mean" in httpx.get(f"{BASE}/metrics").text
+
+def test_snapshot_bundle_is_consistent_and_lemctl_dedups(tmp_path):
+    import json, os, subprocess, sys
+    from lemnisiana.orchestrator.snapshot import unpack_bundle
+    httpx.get(f"{BASE}/mode", params={"set": "shadow"})
+    r = httpx.get(f"{BASE}/snapshot", params={"events": 50})
+    assert r.status_code == 200 and r.headers["content-type"] == "application/gzip"
+    manifest, files = unpack_bundle(r.content)
+    assert {"state.json", "promotion.json", "guards.json", "metrics.txt", "events.json",
+            "config/default.yaml"} <= set(files)
+    assert json.loads(files["state.json"])["state"]["mode"] == "shadow"
+    assert manifest["config_sha256"] == httpx.get(f"{BASE}/config").json()["sha256"]
+    events = json.loads(files["events.json"])
+    assert len(events) <= 50 and events[-1]["seq"] == manifest["event_seq"]  # eventos e estado do mesmo instante
+    assert "lemnisiana_vdot" in files["metrics.txt"].decode()
+
+    script = os.path.join(os.path.dirname(__file__), "..", "..", "scripts", "lemctl.py")
+    env = {**os.environ, "LEM_BASE": BASE, "LEM_SNAPSHOTS": str(tmp_path / "snaps")}
+    run = lambda *a: subprocess.run([sys.executable, script, *a], env=env, capture_output=True, text=True, check=True)
+    for tag in ("c", "b", "a"):  # tags fora da ordem cronológica
+        run("snapshot", "--tag", tag)
+    assert json.loads(run("snapshots").stdout)["snapshots"] == ["a", "b", "c"]
+    refs = [json.loads((tmp_path / "snaps" / "refs" / f"{t}.json").read_text()) for t in "abc"]
+    assert len({ref["objects"]["config/default.yaml"] for ref in refs}) == 1  # config guardada uma vez
+    objs = lambda: sum(1 for _ in (tmp_path / "snaps" / "objects").glob("*/*"))
+    before = objs()
+    assert json.loads(run("prune", "--keep", "1").stdout)["objects_removed"] == 0  # carência: nada recente some
+    assert objs() == before
+    with pytest.raises(subprocess.CalledProcessError):
+        run("prune", "--keep", "-1")
+    out = json.loads(run("prune", "--keep", "1", "--grace-s", "0").stdout)
+    assert json.loads(run("snapshots").stdout)["snapshots"] == ["a"]  # o mais recente por created
+    assert objs() == out["objects_live"] == before - out["objects_removed"]
+    ref = json.loads((tmp_path / "snaps" / "refs" / "a.json").read_text())
+    ref["objects"]["config/../evil.yaml"] = ref["objects"]["config/default.yaml"]  # manifest malicioso
+    (tmp_path / "snaps" / "refs" / "evil.json").write_text(json.dumps(ref))
+    bad = subprocess.run([sys.executable, script, "restore", "--tag", "evil"], env=env, cwd=tmp_path,
+                         capture_output=True, text=True)
+    assert bad.returncode == 1 and "inválido" in bad.stderr
+    assert not (tmp_path / "evil.yaml").exists() and not (tmp_path / "configs").exists()
@@ -0,0 +1,66 @@
+import pytest
+from lemnisiana.orchestrator.backend import MemoryBackend, SQLiteBackend, LeaderElector, StateBackend, make_backend
+from lemnisiana.orchestrator.rollouts import RolloutScheduler, PROMOTED
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    b = MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "state.db"))
+    yield b
+    b.close()
+
+def test_cas_rejects_stale_version(backend):
+    assert backend.get("state") == (None, 0)
+    v1 = backend.cas("state", 0, {"mode": "main"})
+    assert v1 == 1 and backend.cas("state", 0, {"mode": "x"}) == 0
+    assert backend.cas("state", v1, {"mode": "canary"}) == 2
+    assert backend.get("state") == ({"mode": "canary"}, 2)
+    val, ver = backend.update("state", lambda cur: {**cur, "canary_traffic": 0.1})
+    assert ver == 3 and val == {"mode": "canary", "canary_traffic": 0.1}
+    assert backend.versions("sta") == {"state": 3}
+
+def test_events_and_leases(backend):
+    for i in range(3):
+        backend.append_event("r1", {"kind": "k", "i": i})
+    assert [e["i"] for _, _, e in backend.events_since(1)] == [1, 2]
+    assert backend.last_event_seq() == 3
+    assert backend.acquire("promotion", "a", ttl=10, now=0.0)
+    assert not backend.acquire("promotion", "b", ttl=10, now=5.0)
+    assert backend.acquire("promotion", "a", ttl=10, now=5.0)       # renovação
+    assert backend.acquire("promotion", "b", ttl=10, now=16.0)      # expirou
+    assert backend.holder("promotion", now=17.0) == "b"
+
+def test_exactly_one_leader_and_failover(tmp_path):
+    path = str(tmp_path / "state.db")
+    b1, b2 = SQLiteBackend(path), SQLiteBackend(path)  # duas "réplicas" no mesmo arquivo
+    e1, e2 = LeaderElector(b1, "promotion", "r1", ttl=5), LeaderElector(b2, "promotion", "r2", ttl=5)
+    assert e1.step(now=0.0) and not e2.step(now=1.0)
+    e1.resign()
+    assert e2.step(now=2.0) and not e1.step(now=3.0)
+
+def test_follower_scheduler_merges_leader_records():
+    leader = RolloutScheduler(check=lambda: True)
+    follower = RolloutScheduler(check=lambda: True, is_leader=lambda: False)
+    r = leader.start("m", 0.1, windows=2, window_seconds=5, now=0.0)
+    follower.merge([r.as_dict()])
+    assert follower.active("m").id == r.id
+    assert follower.tick(now=100.0) == 0 and follower.active("m").running  # follower não decide
+    leader.tick(now=5.0)
+    leader.tick(now=10.0)
+    assert r.status == PROMOTED
+    follower.merge([r.as_dict()])
+    assert follower.get(r.id).status == PROMOTED and follower.active("m") is None
+
+def test_make_backend_spec(tmp_path):
+    assert isinstance(make_backend(None, {}), MemoryBackend)
+    b = make_backend(f"sqlite:{tmp_path / 'x.db'}")
+    assert isinstance(b, SQLiteBackend) and b.shared
+    b.close()
+    with pytest.raises(ValueError):
+        make_backend("etcd")
+
+def test_incomplete_backend_fails_at_construction():
+    class Partial(StateBackend):
+        def get(self, key):
+            return None, 0
+    with pytest.raises(TypeError):
+        Partial()
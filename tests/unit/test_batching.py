@@ -0,0 +1,85 @@
+import threading
+import numpy as np
+import pytest
+from lemnisiana.adapters.NeuromodulatedNetwork import NeuromodulatedNetwork
+from lemnisiana.orchestrator.batching import BatcherPool, MicroBatcher, Overloaded, bucket_T
+
+def _net():
+    return NeuromodulatedNetwork(n_in=6, n_hidden=16, n_out=2, seq_len=5, seed=3)
+
+def test_concurrent_requests_coalesce_and_match_single_forward():
+    net, ref = _net(), _net()
+    xs = [np.random.default_rng(i).standard_normal((5, 6)).astype(np.float32) for i in range(48)]
+    sizes = []
+    b = MicroBatcher(net, T=5, max_batch=16, max_delay_ms=20, on_batch=lambda n, ms: sizes.append(n))
+    gate, futs = threading.Barrier(8), [None] * len(xs)
+    def client(k):
+        gate.wait()
+        for i in range(k, len(xs), 8):
+            futs[i] = b.submit(xs[i])
+    ts = [threading.Thread(target=client, args=(k,)) for k in range(8)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    ys = [f.result(timeout=5) for f in futs]
+    b.close()
+    assert sum(sizes) == 48 and max(sizes) > 1 and len(sizes) < 48
+    for x, y in zip(xs, ys):  # o lote não mistura episódios (traços plásticos são por linha)
+        np.testing.assert_allclose(y, ref.forward(x[None])[0], rtol=1e-5, atol=1e-6)
+
+def test_full_queue_is_overloaded_and_batch_sizes_do_not_realloc():
+    net = _net()
+    gate = threading.Event()
+    net_forward = net.forward
+    net.forward = lambda x: (gate.wait(2), net_forward(x))[1]
+    b = MicroBatcher(net, T=5, max_batch=2, max_delay_ms=0, max_queue=3)
+    x = np.zeros((5, 6), np.float32)
+    first = b.submit(x)  # o worker pega este e bloqueia no forward
+    for _ in range(50):
+        if not b._pending:
+            break
+        threading.Event().wait(0.005)
+    futs = [b.submit(x) for _ in range(3)]
+    with pytest.raises(Overloaded):
+        b.submit(x)
+    gate.set()
+    assert all(f.result(timeout=5).shape == (5, 2) for f in [first] + futs)
+    b.close()
+    full = net._full
+    for B in (1, 2, 1):  # lotes até a capacidade (max_batch) usam views
+        net_forward(np.zeros((B, 5, 6), np.float32))
+        assert net._full is full and net._h.shape == (5, B, 16)
+
+def test_pool_keys_by_version_and_length():
+    made = []
+    pool = BatcherPool(lambda vid: made.append(vid) or _net(), max_batch=4, max_delay_ms=1, max_batchers=2)
+    assert pool.peek("w-a", 5) is None and not made  # peek nunca monta a rede
+    for T in (5, 5, 7, 9):
+        assert pool.submit("w-a", np.zeros((T, 6), np.float32)).result(timeout=5).shape == (T, 2)
+    s = pool.stats()
+    assert made == ["w-a"] * 3 and s["batchers"] == 2 and s["items"] >= 2
+    assert pool.peek("w-a", 9) is pool.get("w-a", 9) and len(made) == 3
+    pool.close()
+
+def test_shorter_episodes_share_a_padded_bucket_and_match():
+    net, ref = _net(), _net()
+    assert [bucket_T(t, 20) for t in (1, 2, 3, 5, 16, 17, 20)] == [1, 2, 4, 8, 16, 20, 20]
+    b = MicroBatcher(net, T=8, max_batch=4, max_delay_ms=20)
+    xs = [np.random.default_rng(t).standard_normal((t, 6)).astype(np.float32) for t in (3, 5, 8)]
+    ys = [f.result(timeout=5) for f in [b.submit(x) for x in xs]]
+    for x, y in zip(xs, ys):  # zeros no fim do episódio não mudam os passos reais
+        np.testing.assert_allclose(y, ref.forward(x[None])[0], rtol=1e-5, atol=1e-6)
+    with pytest.raises(ValueError):
+        b.submit(np.zeros((9, 6), np.float32))
+    b.close()
+
+def test_bad_input_fails_its_futures_not_the_thread():
+    from concurrent.futures import Future
+    b = MicroBatcher(_net(), T=5, max_batch=4, max_delay_ms=1)
+    fut = Future()
+    with b._cv:  # entrada que não cabe no buffer (passou por fora da validação do submit)
+        b._pending.append((0.0, np.zeros((5, 3), np.float32), fut))
+        b._cv.notify()
+    with pytest.raises(ValueError):
+        fut.result(timeout=5)
+    assert b.submit(np.zeros((5, 6), np.float32)).result(timeout=5).shape == (5, 2) and b._thread.is_alive()
+    b.close()
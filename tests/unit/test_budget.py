@@ -0,0 +1,123 @@
+import threading, time
+import pytest
+from lemnisiana.orchestrator.budget import AdmissionController, BudgetExceeded, BudgetTimeout, TokenBucket
+
+PRICES = {"step": {"tokens": 10, "usd": 0.001}}
+
+def test_token_bucket_refill_and_debt():
+    b = TokenBucket(rate_per_s=10, capacity=20, now=0.0)
+    assert b.wait_time(20, 0.0) == 0.0
+    b.take(20, 0.0)
+    assert b.wait_time(5, 0.0) == pytest.approx(0.5)
+    assert b.wait_time(5, 0.5) == 0.0
+    b.take(50, 2.0)  # acima da capacidade: aceito com o balde cheio, fica em débito
+    assert b.level == pytest.approx(-30) and b.wait_time(1, 2.0) == pytest.approx(3.1)
+    b.refund(1000, 2.0)
+    assert b.level == 20
+
+def test_pay_as_you_go_throttles_instead_of_rejecting():
+    ctl = AdmissionController(tokens_per_min=600, usd_per_hour=1000, burst_s=1, max_wait_s=5, prices=PRICES)
+    g = ctl.admit("train")
+    t0 = time.monotonic()
+    for _ in range(3):
+        g.consume({"step": 1})  # 10 tokens/s, rajada de 10: o 2º e o 3º esperam ~1 s cada
+    assert time.monotonic() - t0 >= 1.8 and g.waited_s > 0 and ctl.throttled >= 2
+    g.release()
+    assert g.summary()["tokens"] == 30 and ctl.stats()["memory"]["used_gb"] == 0
+
+def test_sync_timeout_and_refund():
+    ctl = AdmissionController(tokens_per_min=60, usd_per_hour=1000, burst_s=1, max_wait_s=0.2, prices=PRICES)
+    with ctl.admit("x") as g:
+        g.consume({"step": 1})
+        with pytest.raises(BudgetTimeout) as e:
+            g.consume({"step": 1})
+        assert e.value.retry_after_s > 0 and ctl.timeouts == 1
+        g.refund({"step": 1})  # devolvido (ex.: cache) => disponível de novo na hora
+        g.consume({"step": 1})
+
+def test_memory_ledger_queues_fifo_and_rejects_impossible():
+    ctl = AdmissionController(gpu_mem_gb=2, mem_gb={"big": 2}, max_wait_s=5)
+    with pytest.raises(BudgetExceeded):
+        ctl.admit("huge", mem_gb=3)
+    first = ctl.admit("big")
+    got = []
+    t = threading.Thread(target=lambda: got.append(ctl.admit("big")))
+    t.start()
+    time.sleep(0.1)
+    assert not got and ctl.stats()["queue"] == 1
+    first.release()
+    t.join(2)
+    assert got and ctl.stats()["memory"]["reservations"] == {got[0].id: 2.0}
+
+def test_cancel_while_queued():
+    ctl = AdmissionController(gpu_mem_gb=1)
+    held = ctl.admit("a", mem_gb=1)
+    flag = threading.Event()
+    def check():
+        if flag.is_set():
+            raise KeyboardInterrupt  # qualquer exceção de check() sai da fila
+    errs = []
+    def waiter():
+        try:
+            ctl.admit("b", mem_gb=1, max_wait_s=None, check=check)
+        except KeyboardInterrupt:
+            errs.append("cancelled")
+    t = threading.Thread(target=waiter)
+    t.start()
+    flag.set()
+    t.join(2)
+    assert errs == ["cancelled"] and ctl.stats()["queue"] == 0
+    held.release()
+
+def test_spend_rate_stays_within_budget_and_reconfigure():
+    # orçamento 3.6 $/h acima da base 1 $/h; rajada 1 s, janela 10 s => taxa do balde = 2.6/3600 * 10/11
+    ctl = AdmissionController(usd_per_hour=3.6, baseline_usd_per_hour=1.0, burst_s=1, window_s=10,
+                              prices={"u": {"usd": 1e-4}})
+    assert ctl.cost_per_hour() == 1.0
+    assert ctl.dollars.rate == pytest.approx(2.6 / 3600 * 10 / 11)
+    g = ctl.admit("x")
+    g.consume({"u": 1})
+    assert ctl.cost_per_hour() == pytest.approx(1.0 + 1e-4 * 3600 / 10)
+    ctl.configure(usd_per_hour=7.2, baseline_usd_per_hour=1.0, burst_s=1, window_s=10, prices={"u": {"usd": 1e-4}})
+    assert ctl.dollars.rate == pytest.approx(6.2 / 3600 * 10 / 11) and ctl.meter.total_usd == pytest.approx(1e-4)
+
+def test_holder_can_pay_while_another_job_waits_for_memory():
+    ctl = AdmissionController(gpu_mem_gb=1, tokens_per_min=600, usd_per_hour=1000, burst_s=1, max_wait_s=5,
+                              prices=PRICES)
+    a = ctl.admit("a", mem_gb=1)
+    waiting = threading.Thread(target=lambda: ctl.admit("b", mem_gb=1, max_wait_s=3).release())
+    waiting.start()
+    time.sleep(0.05)
+    assert ctl.stats()["queues"] == {"memory": 1, "pay": 0, "memory_jobs": 0, "pay_jobs": 0}
+    t0 = time.monotonic()
+    a.consume({"step": 1})  # balde cheio: paga na hora, mesmo com B na fila de memória
+    a.consume({"step": 1})  # balde vazio: espera só o refill (~1 s), não o timeout de B
+    assert time.monotonic() - t0 < 1.5
+    a.release()
+    waiting.join(2)
+    assert not waiting.is_alive() and ctl.timeouts == 0
+
+def test_sync_call_is_not_stuck_behind_a_long_job_payment():
+    ctl = AdmissionController(tokens_per_min=600, usd_per_hour=1000, burst_s=10, max_wait_s=3, prices=PRICES)
+    stop = threading.Event()
+    def check():
+        if stop.is_set():
+            raise KeyboardInterrupt
+    job = ctl.admit("job", max_wait_s=None, check=check)
+    job.consume({"step": 10})  # esvazia o balde (capacidade 100 tokens)
+    def long_job():
+        try:
+            job.consume({"step": 10})  # precisa do balde cheio de novo: ~10 s na cabeça da fila
+        except KeyboardInterrupt:
+            pass
+    t = threading.Thread(target=long_job)
+    t.start()
+    time.sleep(0.05)
+    assert ctl.stats()["queues"]["pay_jobs"] == 1
+    t0 = time.monotonic()
+    with ctl.admit("propose") as g:
+        g.consume({"step": 1})  # 10 tokens: ~1 s de refill, bem antes do max_wait_s de 3 s
+    assert time.monotonic() - t0 < 2.0 and ctl.timeouts == 0
+    stop.set()
+    t.join(2)
+    job.release()
@@ -0,0 +1,73 @@
+import pytest
+from lemnisiana.orchestrator.config import ConfigError, load_config, validate_config
+from lemnisiana.orchestrator.startup import LazyModule, LazyObject, StartupTimer
+
+YAML = b"guards:\n  lyapunov: {vdot_max: 0.0}\n  autopoiesis: {oci_min: 0.6}\n"
+
+def test_validate_reports_every_problem():
+    with pytest.raises(ConfigError) as e:
+        validate_config({"guards": {"autopoiesis": {"oci_min": 2}},
+                         "promotion": {"sprt": {"p0": 0.3, "p1": 0.2}}})
+    probs = " ".join(e.value.problems)
+    assert "vdot_max: obrigatório" in probs and "oci_min" in probs and "p0 < p1" in probs
+
+def test_load_config_cache_hit_and_invalidation(tmp_path):
+    p = tmp_path / "c.yaml"
+    p.write_bytes(YAML)
+    st = {}
+    cfg = load_config(str(p), cache_dir=str(tmp_path / "cache"), stats=st)
+    assert st["cache"] == "miss" and cfg["guards"]["autopoiesis"]["oci_min"] == 0.6
+    assert load_config(str(p), cache_dir=str(tmp_path / "cache"), stats=st) == cfg and st["cache"] == "hit"
+    p.write_bytes(YAML.replace(b"0.6", b"0.7"))  # conteúdo novo => cache antigo ignorado
+    cfg = load_config(str(p), cache_dir=str(tmp_path / "cache"), stats=st)
+    assert st["cache"] == "miss" and cfg["guards"]["autopoiesis"]["oci_min"] == 0.7
+
+def test_startup_timer_and_lazy_module():
+    t = StartupTimer()
+    t.mark("a")
+    with t.phase("b"):
+        pass
+    assert not t.is_ready
+    t.ready()
+    rep = t.report()
+    assert [p["name"] for p in rep["phases"]] == ["a", "b"] and rep["ready"] and rep["ready_ms"] >= 0
+    m = LazyModule("json")
+    assert not m.loaded and m.dumps([1]) == "[1]" and m.loaded
+    built = []
+    o = LazyObject("lista", lambda: built.append(1) or [3, 1, 2])
+    assert not o.loaded and not built
+    assert o.index(1) == 1 and o.count(2) == 1 and built == [1] and o.loaded  # monta uma vez só
+
+def test_diff_paths_and_watcher(tmp_path):
+    from lemnisiana.orchestrator.config import ConfigWatcher, diff_paths
+    assert diff_paths({"a": {"b": 1, "c": 2}}, {"a": {"b": 1, "c": 3}, "d": 4}) == ["a.c", "d"]
+    p = tmp_path / "c.yaml"
+    p.write_bytes(YAML)
+    w = ConfigWatcher([str(p), str(tmp_path / "ausente.yaml")])
+    assert not w.changed()
+    tmp = tmp_path / "c.tmp"
+    tmp.write_bytes(YAML + b"\n")
+    tmp.replace(p)  # troca atômica também é detectada
+    assert w.changed() and not w.changed()
+
+def test_ethics_cfg_strict_rejects_instead_of_defaulting(tmp_path):
+    from lemnisiana.orchestrator.ethics_gate import DEFAULT_CFG, load_ethics_cfg
+    p = tmp_path / "ethics.yaml"
+    p.write_text("ethics:\n  tau_E: 0.9\n")
+    assert load_ethics_cfg(str(p), strict=True)["tau_E"] == 0.9
+    for bad in ("ethics: [tau_E: 0.9", "ethics:\n  tau_E: alto\n", "- 1\n- 2\n", "ethics: 3\n"):
+        p.write_text(bad)
+        assert load_ethics_cfg(str(p)) == DEFAULT_CFG  # leitura tolerante (startup) segue igual
+        with pytest.raises(ValueError):
+            load_ethics_cfg(str(p), strict=True)
+    missing = str(tmp_path / "nope.yaml")
+    assert load_ethics_cfg(missing, strict=True) == DEFAULT_CFG
+    with pytest.raises(ValueError):
+        load_ethics_cfg(missing, strict=True, missing_ok=False)
+
+def test_load_config_rejects_values_json_cannot_cache(tmp_path):
+    p = tmp_path / "c.yaml"
+    p.write_bytes(YAML + b"\nreleased: 2024-01-01\n")  # data do YAML: o hit do cache devolveria str
+    with pytest.raises(ConfigError):
+        load_config(str(p), cache_dir=str(tmp_path / "cache"))
+    assert not (tmp_path / "cache").exists()  # nada gravado
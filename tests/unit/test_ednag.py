@@ -0,0 +1,37 @@
+from lemnisiana.adapters.ArchitectureGenerator import ArchitectureGenerator
+from lemnisiana.modules.ednag.search import EDNAGSearch, arch_hash, evaluate, LAYER_SPACE
+
+def _valid(layers, max_depth):
+    return 1 <= len(layers) <= max_depth and all(
+        l["type"] in LAYER_SPACE and all(l[p] in v for p, v in LAYER_SPACE[l["type"]].items()) for l in layers)
+
+def test_fitness_is_deterministic_per_architecture():
+    a = [{"type": "conv", "k": 3, "c": 64}, {"type": "mlp", "d": 256}]
+    assert evaluate(a) == evaluate([dict(reversed(list(l.items()))) for l in a])
+    assert arch_hash(a) == evaluate(a)["hash"]
+    assert 0.0 <= evaluate(a)["fitness"] <= 1.0
+    assert evaluate([{"type": "norm"}])["expressivity"] == 0.0  # sem ReLU não há códigos
+
+def test_evolution_improves_and_keeps_valid_population():
+    s: ArchitectureGenerator = EDNAGSearch(population=16, offspring=32, max_depth=5, seed=3)
+    first = s.propose(1)[0]["fitness"]
+    s.evolve(4)
+    best = s.best(3)
+    assert best[0]["fitness"] >= first and len({c["arch_id"] for c in s.population}) == len(s.population) == 16
+    assert all(_valid(c["layers"], 5) for c in s.population)
+    assert s.status()["generation"] == 6 and s.status()["evaluations"] > 16
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = str(tmp_path / "ednag.json")
+    a = EDNAGSearch(population=8, offspring=8, seed=5, checkpoint_path=path)
+    a.evolve(2)
+    b = EDNAGSearch(population=8, offspring=8, seed=5, checkpoint_path=path)  # retoma do arquivo
+    assert b.generation == 2 and b.population == a.population
+    assert a.evolve(1)["best_fitness"] == b.evolve(1)["best_fitness"]  # mesmo estado do RNG
+
+def test_case_variants_share_hash_and_fitness():
+    a = [{"type": "conv", "k": 3, "c": 64}, {"type": "mlp", "d": 256}]
+    b = [{"type": "Conv", "k": 3.0, "c": 64}, {"type": "MLP", "d": 256}]
+    assert evaluate(b) == evaluate(a) and evaluate(b)["expressivity"] > 0
+    s = EDNAGSearch(population=4, seed=0)
+    assert s.evaluate_many([b, a]) == [evaluate(a)] * 2 and s.evaluations == 1
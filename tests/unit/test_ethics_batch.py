@@ -0,0 +1,31 @@
+import random
+from lemnisiana.orchestrator.ethics_gate import (
+    DEFAULT_CFG, BATCH_DEFAULTS, BATCH_REASONS, ethics_gate, ethics_gate_batch,
+)
+
+def _rows(n, seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        r = dict(BATCH_DEFAULTS)
+        for k in rnd.sample(sorted(r), 3):  # perturba algumas métricas por linha
+            if isinstance(r[k], bool):
+                r[k] = rnd.random() < 0.5
+            else:
+                r[k] = r[k] + rnd.uniform(-0.1, 0.1)
+        rows.append(r)
+    return rows
+
+def test_batch_matches_scalar_gate():
+    rows = _rows(2000)
+    cols = {k: [r[k] for r in rows] for k in BATCH_DEFAULTS}
+    allowed, codes = ethics_gate_batch(cols, DEFAULT_CFG)
+    for i, r in enumerate(rows):
+        ok, reason = ethics_gate({}, r, DEFAULT_CFG)
+        assert allowed[i] == ok
+        assert BATCH_REASONS[codes[i]] == reason
+
+def test_batch_missing_columns_use_defaults():
+    allowed, codes = ethics_gate_batch({"dV": [-0.01, 0.2], "attested": [False, True]}, DEFAULT_CFG)
+    assert allowed.tolist() == [False, False]
+    assert [BATCH_REASONS[c] for c in codes] == ["Unattested", "Lyapunov>0"]
@@ -0,0 +1,63 @@
+from lemnisiana.orchestrator import ethics_rules
+from lemnisiana.orchestrator.ethics_rules import GATE_RULES, SNAPSHOT_RULES, CompiledGate, compiled_gate
+from lemnisiana.orchestrator.ethics_gate import DEFAULT_CFG, BATCH_DEFAULTS, ethics_gate as gate_metrics
+from lemnisiana.orchestrator import ethics
+
+def test_metrics_gate_precedence():
+    m = dict(BATCH_DEFAULTS)
+    assert gate_metrics({}, m, DEFAULT_CFG) == (True, "")
+    assert gate_metrics({}, {**m, "dV": 0.1, "E": 0.1}, DEFAULT_CFG) == (False, "Invariant(E/AI/G)")
+    assert gate_metrics({}, {**m, "dV": 0.1, "rho": 2.0}, DEFAULT_CFG) == (False, "Lyapunov>0")
+    assert gate_metrics({}, {k: v for k, v in m.items() if k != "attested"}, DEFAULT_CFG) == (False, "Unattested")
+
+def test_snapshot_gate_reasons_and_cert():
+    ok, reason, cert = ethics.ethics_gate({}, {"overrides": {"love_cost": 0.0}})
+    assert (ok, reason, cert["reason"]) == (False, "No sacrificial cost", "NoSacrificialCost")
+    ok, reason, _ = ethics.ethics_gate({}, {"overrides": {"vdot": 0.2, "risk": 1.0}})
+    assert (ok, reason) == (False, "Invariant")
+    ok, reason, _ = ethics.ethics_gate({"delta_U_all_nonneg": True}, {})
+    assert (ok, reason) == (True, "GoodDuty")
+
+def test_counters_and_reorder_keep_results():
+    g = CompiledGate(GATE_RULES, DEFAULT_CFG)
+    base = dict(BATCH_DEFAULTS)
+    rows = [base] * 5 + [{**base, "G": 0.1}] * 3 + [{**base, "E": 0.1}]
+    before = [g(r) for r in rows]
+    st = g.stats()
+    assert st["calls"] == 9 and st["allowed"] == 5
+    by_check = {c["check"]: c for c in st["checks"]}
+    assert by_check["G < g_min"]["failed"] == 3
+    assert by_check["G < g_min"]["evaluated"] == 8
+    g.reorder()
+    assert [c["check"] for c in g.stats()["checks"]][1] == "G < g_min"
+    assert [g(r) for r in rows] == before
+
+def test_snapshot_rules_attr_access():
+    g = CompiledGate(SNAPSHOT_RULES, ethics.default_cfg(), access="attr")
+    assert g(ethics.measure_ethics({})) == -1
+
+def test_certificates_are_content_addressed():
+    store = ethics.CertStore(capacity=2)
+    g = ethics.get_gate()
+    s1 = ethics.measure_ethics({})
+    s2 = ethics.measure_ethics({})
+    h1 = store.put({"a": 1, "b": 2}, s1, True, "Allow", g.assumptions_hash)
+    h2 = store.put({"b": 2, "a": 1}, s2, True, "Allow", g.assumptions_hash)
+    assert h1 == h2 and len(store) == 1
+    entry = store.get(h1)
+    assert entry["hits"] == 2 and entry["cert"]["assumptions_hash"] == g.assumptions_hash
+    assert "ts" not in entry["cert"]["ethics"]
+    # thresholds diferentes => assumptions_hash e certificado diferentes
+    other = ethics.get_gate({**ethics.default_cfg(), "tau_E": 0.9})
+    assert other.assumptions_hash != g.assumptions_hash
+    store.put({}, s1, True, "Allow", other.assumptions_hash)
+    store.put({}, s1, False, "Risk>0", g.assumptions_hash)
+    assert len(store) == 2 and store.get(h1) is None
+
+def test_compiled_gate_cache_is_bounded_across_reloads():
+    first = compiled_gate(GATE_RULES, {**DEFAULT_CFG, "tau_E": 0.0})
+    assert compiled_gate(GATE_RULES, {**DEFAULT_CFG, "tau_E": 0.0}) is first
+    for i in range(1, 50):  # cada reload com thresholds novos
+        compiled_gate(GATE_RULES, {**DEFAULT_CFG, "tau_E": i / 100})
+    assert len(ethics_rules._GATES) <= ethics_rules._GATES_MAX
+    assert compiled_gate(GATE_RULES, {**DEFAULT_CFG, "tau_E": 0.0}) is not first  # o antigo saiu do cache
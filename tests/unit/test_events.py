@@ -0,0 +1,38 @@
+from lemnisiana.orchestrator.events import EventLog
+
+def _fill(log, n):
+    for i in range(n):
+        log.append({"ts": float(i), "kind": "promote" if i % 3 == 0 else "mode_set", "i": i})
+
+def test_ring_buffer_keeps_last_capacity():
+    log = EventLog(capacity=10)
+    _fill(log, 25)
+    assert len(log) == 10
+    assert [e["seq"] for e in log] == list(range(15, 25))
+    assert [e["i"] for e in log.tail(3)] == [22, 23, 24]
+
+def test_query_cursors():
+    log = EventLog(capacity=100)
+    _fill(log, 30)
+    page = log.query(since_seq=9, limit=5)
+    assert [e["seq"] for e in page] == [10, 11, 12, 13, 14]
+    promos = log.query(kind="promote", since_seq=10, limit=100)
+    assert [e["seq"] for e in promos] == [12, 15, 18, 21, 24, 27]
+    assert [e["seq"] for e in log.query(until_ts=4.0, limit=2)] == [3, 4]
+    assert log.query(kind="unknown") == []
+
+def test_kind_index_evicts_with_ring():
+    log = EventLog(capacity=5)
+    _fill(log, 12)
+    assert [e["seq"] for e in log.query(kind="promote", limit=50)] == [9]
+    assert log.kinds() == {"promote": 1, "mode_set": 4}
+
+def test_remote_events_keep_ts_ordered_for_until_ts():
+    log = EventLog(capacity=10)
+    log.append({"ts": 100.0, "kind": "a"})
+    late = log.append_remote({"ts": 50.0, "kind": "b"}, origin_seq=7, now=101.0)
+    assert late["ts"] == 101.0 and late["origin_ts"] == 50.0 and late["origin_seq"] == 7
+    assert log.append_remote({"ts": 60.0, "kind": "b"}, now=99.0)["ts"] == 101.0  # relógio para trás
+    log.append({"ts": 102.0, "kind": "a"})
+    assert [e["seq"] for e in log.query(until_ts=101.0)] == [0, 1, 2]
+    assert [e["seq"] for e in log.query(until_ts=100.5)] == [0]
@@ -0,0 +1,23 @@
+import gzip
+from prometheus_client import CollectorRegistry, Gauge
+from lemnisiana.orchestrator.exposition import ExpositionCache, accepts_gzip, etag_matches
+
+def test_renders_once_per_version_and_format():
+    reg = CollectorRegistry()
+    g = Gauge("x", "x", registry=reg)
+    ver = [0]
+    cache = ExpositionCache(lambda: reg, version=lambda: ver[0])
+    a = cache.get("")
+    assert cache.get("text/plain") is a and cache.renders == 1 and cache.hits == 1
+    om = cache.get("application/openmetrics-text")
+    assert om.content_type.startswith("application/openmetrics-text") and cache.renders == 2
+    g.set(3)
+    assert cache.get("") is a  # sem nova versão, serve o cache
+    ver[0] += 1
+    b = cache.get("")
+    assert b is not a and b"x 3.0" in b.body and b.etag != a.etag
+    assert gzip.decompress(b.gzipped()) == b.body
+
+def test_negotiation_helpers():
+    assert accepts_gzip("br, gzip;q=0.8") and not accepts_gzip("gzip;q=0") and not accepts_gzip(None)
+    assert etag_matches('W/"abc", "def"', "def") and etag_matches("*", "x") and not etag_matches('"abc"', "ab")
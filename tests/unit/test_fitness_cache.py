@@ -0,0 +1,33 @@
+from lemnisiana.modules.ednag.cache import FitnessCache
+from lemnisiana.modules.ednag.search import EDNAGSearch, arch_hash
+from lemnisiana.modules.ednag.stub import propose
+
+def test_canonical_hash_ignores_key_order_and_float_ints():
+    a = [{"type": "conv", "k": 3, "c": 32}, {"type": "attn", "h": 4}]
+    b = [{"c": 32.0, "k": 3, "type": "CONV"}, {"h": 4, "type": "attn"}]
+    assert arch_hash(a) == arch_hash(b) != arch_hash(a[::-1])
+    ids = {c["arch_id"] for c in propose(3)}
+    assert ids == {f"arch-{arch_hash(a)}"}  # mesmo layers => mesmo id no stub
+
+def test_two_tiers_and_lru_eviction(tmp_path):
+    path = str(tmp_path / "fit.db")
+    c = FitnessCache(path, context="x", max_entries=3, hot_entries=2)
+    c.put_many({"a": {"fitness": 1}, "b": {"fitness": 2}})
+    c.put_many({"c": {"fitness": 3}})
+    assert c.get_many(["a"]) == {"a": {"fitness": 1}} and c.hits_disk == 1  # "a" saiu da camada quente
+    c.put_many({"d": {"fitness": 4}})  # excede 3: sai o de acesso mais antigo ("b")
+    assert len(c) == 3 and c.evictions == 1
+    c2 = FitnessCache(path, context="x")  # persiste entre instâncias/processos
+    assert set(c2.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"} and c2.misses == 1
+    assert FitnessCache(path, context="y").get_many(["a"]) == {}  # outro contexto de avaliação
+    c.close(); c2.close()
+
+def test_search_skips_seen_architectures(tmp_path):
+    cache = FitnessCache(str(tmp_path / "fit.db"), context=EDNAGSearch(seed=2).eval_context)
+    s = EDNAGSearch(population=16, offspring=32, seed=2, cache=cache)
+    s.evolve(3)
+    n = s.evaluations
+    again = EDNAGSearch(population=16, offspring=32, seed=2, cache=FitnessCache(cache.path, context=cache.context))
+    again.evolve(3)  # mesma trajetória: tudo vem do cache persistente
+    assert again.evaluations == 0 and again.cache_hits > 0 and again.population == s.population
+    assert n == len(cache)
@@ -0,0 +1,67 @@
+import threading, time
+import pytest
+from lemnisiana.orchestrator.jobs import JobManager, QueueFull, NO_JOB, CANCELLED, FAILED, SUCCEEDED
+
+def _wait(job, timeout=5.0):
+    t0 = time.time()
+    while job.status not in (SUCCEEDED, FAILED, CANCELLED) and time.time() - t0 < timeout:
+        time.sleep(0.01)
+    return job.status
+
+def test_progress_partial_and_result():
+    seen = []
+    m = JobManager(max_workers=2, publish_interval_s=0.0, on_change=lambda j: seen.append(j.status))
+    def work(ctx):
+        for i in range(5):
+            ctx.progress(i + 1, 5, {"i": i})
+        return {"ok": True}
+    job = m.submit("t", work, {"n": 5})
+    assert _wait(job) == SUCCEEDED and job.result == {"ok": True} and job.partial == {"i": 4}
+    assert job.as_dict()["progress"] == 1.0 and seen[0] == "queued" and seen[-1] == SUCCEEDED
+    assert m.submit("t", lambda ctx: 1 / 0) and _wait(m.list(status=None)[-1]) == FAILED
+
+def test_cancel_running_and_queued_and_queue_bound():
+    gate = threading.Event()
+    m = JobManager(max_workers=1, max_queued=1)
+    def slow(ctx):
+        while True:
+            ctx.check()
+            gate.wait(0.01)
+    running = m.submit("slow", slow)
+    while running.status != "running":
+        time.sleep(0.01)
+    queued = m.submit("slow", slow)
+    with pytest.raises(QueueFull):
+        m.submit("slow", slow)
+    assert m.cancel(queued.id).status == CANCELLED  # ainda na fila: cancelado na hora
+    m.cancel(running.id)
+    assert _wait(running) == CANCELLED
+    NO_JOB.progress(1, 2)  # contexto nulo (execução síncrona) é no-op
+    m.shutdown()
+
+def test_ttl_and_history_eviction():
+    evicted = []
+    m = JobManager(ttl_s=10.0, history=2, on_evict=evicted.extend)
+    jobs = [m.submit("t", lambda ctx: {}) for _ in range(3)]
+    for j in jobs:
+        _wait(j)
+    assert [j.id for j in m.list()] == [j.id for j in jobs[1:]] and evicted == [jobs[0].id]
+    jobs[1].finished_ts -= 60  # além do TTL
+    assert m.get(jobs[1].id) is None and m.stats()["evicted"] == 2
+
+def test_job_waiting_for_shared_lock_is_queued_and_cancellable():
+    lock, seen = threading.RLock(), []
+    m = JobManager(max_workers=2, on_change=lambda j: seen.append(j.status))
+    def work(ctx):
+        with ctx.acquire(lock, poll_s=0.01):
+            return "ok"
+    lock.acquire()
+    waiting = m.submit("w", work)
+    time.sleep(0.1)
+    assert waiting.status == "queued" and waiting.started_ts is not None  # esperando o recurso, não rodando
+    m.cancel(waiting.id)
+    assert _wait(waiting) == CANCELLED
+    job = m.submit("w", work)
+    time.sleep(0.05)
+    lock.release()
+    assert _wait(job) == SUCCEEDED and job.result == "ok" and "running" in seen
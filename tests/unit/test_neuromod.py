@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+from lemnisiana.adapters.NeuromodulatedNetwork import NeuromodulatedNetwork
+from lemnisiana.modules.backpropamine.trainer import BackpropamineTrainer
+
+def test_gradients_match_finite_differences():
+    net = NeuromodulatedNetwork(n_hidden=16, seq_len=6, seed=1)
+    net.params["alpha"][:] = 0.3  # traço relevante para o gradiente
+    x, y = net.episodes([1, 2, 3])
+    net.forward(x)
+    net.backward(y)
+    rng = np.random.default_rng(0)
+    for k, p in net.params.items():
+        idx = tuple(int(rng.integers(0, s)) for s in p.shape)
+        old, e = float(p[idx]), 1e-2
+        p[idx] = old + e; lp = net.loss((x, y))
+        p[idx] = old - e; lm = net.loss((x, y))
+        p[idx] = old
+        num = (lp - lm) / (2 * e)
+        assert abs(net.grads[k][idx] - num) <= 2e-3 + 0.05 * abs(num), k
+
+def test_train_step_reuses_buffers_and_learns():
+    net = NeuromodulatedNetwork(seed=0)
+    first = net.train_step(list(range(32)))
+    buf = net._hebb
+    for i in range(1, 40):
+        out = net.train_step(list(range(32 * i, 32 * (i + 1))))
+    assert net._hebb is buf and net._hebb.dtype == np.float32  # sem realocação entre passos
+    assert out["stable"] and out["loss"] < first["loss"]
+
+def test_trainer_reports_eval_losses_and_throughput():
+    tr = BackpropamineTrainer(NeuromodulatedNetwork(seed=0), batch_size=16, eval_episodes=16)
+    r = tr.train(30)
+    assert r["loss_end"] < r["loss_start"] and r["stable"] and r["episodes_per_s"] > 0
+    assert tr.train(1)["total_steps"] == 31
+
+def test_train_with_weights_returns_the_trained_and_evaluated_net():
+    tr = BackpropamineTrainer(NeuromodulatedNetwork(n_hidden=16, seed=0), batch_size=8, eval_episodes=8)
+    r, (params, config) = tr.train(5, with_weights=True)
+    net = NeuromodulatedNetwork.from_weights(params, config)
+    assert net.loss(tr.eval_ids) == pytest.approx(r["loss_end"], abs=1e-4)
+    tr.train(3)  # execução seguinte troca a rede: a cópia devolvida não muda
+    assert NeuromodulatedNetwork.from_weights(params, config).loss(tr.eval_ids) == pytest.approx(r["loss_end"], abs=1e-4)
+
+def test_fresh_runs_train_private_nets_in_parallel():
+    import threading
+    tr = BackpropamineTrainer(NeuromodulatedNetwork(n_hidden=16, seed=0), batch_size=8, eval_episodes=8)
+    before = {k: v.copy() for k, v in tr.net.params.items()}
+    out = []
+    ts = [threading.Thread(target=lambda: out.append(tr.train(4))) for _ in range(3)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    assert sorted(r["run"] for r in out) == [1, 2, 3] and tr.train(1)["total_steps"] == 13
+    assert all(np.array_equal(before[k], v) for k, v in tr.net.params.items())  # rede compartilhada intacta
+    tr.adopt(*tr.train(2, with_weights=True)[1])
+    assert tr.train(1, resume=True)["run"] == 6
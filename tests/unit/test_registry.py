@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pytest
+from lemnisiana.adapters.NeuromodulatedNetwork import NeuromodulatedNetwork
+from lemnisiana.orchestrator.registry import MappedWeights, ModelRegistry
+
+def _net(seed):
+    return NeuromodulatedNetwork(n_hidden=8, seq_len=5, seed=seed)
+
+def test_publish_is_content_addressed_and_mapped_read_only(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    net = _net(0)
+    vid = reg.publish(net.params, net.config(), {"source": "t"})
+    assert reg.publish(net.params, net.config()) == vid and len(reg.versions()) == 1
+    w = reg.get(vid)
+    assert reg.get(vid) is w and w.meta["source"] == "t" and w.meta["config"]["n_hidden"] == 8
+    for k, a in net.params.items():
+        np.testing.assert_array_equal(w.arrays[k], a)
+        assert not w.arrays[k].flags.writeable and w.arrays[k].ctypes.data % 64 == 0
+    other = MappedWeights(w.path)  # outro "processo": mesmo arquivo, mesmas páginas
+    np.testing.assert_array_equal(other.arrays["W"], w.arrays["W"])
+    served = NeuromodulatedNetwork.from_weights(w.arrays, w.meta["config"])
+    assert served.loss(range(4)) == pytest.approx(net.loss(range(4)))
+    with pytest.raises(ValueError):
+        served.train_step(range(4))  # views do mmap são somente leitura
+    NeuromodulatedNetwork.from_weights(w.arrays, w.meta["config"], copy=True).train_step(range(4))
+
+def test_slot_swaps_promote_and_rollback(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    v1, v2 = (reg.publish(n.params, n.config()) for n in (_net(1), _net(2)))
+    reg.ensure_main("m", v1)
+    reg.stage("m", v2)
+    assert reg.start_canary("m") == {"main": v1, "canary": v2, "shadow": None, "previous": None}
+    assert reg.rollback("m")["shadow"] == v2  # canário reprovado volta a shadow
+    reg.start_canary("m")
+    assert reg.promote("m") == {"main": v2, "canary": None, "shadow": None, "previous": v1}
+    for v in reg.versions():  # nada é relido do disco no rollback: os pesos já estão mapeados
+        os.unlink(os.path.join(str(tmp_path), v["id"] + ".lnw"))
+    assert reg.rollback("m") == {"main": v2, "canary": None, "shadow": None, "previous": v1}
+    slots = reg.rollback("m", demote_main=True)
+    assert slots == {"main": v1, "canary": None, "shadow": v2, "previous": None}
+    np.testing.assert_array_equal(reg.weights("m").arrays["W"], _net(1).params["W"])
+
+def test_gc_keeps_referenced_versions(tmp_path):
+    reg = ModelRegistry(str(tmp_path), keep=1)
+    ids = [reg.publish(_net(0).params, _net(0).config())]
+    reg.ensure_main("m", ids[0])
+    ids += [reg.publish(n.params, n.config()) for n in (_net(s) for s in range(1, 4))]
+    assert {v["id"] for v in reg.versions()} >= {ids[0], ids[3]}  # a recém-publicada nunca é coletada
+    reg.gc()
+    left = {v["id"] for v in reg.versions()}
+    assert ids[0] in left and len(left) == 2
+
+def test_has_model_and_version(tmp_path):
+    reg = ModelRegistry(str(tmp_path))
+    vid = reg.publish({"w": np.ones(4, np.float32)}, {"n": 4})
+    assert reg.has_version(vid) and not reg.has_version("w-0000000000000000") and not reg.has_version("../x")
+    assert not reg.has_model("m")
+    reg.ensure_main("m", vid)
+    assert reg.has_model("m") and not reg.has_model("other")
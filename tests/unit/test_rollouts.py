@@ -0,0 +1,100 @@
+import pytest
+from lemnisiana.orchestrator.rollouts import RolloutScheduler, SPRT, PROMOTED, ROLLED_BACK, CANCELLED
+
+def _sched(green):
+    finished = []
+    s = RolloutScheduler(check=lambda: green[0], on_finish=finished.append)
+    return s, finished
+
+def test_many_rollouts_share_one_guard_check_per_tick():
+    green = [True]
+    s, finished = _sched(green)
+    for i in range(1000):
+        s.start(f"m{i}", traffic=0.1, windows=2, window_seconds=10, now=0.0)
+    assert len(s) == 1000 and s.next_due() == 10.0
+    assert s.tick(now=10.0) == 1000
+    assert s.checks == 1 and not finished
+    s.tick(now=20.0)
+    assert s.checks == 2 and len(finished) == 1000
+    assert all(r.status == PROMOTED for r in finished) and len(s) == 0
+
+def test_guard_failure_rolls_back_only_due_rollouts():
+    green = [True]
+    s, finished = _sched(green)
+    a = s.start("a", 0.1, windows=3, window_seconds=5, now=0.0)
+    b = s.start("b", 0.1, windows=3, window_seconds=50, now=0.0)
+    green[0] = False
+    s.tick(now=5.0)
+    assert a.status == ROLLED_BACK and a.fail_reason == "guard_failed"
+    assert b.running
+
+def test_one_rollout_per_model_and_cancel():
+    s, finished = _sched([True])
+    r = s.start("a", 0.1, windows=1, window_seconds=5, now=0.0)
+    with pytest.raises(ValueError):
+        s.start("a", 0.2, windows=1, window_seconds=5, now=0.0)
+    s.cancel(r.id, reason="manual")
+    assert r.status == CANCELLED and finished == [r]
+    assert s.tick(now=10.0) == 0  # entrada obsoleta no heap é descartada
+    s.start("a", 0.2, windows=1, window_seconds=5, now=0.0)
+
+def test_red_sample_rolls_back_all_before_window_ends():
+    s, finished = _sched([True])
+    a = s.start("a", 0.1, windows=3, window_seconds=60, now=0.0)
+    b = s.start("b", 0.1, windows=3, window_seconds=600, now=0.0)
+    assert s.observe(True, now=1.0) == 0
+    assert s.observe(False, now=2.0) == 2
+    assert {a.status, b.status} == {ROLLED_BACK} and a.early and b.early
+    assert s.checks == 0 and s.next_due() is None  # nenhuma janela precisou vencer
+
+def _arm(counts):
+    # contador acumulado (requisições, erros) por modelo; amostra a cada 10 requisições novas
+    def verdict(model, mark):
+        n, err = counts.get(model, (0, 0))
+        if mark is None:
+            return None, [n, err]
+        if n - mark[0] < 10:
+            return None, mark
+        return (err - mark[1]) / (n - mark[0]) <= 0.1, [n, err]
+    return verdict
+
+def test_sprt_promotes_early_only_when_enabled():
+    counts = {}
+    s = RolloutScheduler(check=lambda: True, arm_verdict=_arm(counts))
+    t = SPRT(p0=0.01, p1=0.2, alpha=0.05, beta=0.05, min_samples=5)
+    s.sprt = t
+    fast = s.start("fast", 0.1, windows=20, window_seconds=60, now=0.0, sprt=True)
+    slow = s.start("slow", 0.1, windows=20, window_seconds=60, now=0.0)
+    s.observe(True, now=0.0)  # marca o ponto de partida do braço
+    need = t.samples_to_promote()
+    for i in range(need - 1):
+        counts["fast"] = (10 * (i + 1), 0)
+        s.observe(True, now=float(i + 1))
+    assert fast.running and fast.samples == need - 1
+    counts["fast"] = (10 * need, 0)
+    s.observe(True, now=float(need))
+    assert fast.status == PROMOTED and fast.early and fast.samples == need
+    assert slow.running and slow.samples == 0  # sem SPRT não acumula amostras
+
+def test_sprt_needs_canary_traffic_and_rejects_on_errors():
+    counts = {}
+    s = RolloutScheduler(check=lambda: True, arm_verdict=_arm(counts))
+    idle = s.start("idle", 0.1, windows=20, window_seconds=60, now=0.0, sprt=True)
+    bad = s.start("bad", 0.1, windows=20, window_seconds=60, now=0.0, sprt=True)
+    for i in range(100):  # ticks verdes da plataforma, sem requisições no canário de idle
+        counts["bad"] = (10 * i, 5 * i)
+        s.observe(True, now=float(i))
+    assert idle.running and idle.samples == 0 and idle.llr == 0.0
+    assert bad.status == ROLLED_BACK and bad.fail_reason == "sprt_reject" and bad.early
+
+def test_model_check_rolls_back_only_that_model():
+    bad = {"x"}
+    finished = []
+    s = RolloutScheduler(check=lambda: True, model_check=lambda m: m not in bad, on_finish=finished.append)
+    x = s.start("x", 0.1, windows=2, window_seconds=60, now=0.0)
+    y = s.start("y", 0.1, windows=2, window_seconds=60, now=0.0)
+    assert s.observe(True, now=1.0) == 1  # amostra verde da plataforma, candidato de x vermelho
+    assert x.status == ROLLED_BACK and x.early and y.running
+    s.tick(now=60.0)
+    s.tick(now=120.0)
+    assert y.status == PROMOTED and finished == [x, y]
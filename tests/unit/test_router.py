@@ -0,0 +1,67 @@
+import threading, time
+import pytest
+from lemnisiana.orchestrator.router import ARMS, ArmStats, TrafficRouter, bucket
+
+def _router(**kw):
+    return TrafficRouter({"default": {a: ArmStats(window_s=60, slots=6) for a in ARMS}}, **kw)
+
+def test_split_is_sticky_monotone_and_matches_traffic():
+    r = _router()
+    keys = [f"client-{i}" for i in range(20000)]
+    at10 = {k for k in keys if r.pick(k, 0.10, salt="m") == "canary"}
+    at25 = {k for k in keys if r.pick(k, 0.25, salt="m") == "canary"}
+    assert len(at10) / len(keys) == pytest.approx(0.10, abs=0.01)
+    assert len(at25) / len(keys) == pytest.approx(0.25, abs=0.015)
+    assert at10 <= at25  # subir o tráfego só move clientes de main para canary
+    assert all(r.pick(k, 0.10, salt="m") == "canary" for k in list(at10)[:100])  # sticky
+    assert r.pick("x", 0.0) == "main" and bucket("x", "a") != bucket("x", "b")
+    r.close()
+
+def test_call_records_latency_and_errors_per_arm():
+    r = _router()
+    assert r.call("canary", lambda: 42) == 42
+    with pytest.raises(ZeroDivisionError):
+        r.call("canary", lambda: 1 / 0)
+    s = r.summary()["arms"]["canary"]
+    assert s["requests"] == 2 and s["errors"] == 1 and s["error_rate"] == 0.5 and s["p95_ms"] is not None
+    assert r.summary()["arms"]["main"]["requests"] == 0
+    r.close()
+
+def test_mirror_is_fire_and_forget_and_bounded():
+    r = _router(shadow_queue=2, shadow_workers=1)
+    gate, done = threading.Event(), []
+    t0 = time.perf_counter()
+    results = [r.mirror(lambda: (gate.wait(2), done.append(1))) for _ in range(10)]
+    assert time.perf_counter() - t0 < 0.05  # enfileirar não espera o candidato
+    assert results.count(False) >= 7 and r.dropped == results.count(False)
+    gate.set()
+    for _ in range(100):
+        if r.summary()["arms"]["shadow"]["requests"] == results.count(True):
+            break
+        time.sleep(0.01)
+    assert len(done) == results.count(True) and r.summary()["shadow_queue"]["depth"] == 0
+    r.close()
+
+def test_acall_does_not_count_ignored_exceptions():
+    import asyncio
+    r = _router()
+    class Busy(RuntimeError): pass
+    async def busy(): raise Busy()
+    async def boom(): raise ValueError()
+    with pytest.raises(Busy):
+        asyncio.run(r.acall("canary", busy, ignore=(Busy,)))
+    assert r.summary()["arms"]["canary"]["requests"] == 0  # fila cheia não é erro do modelo
+    with pytest.raises(ValueError):
+        asyncio.run(r.acall("canary", boom, ignore=(Busy,)))
+    assert r.summary()["arms"]["canary"]["errors"] == 1
+    r.close()
+
+def test_stats_are_per_model():
+    r = _router()
+    with pytest.raises(ZeroDivisionError):
+        r.call("canary", lambda: 1 / 0, model="x")
+    r.call("canary", lambda: 1, model="y")
+    by = r.summary()["by_model"]
+    assert by["x"]["canary"]["errors"] == 1 and by["y"]["canary"]["errors"] == 0
+    assert by["default"]["canary"]["requests"] == 0 and r.stats_for("x") is r.stats_for("x")
+    r.close()
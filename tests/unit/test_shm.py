@@ -0,0 +1,40 @@
+import numpy as np
+from lemnisiana.orchestrator.shm import SharedArena, SharedRecord
+from lemnisiana.orchestrator.telemetry import WindowedQuantiles
+from lemnisiana.orchestrator.timeseries import ColumnarTSDB
+
+def _open(path):
+    # mesma ordem de alocação em todos os "workers" => mesmos offsets
+    a = SharedArena(path, size=1 << 20)
+    q = WindowedQuantiles(window_s=60, slots=6, arena=a)
+    rec = SharedRecord(a, ("mode", "traffic"), defaults={"mode": 0, "traffic": 0.0})
+    db = ColumnarTSDB(("x",), raw_capacity=8, tiers=(("1m", 60, 4),), arena=a)
+    a.seal()
+    return a, q, rec, db
+
+def test_second_mapping_sees_first_writes(tmp_path):
+    path = str(tmp_path / "seg.shm")
+    a1, q1, rec1, db1 = _open(path)
+    a2, q2, rec2, db2 = _open(path)
+    assert a1.fresh and not a2.fresh
+    q1.record([10.0] * 90 + [1000.0] * 10, now=5.0)
+    q2.record([10.0] * 100, now=6.0)
+    assert q1.count(now=7.0) == q2.count(now=7.0) == 200
+    assert q2.quantiles((0.5,), now=7.0)[0.5] == q1.quantiles((0.5,), now=7.0)[0.5]
+    assert rec2.read() == {"mode": 0.0, "traffic": 0.0}
+    v = rec1.write({"mode": 2.0, "traffic": 0.25})
+    assert rec2.version == v and rec2.read() == {"mode": 2.0, "traffic": 0.25}
+    for t in range(3):
+        db1.append(float(t), [t])
+    assert db2.query(agg="sum")["series"]["x"] == [0.0, 1.0, 2.0]
+
+def test_fill_applies_only_on_fresh_segment(tmp_path):
+    path = str(tmp_path / "seg.shm")
+    a1 = SharedArena(path, size=1 << 16)
+    x1 = a1.array((4,), np.int64, fill=-1)
+    a1.seal()
+    x1[0] = 7
+    a2 = SharedArena(path, size=1 << 16)
+    x2 = a2.array((4,), np.int64, fill=-1)
+    a2.seal()
+    assert x2.tolist() == [7, -1, -1, -1]
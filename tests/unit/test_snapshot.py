@@ -0,0 +1,34 @@
+import io, json, tarfile
+import pytest
+from lemnisiana.orchestrator.snapshot import Inconsistent, capture, pack_bundle, unpack_bundle
+
+def test_bundle_roundtrip_is_deterministic_and_verified():
+    members = {"state.json": b'{"mode": "main"}', "config/default.yaml": b"guards: {}\n"}
+    data, manifest = pack_bundle(members, {"created": 100.0, "generation": 7})
+    assert pack_bundle(dict(reversed(list(members.items()))), {"created": 100.0, "generation": 7})[0] == data
+    got, files = unpack_bundle(data)
+    assert got == manifest and files == members and got["generation"] == 7
+    assert got["members"]["state.json"]["size"] == len(members["state.json"])
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        assert tar.getnames()[0] == "manifest.json"
+    _, other = pack_bundle({"state.json": b"y"}, {})
+    buf = io.BytesIO()  # manifest de um bundle com o conteúdo de outro
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, body in (("manifest.json", json.dumps(other).encode()), ("state.json", b"x")):
+            ti = tarfile.TarInfo(name); ti.size = len(body)
+            tar.addfile(ti, io.BytesIO(body))
+    with pytest.raises(ValueError):
+        unpack_bundle(buf.getvalue())
+    with pytest.raises(ValueError):
+        unpack_bundle(b"not a bundle")
+
+def test_capture_retries_until_stable():
+    gen, calls = [0], []
+    def collect():
+        calls.append(1)
+        if len(calls) < 3:
+            gen[0] += 1  # algo mudou no meio da coleta
+        return len(calls)
+    assert capture(lambda: gen[0], collect) == (3, 3)
+    with pytest.raises(Inconsistent):
+        capture(lambda: gen.__setitem__(0, gen[0] + 1) or gen[0], lambda: None, attempts=3)
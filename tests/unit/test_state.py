@@ -0,0 +1,34 @@
+import json
+from lemnisiana.orchestrator.state import Generation, VersionedState, per_generation
+
+def test_versioned_state_bumps_generation():
+    gen = Generation()
+    st = VersionedState({"mode": "main", "ts": 0.0}, gen=gen, volatile={"ts"})
+    st["ts"] = 1.0
+    assert gen.value == 0
+    st["mode"] = "canary"
+    st.update(canary_traffic=0.1)
+    assert gen.value == 2
+    assert json.loads(json.dumps(st)) == {"mode": "canary", "ts": 1.0, "canary_traffic": 0.1}
+
+def test_per_generation_memo():
+    gen = Generation()
+    calls = []
+
+    @per_generation(gen)
+    def view():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert view() is view()
+    assert len(calls) == 1
+    gen.bump()
+    assert view()["n"] == 2
+
+def test_concurrent_bumps_are_not_lost():
+    import threading
+    gen = Generation()
+    ts = [threading.Thread(target=lambda: [gen.bump() for _ in range(20_000)]) for _ in range(8)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    assert gen.value == 160_000
@@ -0,0 +1,25 @@
+import asyncio, threading
+from lemnisiana.orchestrator.stream import Broadcaster, sse
+
+def test_bounded_queue_drops_oldest():
+    async def run():
+        bus = Broadcaster(maxsize=3)
+        with bus.subscribe() as sub:
+            for i in range(5):
+                bus.publish(i)
+            assert sub.take_dropped() == 2
+            assert [await sub.get(0.1) for _ in range(3)] == [2, 3, 4]
+        assert len(bus) == 0
+    asyncio.run(run())
+
+def test_publish_from_thread():
+    async def run():
+        bus = Broadcaster()
+        with bus.subscribe() as sub:
+            t = threading.Thread(target=bus.publish, args=({"kind": "promote"},))
+            t.start(); t.join()
+            assert await sub.get(1.0) == {"kind": "promote"}
+    asyncio.run(run())
+
+def test_sse_frame():
+    assert sse({"a": 1}, event="promote", id=7) == 'id: 7\nevent: promote\ndata: {"a": 1}\n\n'
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from lemnisiana.orchestrator.telemetry import LogHistogram, WindowedQuantiles, parse_float_body
+
+def test_quantiles_within_relative_error():
+    rng = np.random.default_rng(0)
+    x = rng.lognormal(mean=4.0, sigma=0.8, size=200_000)
+    w = WindowedQuantiles(window_s=60, slots=6)
+    w.record(x, now=1000.0)
+    q = w.quantiles((0.5, 0.95, 0.99), now=1000.0)
+    for p in (0.5, 0.95, 0.99):
+        exact = np.quantile(x, p)
+        assert abs(q[p] - exact) / exact < 0.02
+
+def test_sliding_window_expires_old_slots():
+    w = WindowedQuantiles(window_s=10, slots=5)
+    w.record([1000.0] * 100, now=0.0)
+    w.record([10.0] * 100, now=8.0)
+    assert w.quantiles((0.99,), now=9.0)[0.99] > 900
+    assert w.count(now=11.0) == 100  # slot de t=0 saiu da janela
+    assert w.quantiles((0.99,), now=11.0)[0.99] < 11
+    assert w.quantiles((0.5,), now=100.0)[0.5] is None
+
+def test_histograms_merge():
+    a, b = LogHistogram(), LogHistogram()
+    a.add([1.0, 2.0])
+    b.add([3.0])
+    a.merge(b)
+    assert a.counts.sum() == 3
+
+def test_parse_float_body():
+    raw = np.array([1.5, 2.5], dtype="<f4").tobytes()
+    assert parse_float_body(raw, "application/octet-stream").tolist() == [1.5, 2.5]
+    assert parse_float_body(b'{"values": [3, 4]}', "application/json").tolist() == [3.0, 4.0]
+
+def test_windowed_ece_matches_reference():
+    from lemnisiana.orchestrator.telemetry import WindowedCalibration
+    rng = np.random.default_rng(1)
+    conf = rng.uniform(0, 1, 50_000)
+    correct = (rng.uniform(0, 1, conf.size) < conf ** 2).astype(float)  # sobreconfiante
+    cal = WindowedCalibration(window_s=60, slots=6, bins=10)
+    cal.record(conf[:20_000], correct[:20_000], now=0.0)
+    cal.record(conf[20_000:], correct[20_000:], now=15.0)
+    idx = np.minimum((conf * 10).astype(int), 9)
+    ref = sum(abs(correct[idx == b].sum() - conf[idx == b].sum()) for b in range(10)) / conf.size
+    st = cal.stats(now=16.0)
+    assert st["count"] == conf.size
+    assert abs(st["ece"] - ref) < 1e-9
+    assert cal.stats(now=61.0)["count"] == 30_000  # primeiro lote expirou
+
+def test_parse_predictions_formats():
+    from lemnisiana.orchestrator.telemetry import parse_predictions_body
+    raw = np.array([0.9, 1, 0.2, 0], dtype="<f4").tobytes()
+    c, y = parse_predictions_body(raw, "application/octet-stream")
+    assert np.allclose(c, [0.9, 0.2]) and y.tolist() == [1.0, 0.0]
+    c, y = parse_predictions_body(b'[0.9, 1]\n[0.2, 0]\n', "application/x-ndjson")
+    assert c.tolist() == [0.9, 0.2] and y.tolist() == [1.0, 0.0]
+    c, y = parse_predictions_body(b'{"confidence": 0.2, "correct": 0}\n', "application/x-ndjson")
+    assert c.tolist() == [0.2] and y.tolist() == [0.0]
+    c, y = parse_predictions_body(b'{"confidence": [0.5], "correct": [1]}', "application/json")
+    assert c.tolist() == [0.5] and y.tolist() == [1.0]
+
+def test_parse_predictions_rejects_malformed_batches():
+    from lemnisiana.orchestrator.telemetry import parse_predictions_body
+    bad = [
+        (b'[[0.9, 1, 7], [0.8, 0, 3]]', "application/json"),          # linhas de 3 não são re-pareadas
+        (b'[0.9, 1, 0.2]', "application/json"),
+        (b'{"confidence": [0.5, 0.6], "correct": [1]}', "application/json"),
+        (b'[[1.5, 1]]', "application/json"),
+        (b'[[0.5, 2]]', "application/json"),
+        (np.array([0.9, 0.5], dtype="<f4").tobytes(), "application/octet-stream"),  # correct = 0.5
+    ]
+    for body, ct in bad:
+        with pytest.raises(ValueError):
+            parse_predictions_body(body, ct)
+    c, y = parse_predictions_body(b'[]', "application/json")
+    assert c.size == y.size == 0
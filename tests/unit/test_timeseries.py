@@ -0,0 +1,48 @@
+import pytest
+from lemnisiana.orchestrator.timeseries import ColumnarTSDB
+
+def _db():
+    db = ColumnarTSDB(("a", "b"), raw_capacity=10, tiers=(("1m", 60.0, 5),))
+    for i in range(30):  # 1 amostra a cada 10s por 300s
+        db.append(i * 10.0, (float(i), 100.0 - i))
+    return db
+
+def test_raw_ring_and_range():
+    db = _db()
+    assert len(db) == 10
+    r = db.query(start=250.0, series=["a"])
+    assert r["tier"] == "raw"
+    assert r["ts"] == [250.0, 260.0, 270.0, 280.0, 290.0]
+    assert r["series"]["a"] == [25.0, 26.0, 27.0, 28.0, 29.0]
+
+def test_downsampled_tier_covers_older_range():
+    db = _db()
+    r = db.query(start=60.0, agg="max")
+    assert r["tier"] == "1m"
+    assert r["ts"] == [60.0, 120.0, 180.0, 240.0]
+    assert r["series"]["a"] == [11.0, 17.0, 23.0, 29.0]
+    assert db.query(start=60.0, agg="count")["series"]["b"] == [6.0] * 4
+
+def test_step_reaggregation():
+    db = _db()
+    r = db.query(start=200.0, step=50.0, agg="mean", series=["a"])
+    assert r["tier"] == "raw"
+    assert r["ts"] == [200.0, 250.0]
+    assert r["series"]["a"] == [22.0, 27.0]
+    r = db.query(start=0.0, step=120.0, agg="sum", series=["a"], tier="1m")
+    assert r["ts"] == [0.0, 120.0, 240.0]
+    assert r["series"]["a"] == [sum(range(0, 12)), sum(range(12, 24)), sum(range(24, 30))]
+
+def test_invalid_query():
+    with pytest.raises(ValueError):
+        _db().query(agg="p99")
+    with pytest.raises(ValueError):
+        _db().query(series=["zzz"])
+
+def test_step_rounds_to_tier_resolution():
+    db = _db()
+    r = db.query(start=0.0, step=100.0, agg="count", series=["a"], tier="1m")  # 100 s -> 2 linhas de 60 s
+    assert r["step"] == 120.0 and r["ts"] == [0.0, 120.0, 240.0]
+    assert r["series"]["a"] == [12.0, 12.0, 6.0]  # cada bucket junta linhas inteiras
+    r = db.query(start=0.0, step=20.0, agg="count", series=["a"], tier="1m")  # abaixo da resolução
+    assert r["step"] == 60.0 and len(r["ts"]) == 5